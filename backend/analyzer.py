@@ -0,0 +1,328 @@
+"""
+Streaming audio analysis: FFT bands, onsets and BPM from any audio source.
+
+AudioAnalyzer takes blocks of samples of any size into a ring buffer and, for
+every `hop` samples, analyses the last `fft_size` samples:
+
+- Hann-windowed rfft -> energy in the bass / mid / high bands, normalised by a
+  slowly decaying peak (automatic gain) to 0..1
+- spectral flux (sum of the positive magnitude changes) -> onset when it rises
+  above a moving mean + k * std of the recent flux, at most one per `min_gap`
+- BPM from the autocorrelation of the flux envelope over the last seconds,
+  searched between `bpm_range`
+
+Each hop produces one feature vector (float64, FEATURES order), so the
+results can go through a shared-memory ring as is. Latency is the hop plus
+the source buffering: with hop=256 at 44.1 kHz, about 6 ms per analysis step
+instead of one 1024-sample chunk (23 ms).
+
+Sources share read(n) -> float32 mono samples in -1..1 (None at the end):
+PyAudioSource (microphone), WavSource (file) and SyntheticSource (kick/hat
+pattern with known beat times, for offline benchmarks).
+
+Usage:
+    analyzer = AudioAnalyzer(rate=44100, hop=256)
+    with PyAudioSource(rate=44100, chunk=256) as source:
+        for features in analyzer.process(source.read(256)):
+            bass = features[BASS]
+"""
+
+import time
+import wave
+
+import numpy as np
+
+FEATURES = ('time', 'level', 'bass', 'mid', 'high', 'flux', 'onset', 'bpm')
+TIME, LEVEL, BASS, MID, HIGH, FLUX, ONSET, BPM = range(len(FEATURES))
+
+DEFAULT_BANDS = ((20.0, 250.0), (250.0, 4000.0), (4000.0, 16000.0))
+
+
+def as_dict(features):
+    """Vector de características -> dict {nombre: valor}."""
+    return dict(zip(FEATURES, (float(v) for v in features)))
+
+
+class RingBuffer:
+    """Buffer circular de muestras float32 (escritor y lector únicos)."""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self._read = 0
+        self._write = 0
+
+    @property
+    def available(self):
+        return self._write - self._read
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        n = len(samples)
+        if n > self.capacity - self.available:
+            # Sin espacio: se descartan las muestras más antiguas
+            self._read = self._write + n - self.capacity
+            samples = samples[-self.capacity:]
+            n = len(samples)
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self._write += n
+
+    def read(self, n, out):
+        """Copiar las `n` muestras más antiguas en `out` y consumirlas."""
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        out[first:n] = self._data[:n - first]
+        self._read += n
+
+
+class AudioAnalyzer:
+    """Análisis por hop: bandas, flujo espectral, onsets y BPM (todo vectorizado)."""
+
+    def __init__(self, rate=44100, fft_size=1024, hop=256, bands=DEFAULT_BANDS,
+                 onset_k=1.5, min_gap=0.1, bpm_range=(60.0, 180.0), bpm_window=6.0, decay=0.999):
+        if hop > fft_size:
+            raise ValueError("AudioAnalyzer: hop no puede ser mayor que fft_size")
+        self.rate = rate
+        self.fft_size = fft_size
+        self.hop = hop
+        self.hop_time = hop / rate
+        self.onset_k = onset_k
+        self.min_gap = min_gap
+        self.bpm_range = bpm_range
+        self.decay = decay
+        self._window = np.hanning(fft_size).astype(np.float32)
+        self._frame = np.zeros(fft_size, dtype=np.float32)
+        self._hop_buf = np.zeros(hop, dtype=np.float32)
+        self._ring = RingBuffer(fft_size * 8)
+        # Bins [inicio, fin) de cada banda; por encima de Nyquist (rate / 2) no hay bins: la banda
+        # se recorta y, si queda vacía, vale 0
+        freqs = np.fft.rfftfreq(fft_size, 1.0 / rate)
+        edges = np.searchsorted(freqs, np.minimum(np.array(bands, dtype=float), rate / 2.0))
+        self._band_lo, self._band_hi = edges[:, 0], np.maximum(edges[:, 1], edges[:, 0])
+        self._band_count = len(bands)
+        self._cumulative = np.zeros(len(freqs) + 1)
+        self._peak = np.full(len(bands), 1e-6)
+        self._prev_mag = np.zeros(len(freqs), dtype=np.float32)
+        # Historial del flujo para el umbral de onsets (~0.5 s) y el BPM (bpm_window)
+        self._flux_hist = np.zeros(max(8, int(0.5 / self.hop_time)))
+        self._envelope = np.zeros(int(bpm_window / self.hop_time))
+        self._hops = 0
+        self._last_onset = -1e9
+        self.bpm = 0.0
+        self._bpm_every = max(1, int(0.5 / self.hop_time))
+        self._features = np.zeros(len(FEATURES))
+
+    def process(self, samples):
+        """Añadir muestras y devolver la lista de vectores de características de los hops completos."""
+        if samples is None or not len(samples):
+            return []
+        self._ring.write(samples)
+        results = []
+        while self._ring.available >= self.hop:
+            self._ring.read(self.hop, self._hop_buf)
+            # Ventana deslizante: el hop nuevo entra por el final
+            self._frame[:-self.hop] = self._frame[self.hop:]
+            self._frame[-self.hop:] = self._hop_buf
+            results.append(self._analyze())
+        return results
+
+    def _analyze(self):
+        self._hops += 1
+        t = self._hops * self.hop_time
+        mag = np.abs(np.fft.rfft(self._frame * self._window))
+        # Energía por banda (suma acumulada: bandas vacías = 0) con ganancia automática
+        np.cumsum(mag * mag, out=self._cumulative[1:])
+        energy = self._cumulative[self._band_hi] - self._cumulative[self._band_lo]
+        self._peak = np.maximum(energy, self._peak * self.decay)
+        bands = energy / self._peak
+        flux = float(np.maximum(mag - self._prev_mag, 0.0).sum())
+        self._prev_mag = mag
+        # Onset: flujo por encima de media + k * desviación de los últimos hops
+        hist = self._flux_hist
+        threshold = hist.mean() + self.onset_k * hist.std()
+        onset = flux > threshold and flux > 1e-3 and t - self._last_onset >= self.min_gap
+        if onset:
+            self._last_onset = t
+        hist[:-1] = hist[1:]
+        hist[-1] = flux
+        self._envelope[:-1] = self._envelope[1:]
+        self._envelope[-1] = flux
+        if self._hops % self._bpm_every == 0 and self._hops >= len(self._envelope) // 2:
+            self.bpm = self._estimate_bpm()
+        f = self._features
+        f[TIME] = t
+        f[LEVEL] = min(1.0, float(np.sqrt(np.mean(self._hop_buf * self._hop_buf))) * 4.0)
+        f[BASS:HIGH + 1] = bands
+        f[FLUX] = flux
+        f[ONSET] = 1.0 if onset else 0.0
+        f[BPM] = self.bpm
+        return f.copy()
+
+    def _estimate_bpm(self):
+        """BPM por autocorrelación (FFT) de la envolvente de flujo."""
+        env = self._envelope - self._envelope.mean()
+        n = len(env)
+        spectrum = np.fft.rfft(env, 2 * n)
+        acf = np.fft.irfft(spectrum * np.conj(spectrum))[:n]
+        # Suavizado: un periodo que no es múltiplo del hop reparte su pico entre dos lags
+        acf = np.convolve(acf, (0.25, 0.5, 0.25), mode='same')
+        lags = np.arange(n)
+        with np.errstate(divide='ignore'):
+            bpm = 60.0 / (lags * self.hop_time)
+        valid = (bpm >= self.bpm_range[0]) & (bpm <= self.bpm_range[1])
+        if not valid.any() or acf[0] <= 0:
+            return self.bpm
+        # Preferencia log-gaussiana alrededor de 120 BPM contra errores de octava
+        weight = np.exp(-0.5 * np.log2(bpm[valid] / 120.0) ** 2)
+        lag = lags[valid][np.argmax(acf[valid] * weight)]
+        # Interpolación parabólica del pico para afinar el lag
+        if 0 < lag < n - 1:
+            a, b, c = acf[lag - 1], acf[lag], acf[lag + 1]
+            denom = a - 2 * b + c
+            if denom:
+                lag = lag + 0.5 * (a - c) / denom
+        return 60.0 / (lag * self.hop_time)
+
+
+# ------------------ Fuentes -------------------------------
+class AudioSource:
+    """Fuente de audio: read(n) -> float32 mono en -1..1, o None al terminar."""
+
+    rate = 44100
+
+    def read(self, n):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PyAudioSource(AudioSource):
+    """Entrada de micrófono con PyAudio (bloques de `chunk` muestras)."""
+
+    def __init__(self, rate=44100, chunk=256, device=None):
+        import pyaudio
+        self.rate = rate
+        self.chunk = chunk
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(format=pyaudio.paInt16, channels=1, rate=rate, input=True,
+                                     frames_per_buffer=chunk, input_device_index=device)
+
+    def read(self, n=None):
+        data = self._stream.read(n or self.chunk, exception_on_overflow=False)
+        return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._pa.terminate()
+            self._stream = None
+
+
+class WavSource(AudioSource):
+    """Archivo WAV PCM (8/16/32 bits); con realtime=True se lee al ritmo del audio."""
+
+    def __init__(self, path, realtime=False):
+        self._wav = wave.open(path, 'rb')
+        self.rate = self._wav.getframerate()
+        self.channels = self._wav.getnchannels()
+        self.width = self._wav.getsampwidth()
+        self.realtime = realtime
+        self._next = None
+
+    def read(self, n):
+        raw = self._wav.readframes(n)
+        if not raw:
+            return None
+        if self.width == 1:
+            samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        else:
+            dtype = {2: np.int16, 4: np.int32}[self.width]
+            samples = np.frombuffer(raw, dtype=dtype).astype(np.float32) / float(2 ** (8 * self.width - 1))
+        samples = samples.reshape(-1, self.channels).mean(axis=1)
+        if self.realtime:
+            _pace(self, len(samples))
+        return samples
+
+    def close(self):
+        self._wav.close()
+
+
+class SyntheticSource(AudioSource):
+    """Patrón sintético: bombo en cada beat, charles a contratiempo y ruido de fondo.
+
+    beat_times guarda los instantes (s) de cada bombo generado, para medir la
+    latencia de detección.
+    """
+
+    def __init__(self, rate=44100, bpm=120.0, duration=None, noise=0.01, seed=0, realtime=False):
+        self.rate = rate
+        self.bpm = bpm
+        self.duration = duration
+        self.noise = noise
+        self.realtime = realtime
+        self.beat_times = []
+        self._rng = np.random.default_rng(seed)
+        self._pos = 0
+        self._next = None
+        beat = int(rate * 60.0 / bpm)
+        t = np.arange(beat) / rate
+        kick = np.sin(2 * np.pi * (55.0 + 60.0 * np.exp(-t * 30.0)) * t) * np.exp(-t * 12.0)
+        hat = self._rng.standard_normal(beat) * np.exp(-np.maximum(t - t[beat // 2], 0) * 60.0) * 0.2
+        hat[:beat // 2] = 0.0
+        self._pattern = (0.8 * kick + hat).astype(np.float32)
+
+    def read(self, n):
+        if self.duration is not None and self._pos >= self.duration * self.rate:
+            return None
+        beat = len(self._pattern)
+        idx = (self._pos + np.arange(n)) % beat
+        first_beat = -(-self._pos // beat) * beat
+        self.beat_times.extend(b / self.rate for b in range(first_beat, self._pos + n, beat))
+        samples = self._pattern[idx] + self._rng.standard_normal(n).astype(np.float32) * self.noise
+        self._pos += n
+        if self.realtime:
+            _pace(self, n)
+        return samples
+
+
+def _pace(source, n):
+    """Dormir lo necesario para entregar las muestras al ritmo real del audio."""
+    now = time.monotonic()
+    if source._next is None:
+        source._next = now
+    source._next += n / source.rate
+    if source._next > now:
+        time.sleep(source._next - now)
+
+
+def open_source(kind='pyaudio', rate=44100, chunk=256, **kwargs):
+    """Crear una fuente por nombre: 'pyaudio', 'wav' (path=...) o 'synthetic'."""
+    if kind == 'pyaudio':
+        return PyAudioSource(rate, chunk, kwargs.get('device'))
+    if kind == 'wav':
+        return WavSource(kwargs['path'], kwargs.get('realtime', True))
+    if kind == 'synthetic':
+        return SyntheticSource(rate, kwargs.get('bpm', 120.0), realtime=kwargs.get('realtime', True))
+    raise ValueError(f"open_source: fuente {kind!r} desconocida (pyaudio, wav, synthetic)")
+
+
+def source_from_spec(spec, rate=44100, chunk=256):
+    """Fuente a partir de un texto: "pyaudio", "synthetic", "synthetic:BPM" o "wav:ruta"."""
+    kind, _, arg = spec.partition(':')
+    if kind == 'wav':
+        return open_source(kind, rate, chunk, path=arg)
+    if kind == 'synthetic' and arg:
+        return open_source(kind, rate, chunk, bpm=float(arg))
+    return open_source(kind, rate, chunk)
@@ -0,0 +1,239 @@
+"""
+Art-Net output transport (ArtDmx over UDP).
+
+ArtNetSender is a drop-in alternative to the serial DMXSender: same
+update_channel/start/stop surface, but each frame goes out as an ArtDmx
+packet to a node on the network (unicast) or to the whole subnet (broadcast).
+A sequence number (1..255) is stamped on every packet so nodes can reorder.
+
+ArtNetGroup drives several universes with one clock and, if enabled, closes
+every frame with ArtSync so nodes latch all universes at once: one packet to
+each distinct sender destination (a node or a broadcast address), or only to
+`sync_target` if given.
+
+A target counts as broadcast (SO_BROADCAST on the socket) when it is
+255.255.255.255, when it is the directed broadcast of `netmask`, or when
+`broadcast=True` is passed. Without a netmask, x.255.255.255 of the Art-Net
+primary (2.0.0.0/8) and secondary (10.0.0.0/8) networks are recognised; an
+address that merely ends in .255 may be a host on a wider subnet and is
+treated as unicast.
+
+Usage:
+    a = ArtNetSender(target='192.168.1.50', universe=0)
+    a.start()
+    a.update_channel(0, 255)
+    a.stop()
+
+    g = ArtNetGroup([ArtNetSender('192.168.1.255', universe=u, netmask='255.255.255.0') for u in range(4)])
+    g.start()
+    g[2].update_channel(10, 128)   # universo 2, canal 11
+    g.stop()
+"""
+
+import socket
+import struct
+import ipaddress
+import threading
+import logging
+
+from .dmx import DMXOutput, FrameStats
+
+ARTNET_PORT = 6454
+ARTNET_ID = b'Art-Net\x00'
+ARTNET_VERSION = 14
+OP_DMX = 0x5000
+OP_SYNC = 0x5200
+
+# Cabecera ArtDmx: ID, OpCode (LE), ProtVer (BE), Sequence, Physical, SubUni, Net, Length (BE)
+DMX_HEADER_SIZE = 18
+
+
+def build_artdmx_header(universe, sequence, length, physical=0):
+    """Cabecera ArtDmx de 18 bytes para un universo de 15 bits (Net:SubNet:Universe)."""
+    return (ARTNET_ID
+            + struct.pack('<H', OP_DMX)
+            + struct.pack('>H', ARTNET_VERSION)
+            + struct.pack('BBBB', sequence & 0xFF, physical & 0xFF, universe & 0xFF, (universe >> 8) & 0x7F)
+            + struct.pack('>H', length))
+
+
+def build_artsync():
+    """Paquete ArtSync (14 bytes)."""
+    return ARTNET_ID + struct.pack('<H', OP_SYNC) + struct.pack('>H', ARTNET_VERSION) + b'\x00\x00'
+
+
+def _is_broadcast(target, netmask=None):
+    """¿`target` es una dirección de broadcast? Con `netmask`, si es la dirigida de su subred."""
+    if target in ('<broadcast>', '255.255.255.255'):
+        return True
+    try:
+        address = ipaddress.IPv4Address(target)
+    except ValueError:
+        # Nombre de host: unicast salvo que se indique broadcast=True
+        return False
+    if netmask is not None:
+        network = ipaddress.IPv4Network(f"{target}/{netmask}", strict=False)
+        return network.prefixlen < 31 and address == network.broadcast_address
+    # Sin máscara: solo el broadcast de las redes Art-Net estándar (2.0.0.0/8 y 10.0.0.0/8)
+    return target.split('.', 1)[0] in ('2', '10') and target.endswith('.255.255.255')
+
+
+def open_socket(broadcast=False, bind=None):
+    """Socket UDP para Art-Net. `bind` opcional: (ip, puerto) de origen."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if broadcast:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    if bind is not None:
+        sock.bind(bind)
+    return sock
+
+
+class ArtNetSender(DMXOutput):
+    """Salida Art-Net de un universo (ArtDmx por UDP).
+
+    target: IP del nodo (unicast) o dirección de broadcast (p.ej. 2.255.255.255).
+    universe: dirección de puerto de 15 bits (Net << 8 | SubNet << 4 | Universe).
+    broadcast: forzar (o descartar) broadcast; por defecto se deduce de target y netmask.
+    netmask: máscara de la subred de target, para reconocer su broadcast dirigido.
+    sync: enviar ArtSync tras cada ArtDmx (sólo tiene sentido con un universo;
+          para varios universos usar ArtNetGroup).
+    """
+
+    def __init__(self, target='255.255.255.255', universe=0, port=ARTNET_PORT,
+                 num_channels=512, broadcast=None, sync=False, sock=None, netmask=None):
+        if not 2 <= int(num_channels) <= 512 or int(num_channels) % 2:
+            raise ValueError("ArtNetSender: num_channels debe ser par y estar entre 2 y 512")
+        universe = int(universe) & 0x7FFF
+        # Cabecera ArtDmx incluida en los dos buffers: sólo cambian sequence y datos
+        super().__init__(num_channels, header=build_artdmx_header(universe, 0, int(num_channels)))
+        self.target = target
+        self.port = int(port)
+        self.universe = universe
+        self.broadcast = _is_broadcast(target, netmask) if broadcast is None else bool(broadcast)
+        self.sync = bool(sync)
+        self.sequence = 0
+
+        self._own_socket = sock is None
+        self.sock = sock
+        self._open()
+        logging.info(f"ArtNetSender: universe {self.universe} -> {target}:{self.port}"
+                     f"{' (broadcast)' if self.broadcast else ''}")
+
+    def _next_sequence(self):
+        # 0 desactiva el reordenado en el nodo, así que se recorre 1..255
+        self.sequence = self.sequence % 255 + 1
+        return self.sequence
+
+    def _send_dmx(self):
+        """Enviar el ArtDmx del universo (sin ArtSync)."""
+        packet = self._publish()
+        packet[12] = self._next_sequence()
+        try:
+            self._open().sendto(packet, (self.target, self.port))
+        except OSError as e:
+            logging.error(f"ArtNetSender._send_once: error enviando universo {self.universe}: {e}")
+
+    def send_sync(self):
+        """Enviar un ArtSync al destino de este universo."""
+        try:
+            self._open().sendto(build_artsync(), (self.target, self.port))
+        except OSError as e:
+            logging.error(f"ArtNetSender.send_sync: {e}")
+
+    def _send_once(self):
+        """Enviar un paquete ArtDmx (y ArtSync si está activado)."""
+        self._send_dmx()
+        if self.sync:
+            self.send_sync()
+
+    def _open(self):
+        """(Re)abrir el socket propio: stop() lo cierra, y start() o UniverseManager pueden volver a enviar."""
+        if self._own_socket and self.sock is None:
+            self.sock = open_socket(self.broadcast)
+        return self.sock
+
+    def _close(self):
+        if self._own_socket and self.sock is not None:
+            try:
+                self.sock.close()
+                logging.info(f"ArtNetSender: socket closed (universe {self.universe})")
+            except Exception:
+                logging.exception("ArtNetSender.stop: error cerrando socket")
+            self.sock = None
+
+
+class ArtNetGroup:
+    """Varios ArtNetSender enviados desde un único reloj, con ArtSync opcional.
+
+    Cada trama envía el ArtDmx de todos los universos y, si `sync` está activo,
+    un ArtSync al final para que los nodos actualicen todos a la vez: uno por
+    destino distinto de los senders, o uno solo a `sync_target` (p.ej. el
+    broadcast dirigido de la subred) si se indica.
+    """
+
+    def __init__(self, senders, sync=True, sync_target=None, netmask=None):
+        self.senders = list(senders)
+        self.sync = bool(sync)
+        self.sync_target = sync_target
+        self.running = False
+        self.stats = FrameStats()
+        self._thread = None
+        self._sync_packet = build_artsync()
+        self.netmask = netmask
+        self._sync_socket = None
+        # Un sender por destino distinto: su socket ya tiene SO_BROADCAST si hace falta
+        self._sync_senders = []
+        seen = set()
+        for sender in self.senders:
+            if (sender.target, sender.port) not in seen:
+                seen.add((sender.target, sender.port))
+                self._sync_senders.append(sender)
+
+    def __getitem__(self, index):
+        return self.senders[index]
+
+    def __len__(self):
+        return len(self.senders)
+
+    def _send_once(self):
+        for sender in self.senders:
+            sender._send_dmx()
+        if not self.sync or not self.senders:
+            return
+        if self.sync_target is not None:
+            if self._sync_socket is None:
+                self._sync_socket = open_socket(_is_broadcast(self.sync_target, self.netmask))
+            destinations = [(self._sync_socket, (self.sync_target, self.senders[0].port))]
+        else:
+            destinations = [(sender._open(), (sender.target, sender.port)) for sender in self._sync_senders]
+        for sock, address in destinations:
+            try:
+                sock.sendto(self._sync_packet, address)
+            except OSError as e:
+                logging.error(f"ArtNetGroup: error enviando ArtSync a {address[0]}: {e}")
+
+    # Mismo bucle que cada salida (periodo y realineado tras un retraso)
+    send_loop = DMXOutput.send_loop
+    _next_interval = DMXOutput._next_interval
+
+    def start(self, interval=0.023):
+        if self.running:
+            logging.debug("ArtNetGroup.start: ya estaba corriendo")
+            return
+        self.interval = float(interval)
+        self.running = True
+        self._thread = threading.Thread(target=self.send_loop, args=(self.interval,), daemon=True)
+        self._thread.start()
+        logging.info(f"ArtNetGroup: started ({len(self.senders)} universes, sync={self.sync})")
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for sender in self.senders:
+            sender.stop()
+        if self._sync_socket is not None:
+            self._sync_socket.close()
+            self._sync_socket = None
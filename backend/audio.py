@@ -1,67 +1,168 @@
 """
 Audio reactivity module for DMX Controller.
 Maps audio input to DMX values for moving heads.
+
+The input is analysed hop by hop with analyzer.AudioAnalyzer (FFT bands,
+onsets, BPM): bass/mid/high drive red/green/blue and the level drives the
+dimmer, with a full-dimmer flash on every onset. The source is pluggable:
+microphone (PyAudio, default), WAV file or synthetic pattern, chosen with the
+`source` argument or the DMX_AUDIO_SOURCE environment variable
+("pyaudio", "synthetic[:BPM]" or "wav:/path/to/file.wav").
+
+By default the capture and analysis run in a separate process
+(audioworker.AudioWorker) so they do not compete for the GIL with the DMX
+send loop; the features arrive through a shared-memory ring that a frame
+clock callback reads lock-free and turns into one DMX write per frame. With
+process=False the same work runs in a thread of this process instead.
 """
 
-import pyaudio
-import numpy as np
+import os
 import threading
 import logging
 
+import numpy as np
+
+from .effects import HeadLayout
+from .analyzer import AudioAnalyzer, source_from_spec, LEVEL, BASS, HIGH, ONSET
+from .audioworker import AudioWorker, FeatureRing
+from .scheduler import frame_scheduler
+
+RATE = 44100
+HOP = 256
+
+
+def source_spec(spec=None):
+    return spec or os.environ.get('DMX_AUDIO_SOURCE', 'pyaudio')
+
+
 class AudioReactivity:
-    def __init__(self):
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler or frame_scheduler
         self.running = False
         self.lock = threading.Lock()
+        self.worker = None
+        self.ring = None
+        self._thread = None
+        self._stop = None
+        self._state = None
 
-    def audio_reactivity(self, dmx_sender, start_address, heads, mode_channels):
-        CHUNK = 1024
-        RATE = 44100
-        p = pyaudio.PyAudio()
-        stream = p.open(format=pyaudio.paInt16, channels=1, rate=RATE, input=True, frames_per_buffer=CHUNK)
+    @property
+    def hop_time(self):
+        """Segundos por vector: los de la fuente abierta (HOP / RATE hasta que se abre)."""
+        ring = self.ring
+        return (ring.hop_time if ring is not None else 0.0) or HOP / RATE
 
+    @property
+    def features(self):
+        """Último vector de características publicado (analyzer.FEATURES), o None."""
+        ring = self.ring
+        return ring.latest()[1] if ring is not None else None
+
+    def audio_reactivity(self, ring, spec, stop):
+        """Captura y análisis en un hilo de este proceso (modo process=False)."""
         try:
-            while self.running:
-                data = np.frombuffer(stream.read(CHUNK, exception_on_overflow=False), dtype=np.int16)
-                level = np.abs(data).mean() / 32768 * 255  # Normalize to 0-255
-                for head in range(heads):
-                    base = start_address - 1 + head * mode_channels
-                    r_idx = base + (3 if mode_channels == 9 else 6)
-                    g_idx = r_idx + 1
-                    b_idx = r_idx + 2
-                    dimmer_idx = base + (2 if mode_channels == 9 else 5)
-                    dmx_sender.update_channel(r_idx, int(level))
-                    dmx_sender.update_channel(g_idx, int(255 - level))
-                    dmx_sender.update_channel(b_idx, int(level / 2))
-                    dmx_sender.update_channel(dimmer_idx, int(level))
-                logging.debug(f"Audio level: {level:.1f}")
+            source = source_from_spec(spec, RATE, HOP)
+        except Exception as e:
+            logging.error(f"Audio error: {e}")
+            return
+        try:
+            analyzer = AudioAnalyzer(rate=source.rate, hop=HOP)
+            ring.hop_time = analyzer.hop_time
+            while not stop.is_set():
+                samples = source.read(HOP)
+                if samples is None:
+                    break
+                for features in analyzer.process(samples):
+                    ring.write(features)
         except Exception as e:
             logging.error(f"Audio error: {e}")
         finally:
-            stream.stop_stream()
-            stream.close()
-            p.terminate()
-            logging.info("Audio reactivity stopped")
+            source.close()
 
-    def start(self, dmx_sender, start_address, heads, mode_channels):
+    def _source_alive(self):
+        if self.worker is not None:
+            return self.worker.alive
+        return self._thread is not None and self._thread.is_alive()
+
+    def _render(self, now):
+        """Callback del reloj de tramas: vectores nuevos del anillo -> una escritura DMX."""
+        state = self._state
+        if state is None or not self.running:
+            return False
+        seq, rows = self.ring.read_since(state['seq'])
+        state['seq'] = seq
+        if not len(rows) and not self._source_alive():
+            # La fuente o el proceso de análisis terminó: se avisa y se para (fuera del hilo de envío)
+            code = f" (exit code {self.worker.exitcode})" if self.worker is not None else ""
+            logging.error(f"Audio analysis stopped{code}; audio reactivity stopped")
+            threading.Thread(target=self.stop, name='audio-stop', daemon=True).start()
+            return False
+        flash = state['flash'] * 0.7
+        if len(rows):
+            if rows[:, ONSET].any():
+                flash = 1.0
+            features = rows[-1]
+            state['rgb'] = np.rint(features[BASS:HIGH + 1] * 255)
+            state['level'] = features[LEVEL]
+        elif state['flash'] == 0.0:
+            # Sin datos nuevos ni destello en curso: la trama ya tiene estos valores
+            return
+        state['flash'] = flash if flash >= 0.01 else 0.0
+        dimmer = round(max(state['level'], flash) * 255)
+        # Una sola escritura para todas las cabezas (RGB + dimmer)
+        state['layout'].set(state['sender'], ('red', 'green', 'blue', 'dimmer'), (*state['rgb'], dimmer))
+
+    def start(self, dmx_sender, start_address, heads, mode_channels, source=None, process=True):
         with self.lock:
             if self.running:
                 logging.warning("Audio reactivity already running")
                 return
+            spec = source_spec(source)
+            if process:
+                self.worker = AudioWorker(spec, RATE, HOP)
+                self.worker.start()
+                self.ring = self.worker.ring
+            else:
+                self.ring = FeatureRing()
+                self._stop = threading.Event()
+                self._thread = threading.Thread(
+                    target=self.audio_reactivity, args=(self.ring, spec, self._stop), daemon=True)
+                self._thread.start()
+            self._state = {
+                'sender': dmx_sender,
+                'layout': HeadLayout(start_address, heads, mode_channels),
+                'seq': 0,
+                'rgb': np.zeros(3),
+                'level': 0.0,
+                'flash': 0.0,
+            }
             self.running = True
-            threading.Thread(
-                target=self.audio_reactivity,
-                args=(dmx_sender, start_address, heads, mode_channels),
-                daemon=True
-            ).start()
+            self.scheduler.ensure_clock(dmx_sender)
+            self.scheduler.add(self._render)
 
     def stop(self):
         with self.lock:
+            if not self.running:
+                return
             self.running = False
+            # Primero fuera del reloj; después ya se puede cerrar el anillo
+            self.scheduler.remove(self._render)
+            self._state = None
+            if self.worker is not None:
+                self.worker.stop()
+                self.worker = None
+            if self._thread is not None:
+                self._stop.set()
+                self._thread.join(timeout=1.0)
+                self._thread = None
+                self.ring.close()
+            self.ring = None
+            logging.info("Audio reactivity stopped")
 
 audio_reactivity = AudioReactivity()
 
-def run_audio_reactivity(dmx_sender, start_address, heads, mode_channels):
-    audio_reactivity.start(dmx_sender, start_address, heads, mode_channels)
+def run_audio_reactivity(dmx_sender, start_address, heads, mode_channels, source=None, process=True):
+    audio_reactivity.start(dmx_sender, start_address, heads, mode_channels, source, process)
 
 def stop_audio_reactivity():
     audio_reactivity.stop()
@@ -0,0 +1,222 @@
+"""
+Audio analysis in a separate process, published through a shared-memory ring.
+
+Reading the sound card and running the FFT in a thread of the GUI interpreter
+competes for the GIL with DMXSender's send loop and the frame clock, and shows
+up as DMX frame jitter. AudioWorker runs source + analyzer.AudioAnalyzer in
+its own process and writes every hop's feature vector into a
+FeatureRing in multiprocessing.shared_memory:
+
+    header   int64 seq            number of vectors written so far
+             float64 hop_time     seconds per vector (set by the writer)
+    stamps   int64[slots]         seq of the vector stored in each slot
+    data     float64[slots, F]    feature vectors (analyzer.FEATURES order)
+
+There is one writer. It stamps the slot as -1, writes the vector, stamps it
+with its seq and only then publishes seq. Readers never lock: they read seq,
+copy the slots they want and accept them if the stamps still match (a slot
+overwritten during the copy is retried). A reader that polls once per frame
+gets every hop since its last read with read_since(), so no onset is lost
+between frames.
+
+Usage:
+    worker = AudioWorker('synthetic')
+    worker.start()
+    seq, rows = worker.ring.read_since(0)
+    worker.stop()
+
+benchmarks/bench_audio_jitter.py compares DMX frame jitter without audio,
+with analysis in a thread and with this worker.
+"""
+
+import logging
+import logging.handlers
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .analyzer import AudioAnalyzer, FEATURES, source_from_spec
+
+HEADER = 64   # seq + relleno hasta una línea de caché
+
+
+class FeatureRing:
+    """Anillo de vectores de características en memoria compartida (un escritor, lectores sin lock)."""
+
+    def __init__(self, name=None, slots=64, features=len(FEATURES)):
+        size = HEADER + slots * 8 + slots * features * 8
+        self.create = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.create, size=size if self.create else 0)
+        self.name = self.shm.name
+        self.slots = slots
+        self.features = features
+        buf = self.shm.buf
+        self._seq = np.ndarray((1,), dtype=np.int64, buffer=buf, offset=0)
+        self._hop_time = np.ndarray((1,), dtype=np.float64, buffer=buf, offset=8)
+        self._stamps = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=HEADER)
+        self._data = np.ndarray((slots, features), dtype=np.float64, buffer=buf, offset=HEADER + slots * 8)
+        if self.create:
+            self._seq[0] = 0
+            self._hop_time[0] = 0.0
+            self._stamps[:] = -1
+
+    @property
+    def seq(self):
+        return int(self._seq[0])
+
+    @property
+    def hop_time(self):
+        """Segundos entre vectores según el escritor (0 hasta que abre la fuente)."""
+        return float(self._hop_time[0])
+
+    @hop_time.setter
+    def hop_time(self, value):
+        self._hop_time[0] = value
+
+    def write(self, features):
+        """Publicar un vector (solo el proceso escritor)."""
+        seq = int(self._seq[0]) + 1
+        slot = seq % self.slots
+        self._stamps[slot] = -1
+        self._data[slot] = features
+        self._stamps[slot] = seq
+        self._seq[0] = seq
+
+    def latest(self):
+        """(seq, vector) del último vector publicado, o (0, None) si aún no hay ninguno."""
+        seq, rows = self.read_since(None)
+        return seq, (rows[-1] if len(rows) else None)
+
+    def read_since(self, last, retries=3):
+        """(seq, filas) con los vectores publicados después de `last` (None = solo el último).
+
+        Si el escritor ha dado más de una vuelta desde `last` se devuelven los
+        `slots` más recientes.
+        """
+        for _ in range(retries):
+            seq = int(self._seq[0])
+            if seq == 0 or seq == last:
+                return seq, np.zeros((0, self.features))
+            first = seq if last is None else max(last + 1, seq - self.slots + 1)
+            wanted = np.arange(first, seq + 1)
+            slots = wanted % self.slots
+            rows = self._data[slots].copy()
+            if np.array_equal(self._stamps[slots], wanted):
+                return seq, rows
+        # El escritor pisa los slots continuamente: nos quedamos con el último consistente
+        logging.debug("FeatureRing: lectura inconsistente, se reintenta en la próxima trama")
+        return last or 0, np.zeros((0, self.features))
+
+    def close(self):
+        # Las vistas numpy exportan el buffer: hay que soltarlas antes de cerrar
+        self._seq = self._hop_time = self._stamps = self._data = None
+        self.shm.close()
+        if self.create:
+            self.shm.unlink()
+
+
+class _Forward(logging.Handler):
+    """En el padre: los registros del hijo entran al logging de este proceso (logpipe incluido)."""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+def _child_logging(log_queue, level):
+    """En el hijo: sustituir los handlers heredados del fork por una cola hacia el padre.
+
+    Los heredados (la cola en memoria de logpipe, sus locks) no tienen hilo
+    escritor en este proceso y pueden haberse copiado con un lock tomado.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+
+def _worker_main(ring_name, slots, spec, rate, hop, stop, log_queue=None, log_level=logging.INFO):
+    """Proceso de audio: leer la fuente, analizar y publicar cada hop en el anillo."""
+    if log_queue is not None:
+        _child_logging(log_queue, log_level)
+    ring = FeatureRing(ring_name, slots)
+    try:
+        source = source_from_spec(spec, rate, hop)
+    except Exception as e:
+        logging.error(f"Audio worker: no se pudo abrir la fuente {spec!r}: {e}")
+        ring.close()
+        return
+    try:
+        # La frecuencia de la fuente (un WAV trae la suya), no la pedida
+        analyzer = AudioAnalyzer(rate=source.rate, hop=hop)
+        ring.hop_time = analyzer.hop_time
+        while not stop.is_set():
+            samples = source.read(hop)
+            if samples is None:
+                break
+            for features in analyzer.process(samples):
+                ring.write(features)
+    except Exception:
+        logging.exception("Audio worker error")
+    finally:
+        source.close()
+        ring.close()
+
+
+class AudioWorker:
+    """Proceso de análisis de audio que publica en un FeatureRing."""
+
+    def __init__(self, spec='pyaudio', rate=44100, hop=256, slots=64):
+        self.spec = spec
+        self.rate = rate
+        self.hop = hop
+        self.slots = slots
+        self.ring = None
+        self._process = None
+        # fork donde exista: con spawn el hijo reimportaría main.py (Qt, GPIO, OSC)
+        self._ctx = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else 'spawn')
+        self._stop = None
+        self._log_queue = None
+        self._listener = None
+
+    @property
+    def alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def exitcode(self):
+        return self._process.exitcode if self._process is not None else None
+
+    def start(self):
+        if self.alive:
+            return
+        self.ring = FeatureRing(slots=self.slots)
+        self._stop = self._ctx.Event()
+        # Logs del hijo por una cola de multiprocessing, reenviados aquí por un hilo
+        self._log_queue = self._ctx.Queue()
+        self._listener = logging.handlers.QueueListener(self._log_queue, _Forward())
+        self._listener.start()
+        self._process = self._ctx.Process(
+            target=_worker_main, name='audio-worker', daemon=True,
+            args=(self.ring.name, self.slots, self.spec, self.rate, self.hop, self._stop,
+                  self._log_queue, logging.getLogger().level))
+        self._process.start()
+        logging.info(f"Audio worker started (pid {self._process.pid}, source {self.spec})")
+
+    def stop(self, timeout=2.0):
+        if self._process is not None:
+            self._stop.set()
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout)
+            self._process = None
+        if self._listener is not None:
+            # Tras el join: lo que el hijo logueó al terminar ya está en la cola
+            self._listener.stop()
+            self._log_queue.close()
+            self._listener = self._log_queue = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
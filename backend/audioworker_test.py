@@ -0,0 +1,47 @@
+"""FeatureRing of backend/audioworker.py: reads since a seq, ring wrap and a second attachment."""
+
+import numpy as np
+
+from backend.audioworker import FeatureRing
+
+
+def _vector(seq, features):
+    return np.full(features, float(seq))
+
+
+def test_read_since_and_wrap():
+    ring = FeatureRing(slots=4)
+    try:
+        assert ring.read_since(0)[1].shape == (0, ring.features)
+        assert ring.latest() == (0, None)
+        for seq in range(1, 4):
+            ring.write(_vector(seq, ring.features))
+        seq, rows = ring.read_since(1)
+        assert seq == 3
+        assert rows[:, 0].tolist() == [2.0, 3.0]
+        # Seis más: el anillo da la vuelta y quedan solo los `slots` más recientes
+        for seq in range(4, 10):
+            ring.write(_vector(seq, ring.features))
+        seq, rows = ring.read_since(3)
+        assert seq == 9
+        assert rows[:, 0].tolist() == [6.0, 7.0, 8.0, 9.0]
+        assert ring.read_since(9)[1].shape == (0, ring.features)
+        assert ring.latest()[1][0] == 9.0
+    finally:
+        ring.close()
+
+
+def test_reader_attaches_by_name():
+    ring = FeatureRing(slots=8)
+    try:
+        ring.hop_time = 256 / 48000
+        ring.write(_vector(1, ring.features))
+        reader = FeatureRing(ring.name, slots=8)
+        try:
+            assert reader.hop_time == 256 / 48000
+            seq, rows = reader.read_since(0)
+            assert seq == 1 and rows[0, 0] == 1.0
+        finally:
+            reader.close()
+    finally:
+        ring.close()
@@ -0,0 +1,120 @@
+"""
+Channel grid state for the GUI: one snapshot per refresh and one write per frame.
+
+ChannelView is the Qt-free half of the Manual tab's channel grid
+(channelgrid.py). It keeps the values shown for every channel of every
+universe as one (universes, channels) array:
+
+- refresh() copies each monitored output's buffer under its lock once (not
+  once per channel or per slider) and returns the flat indices that changed
+  since the previous refresh; the view repaints only those cells, and only
+  the ones on screen.
+- set() stages writes in a StagedOutput per universe; a frame clock callback
+  flushes each with one update_sparse per frame, so a slider drag generating
+  hundreds of events per second costs at most one write per frame.
+
+Nothing here depends on the number of fixtures or on the head layout: the
+grid covers whole universes (see benchmarks/bench_channelgrid.py).
+
+Usage:
+    view = ChannelView({1: mixed_output}, {1: programmer_layer})
+    view.start()
+    changed = view.refresh()              # timer de la UI
+    view.set(1, [0, 1, 2], 255)           # sale en la próxima trama
+"""
+
+import numpy as np
+
+from .dmx import StagedOutput
+from .scheduler import frame_scheduler
+
+
+class ChannelView:
+    """Valores mostrados por la rejilla de canales y escrituras agrupadas por trama."""
+
+    def __init__(self, monitors, targets=None, scheduler=None, num_channels=512):
+        self.scheduler = scheduler or frame_scheduler
+        self.num_channels = int(num_channels)
+        self.running = False
+        self.set_outputs(monitors, targets)
+
+    def set_outputs(self, monitors, targets=None):
+        """monitors: {universo: salida que se muestra}; targets: {universo: salida donde se escribe}."""
+        # Lo pendiente de las salidas anteriores no se pierde
+        for staging in getattr(self, 'staging', {}).values():
+            staging.flush()
+        self.universes = sorted(monitors)
+        self.monitors = [monitors[u] for u in self.universes]
+        targets = targets or monitors
+        self.staging = {u: StagedOutput(targets[u]) for u in self.universes if u in targets}
+        self.values = np.zeros((len(self.universes), self.num_channels), dtype=np.uint8)
+        self._scratch = np.empty_like(self.values)
+        # La primera refresh() lo marca todo como cambiado
+        self._fresh = True
+
+    def __len__(self):
+        return self.values.size
+
+    def locate(self, flat):
+        """(universo, canal 0-based) de un índice plano."""
+        row, channel = divmod(int(flat), self.num_channels)
+        return self.universes[row], channel
+
+    # ------------------ Lectura ---------------------------
+    def refresh(self):
+        """Instantánea de todas las salidas (un lock por salida); índices planos que cambiaron."""
+        for row, output in enumerate(self.monitors):
+            n = min(output.num_channels, self.num_channels)
+            with output.lock:
+                self._scratch[row, :n] = output.dmx_data[:n]
+        if self._fresh:
+            self._fresh = False
+            changed = np.arange(self.values.size)
+        else:
+            changed = np.flatnonzero(self._scratch != self.values)
+        self.values, self._scratch = self._scratch, self.values
+        return changed
+
+    # ------------------ Escritura -------------------------
+    def set(self, universe, channels, values):
+        """Escribir canales (0-based) de un universo en la próxima trama; el último valor gana."""
+        staging = self.staging.get(universe)
+        if staging is None:
+            raise KeyError(f"universe {universe} not writable")
+        staging.update_sparse(channels, values)
+        if not self.running:
+            staging.flush()
+
+    def set_flat(self, indices, values):
+        """set() con índices planos (filas de la rejilla); una escritura por universo."""
+        indices = np.asarray(indices, dtype=np.intp).ravel()
+        values = np.broadcast_to(np.asarray(values), indices.shape)
+        rows, channels = np.divmod(indices, self.num_channels)
+        if not len(rows) or rows.min() == rows.max():
+            # Selección dentro de un universo (lo normal): sin agrupar
+            if len(rows):
+                self.set(self.universes[rows[0]], channels, values)
+            return
+        for row in np.unique(rows):
+            mask = rows == row
+            self.set(self.universes[row], channels[mask], values[mask])
+
+    def _flush(self, now):
+        if not self.running:
+            return False
+        for staging in self.staging.values():
+            staging.flush()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.scheduler.add(self._flush)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.scheduler.remove(self._flush)
+        for staging in self.staging.values():
+            staging.flush()
@@ -0,0 +1,162 @@
+"""
+Layered compositor: ordered layers blended once per frame into a DMXOutput.
+
+Each Layer is a virtual output with the same write surface as DMXSender
+(update_channel/update_channels/update_sparse/frame()), so scenes, effects,
+the manual programmer and OSC write into their own layer instead of fighting
+over the same bytes. Every layer has an opacity, a per-channel mask (0..1)
+and a merge mode:
+
+- ltp:      out += (layer - out) * weight
+- htp:      out += (max(out, layer) - out) * weight
+- add:      out += layer * weight
+- multiply: out *= 1 - weight + weight * layer / 255
+
+weight = opacity * mask. Layers created with track_writes=True enable the
+mask on every channel they write, so e.g. a rainbow only covers RGB and a
+position scene underneath keeps driving pan/tilt. The blend is vectorized
+over the whole universe and runs once per frame on the frame-clock scheduler,
+after the producers (priority COMPOSITE_PRIORITY).
+
+Usage:
+    comp = Compositor(dmx_sender)
+    scene = comp.add_layer('scene')
+    fx = comp.add_layer('effects', track_writes=True)
+    fx.opacity = 0.5
+    comp.start()
+"""
+
+import threading
+import logging
+
+import numpy as np
+
+from .dmx import DMXOutput
+from .scheduler import frame_scheduler
+
+MERGE_MODES = ('ltp', 'htp', 'add', 'multiply')
+COMPOSITE_PRIORITY = 100
+
+
+class Layer(DMXOutput):
+    """Capa del compositor: buffer propio con opacidad, máscara por canal y modo de mezcla."""
+
+    def __init__(self, compositor, name, mode='ltp', opacity=1.0, track_writes=False, num_channels=512):
+        if mode not in MERGE_MODES:
+            raise ValueError(f"Layer: modo {mode!r} no soportado ({MERGE_MODES})")
+        super().__init__(num_channels)
+        self.compositor = compositor
+        self.name = name
+        self.mode = mode
+        self.opacity = float(opacity)
+        self.enabled = True
+        self.track_writes = bool(track_writes)
+        # Sin seguimiento de escrituras la capa cubre todo el universo
+        self.mask = np.full(self.num_channels, 0.0 if self.track_writes else 1.0, dtype=np.float32)
+
+    def __repr__(self):
+        return f"Layer({self.name!r}, {self.mode}, opacity={self.opacity})"
+
+    def _write(self, index, values):
+        with self.lock:
+            self._back_array[index] = values
+            if self.track_writes:
+                self.mask[index] = 1.0
+
+    def set_mask(self, channels=None, value=1.0):
+        """Fijar la máscara (0..1) de `channels` (índices, slice o máscara booleana; None = todos)."""
+        with self.lock:
+            self.mask[slice(None) if channels is None else channels] = value
+
+    def release(self, channels=None):
+        """Devolver los canales a las capas inferiores (máscara a 0)."""
+        self.set_mask(channels, 0.0)
+
+    # La capa no transmite: su reloj es el de la salida del compositor
+    def add_tick_hook(self, hook):
+        self.compositor.output.add_tick_hook(hook)
+
+    def remove_tick_hook(self, hook):
+        self.compositor.output.remove_tick_hook(hook)
+
+    def _send_once(self):
+        raise RuntimeError("Layer no transmite; la mezcla la envía el compositor")
+
+    def start(self, interval=0.023):
+        logging.debug(f"Layer {self.name}: start ignorado (no transmite)")
+
+
+class Compositor:
+    """Mezcla ordenada de capas (de abajo a arriba) sobre una salida DMX."""
+
+    def __init__(self, output, scheduler=None):
+        self.output = output
+        self.scheduler = scheduler or frame_scheduler
+        self.num_channels = output.num_channels
+        self.layers = []
+        self.lock = threading.Lock()
+        # Buffers de trabajo preasignados
+        self._out = np.zeros(self.num_channels, dtype=np.float32)
+        self._weight = np.zeros(self.num_channels, dtype=np.float32)
+        self._values = np.zeros(self.num_channels, dtype=np.float32)
+        self._tmp = np.zeros(self.num_channels, dtype=np.float32)
+        self._result = np.zeros(self.num_channels, dtype=np.uint8)
+
+    def __getitem__(self, name):
+        for layer in self.layers:
+            if layer.name == name:
+                return layer
+        raise KeyError(name)
+
+    def add_layer(self, name, mode='ltp', opacity=1.0, track_writes=False, position=None):
+        """Crear una capa encima de las existentes (o en `position`, 0 = la de abajo)."""
+        layer = Layer(self, name, mode, opacity, track_writes, self.num_channels)
+        with self.lock:
+            layers = list(self.layers)
+            layers.insert(len(layers) if position is None else position, layer)
+            self.layers = layers
+        return layer
+
+    def remove_layer(self, name):
+        with self.lock:
+            self.layers = [layer for layer in self.layers if layer.name != name]
+
+    def composite(self):
+        """Mezclar todas las capas; devuelve el universo resultante (uint8, buffer reutilizado)."""
+        out, weight, values, tmp = self._out, self._weight, self._values, self._tmp
+        out.fill(0.0)
+        for layer in self.layers:
+            if not layer.enabled or layer.opacity <= 0.0:
+                continue
+            with layer.lock:
+                values[:] = layer._back_array
+                np.multiply(layer.mask, layer.opacity, out=weight)
+            if layer.mode == 'ltp':
+                np.subtract(values, out, out=tmp)
+            elif layer.mode == 'htp':
+                np.maximum(out, values, out=tmp)
+                np.subtract(tmp, out, out=tmp)
+            elif layer.mode == 'add':
+                tmp[:] = values
+            else:
+                # multiply: out * (1 - w + w * v / 255) = out + out * w * (v / 255 - 1)
+                np.multiply(values, 1.0 / 255.0, out=tmp)
+                tmp -= 1.0
+                tmp *= out
+            tmp *= weight
+            out += tmp
+        np.clip(out, 0.0, 255.0, out=tmp)
+        np.rint(tmp, out=tmp)
+        self._result[:] = tmp
+        return self._result
+
+    def render(self, now=None):
+        """Callback del reloj de tramas: mezcla y escribe el universo completo en la salida."""
+        self.output.update_channels(0, self.composite())
+
+    def start(self):
+        self.scheduler.ensure_clock(self.output)
+        self.scheduler.add(self.render, priority=COMPOSITE_PRIORITY)
+
+    def stop(self):
+        self.scheduler.remove(self.render)
@@ -4,118 +4,374 @@ DMX communication module using MAX485 (Raspberry Pi UART / /dev/serial0).
 - Robust error handling
 - Safe start/stop of the send thread
 - Bounds-checked channel updates
+- DMXOutput: base común (buffer/lock/hilo) compartida con otros transportes (artnet.py)
+- Modo adaptativo: longitud de trama y frecuencia ajustadas a los canales en uso
+- Estrategias de break/MAB seleccionables (sleep, spin, baud) con estadísticas de jitter
+- Doble buffer preasignado (front/back) con la cabecera ya incluida: sin asignaciones por trama
+- Escritura en bloque (update_channels/update_sparse) y transacciones atómicas (frame())
+- StagedOutput: escrituras agrupadas en una por trama (OSC, UI)
+- NullOutput: salida sin transporte (publica las tramas a su ritmo), para benchmarks y pruebas
 """
 
 import serial
 import threading
 import time
 import logging
+from collections import deque
+from contextlib import contextmanager
 
+import numpy as np
 
-class DMXSender:
-    """DMX sender for MAX485 connected to Raspberry Pi UART.
+# DMX512-A: periodo mínimo entre breaks y slots mínimos por defecto en modo adaptativo
+MIN_FRAME_PERIOD = 0.001204
+DEFAULT_MIN_LENGTH = 24
 
-    Usage:
-        d = DMXSender(port='/dev/serial0')
-        d.start()                 # comienza a transmitir en hilo de fondo
-        d.update_channel(0, 255)  # actualiza canal 1 (índice 0)
-        d.stop()                  # detiene y cierra puerto
+# Estrategias de generación de break/MAB:
+# - sleep: break_condition + time.sleep(1ms) (original, jitter de varios ms en un Pi cargado)
+# - spin:  break_condition + espera activa (~110us/16us, preciso pero consume CPU)
+# - baud:  un 0x00 a BREAK_BAUDRATE dentro del propio flujo de bytes: 9 bits a 0
+#          (start + 8 datos) = 100us de break y 2 stop bits = 22us de MAB
+BREAK_MODES = ('sleep', 'spin', 'baud')
+BREAK_BAUDRATE = 90000
+_BREAK_BYTE = b'\x00'
+
+
+class FrameStats:
+    """Estadísticas de envío de tramas: periodo real, fps y carga.
+
+    La carga es la fracción del periodo que la salida pasa ocupada escribiendo
+    (1.0 = el puerto no da abasto a la frecuencia pedida).
     """
 
-    def __init__(self, port='/dev/serial0', baudrate=250000, num_channels=512, timeout=1.0):
-        self.port = port
-        self.baudrate = baudrate
+    def __init__(self, window=128):
+        self.frames = 0
+        self.dropped = 0
+        self.frame_length = None
+        self._periods = deque(maxlen=window)
+        self._busy = deque(maxlen=window)
+        self._last_start = None
+
+    def record(self, start, end):
+        """Registrar una trama enviada entre start y end (segundos, time.perf_counter)."""
+        if self._last_start is not None:
+            self._periods.append(start - self._last_start)
+        self._last_start = start
+        self._busy.append(end - start)
+        self.frames += 1
+
+    @property
+    def period(self):
+        periods = list(self._periods)
+        return sum(periods) / len(periods) if periods else 0.0
+
+    @property
+    def fps(self):
+        period = self.period
+        return 1.0 / period if period > 0 else 0.0
+
+    @property
+    def load(self):
+        period = self.period
+        busy = list(self._busy)
+        if period <= 0 or not busy:
+            return 0.0
+        return (sum(busy) / len(busy)) / period
+
+    def jitter(self):
+        """Dispersión del periodo en segundos: (desviación típica, p99 de |periodo - media|, min, max)."""
+        periods = list(self._periods)
+        if len(periods) < 2:
+            return 0.0, 0.0, 0.0, 0.0
+        mean = sum(periods) / len(periods)
+        std = (sum((p - mean) ** 2 for p in periods) / (len(periods) - 1)) ** 0.5
+        deviations = sorted(abs(p - mean) for p in periods)
+        p99 = deviations[min(len(deviations) - 1, int(0.99 * len(deviations)))]
+        return std, p99, min(periods), max(periods)
+
+    def snapshot(self):
+        """Resumen serializable para logs / UI."""
+        std, p99, low, high = self.jitter()
+        return {
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'fps': round(self.fps, 2),
+            'load': round(self.load, 3),
+            'length': self.frame_length,
+            'period_ms': round(self.period * 1000, 3),
+            'jitter_ms': round(std * 1000, 3),
+            'p99_jitter_ms': round(p99 * 1000, 3),
+            'min_ms': round(low * 1000, 3),
+            'max_ms': round(high * 1000, 3),
+        }
+
+
+def as_levels(values):
+    """Convertir bytes/memoryview/arrays/listas a un array uint8 (0..255) sin copiar si ya lo es."""
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        return np.frombuffer(values, dtype=np.uint8)
+    arr = np.asarray(values)
+    if arr.dtype != np.uint8:
+        arr = np.clip(arr, 0, 255).astype(np.uint8)
+    return arr
+
+
+class FrameTransaction:
+    """Escrituras agrupadas de un hilo que se aplican de una vez al back buffer (ver DMXOutput.frame)."""
+
+    def __init__(self, num_channels):
+        self.values = np.zeros(num_channels, dtype=np.uint8)
+        self.touched = np.zeros(num_channels, dtype=bool)
+        self.depth = 0
+
+    def reset(self):
+        self.touched.fill(False)
+
+
+def _spin(duration):
+    """Espera activa: precisión de microsegundos a costa de CPU (sólo para break/MAB)."""
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+class DMXOutput:
+    """Base común de las salidas DMX: buffer del universo, lock e hilo de envío.
+
+    Las subclases implementan `_send_once` (enviar una trama) y `_close`
+    (liberar el puerto/socket). DMXSender (UART) y artnet.ArtNetSender (UDP)
+    comparten así la misma superficie update_channel/start/stop.
+
+    Doble buffer: los escritores modifican el back buffer (`dmx_data`, un
+    memoryview sobre los canales) con `lock` tomado. En cada trama el hilo de
+    envío publica con `_publish()`: intercambia front/back (O(1)) y copia el
+    front recién publicado sobre el nuevo back (memmove fijo, sin asignar)
+    para que las escrituras incrementales sigan sobre el estado actual. El
+    front sólo lo toca el hilo de envío, así que se escribe fuera del lock.
+    Ambos buffers llevan la cabecera del transporte (start code, cabecera
+    ArtDmx...) ya incluida.
+    """
+
+    def __init__(self, num_channels=512, header=b'\x00'):
         self.num_channels = int(num_channels)
-        self.timeout = timeout
 
         self.lock = threading.Lock()
-        self.dmx_data = bytearray([0] * self.num_channels)
+        self._header_size = len(header)
+        self._front = bytearray(header) + bytearray(self.num_channels)
+        self._back = bytearray(self._front)
+        # Copia de trabajo para los frame hooks (el front no se modifica)
+        self._scratch = bytearray(self._front)
+        self._front_data = memoryview(self._front)[self._header_size:]
+        self._back_data = memoryview(self._back)[self._header_size:]
+        self._scratch_data = memoryview(self._scratch)[self._header_size:]
+        self._front_array = np.frombuffer(self._front_data, dtype=np.uint8)
+        self._back_array = np.frombuffer(self._back_data, dtype=np.uint8)
+        # Transacción abierta por hilo (with output.frame())
+        self._local = threading.local()
 
         self._thread = None
         self.running = False
+        self.stats = FrameStats()
+        self.frame_hooks = []
+        self.tick_hooks = []
 
-        try:
-            self.serial = serial.Serial(
-                port,
-                baudrate=baudrate,
-                stopbits=serial.STOPBITS_TWO,
-                timeout=self.timeout,
-            )
-            logging.info(f"DMXSender: opened serial port {port} @ {baudrate}")
-        except Exception as e:
-            logging.exception(f"DMXSender: failed to open serial port {port}: {e}")
-            # Rethrow so callers can handle (main app will show mensaje y salir limpio)
-            raise
+    def add_frame_hook(self, hook):
+        """Registrar hook(frame) llamado una vez por trama sobre la copia que se va a enviar.
 
-    def update_channel(self, addr, value):
-        """Actualizar un canal DMX (addr: 0-based). Asegura 0..255 y dentro de rango."""
+        `frame` es un memoryview escribible de los canales (sin cabecera); el
+        buffer local dmx_data no se modifica. Se ejecuta en el hilo de envío,
+        fuera del lock, así que debe ser rápido (operaciones vectorizadas).
+        """
+        if hook not in self.frame_hooks:
+            self.frame_hooks = self.frame_hooks + [hook]
+
+    def remove_frame_hook(self, hook):
+        self.frame_hooks = [h for h in self.frame_hooks if h is not hook]
+
+    def add_tick_hook(self, hook):
+        """Registrar hook(now) llamado en el hilo de envío justo antes de publicar cada trama.
+
+        Es el reloj de render (ver scheduler.FrameScheduler): lo que el hook
+        escriba en el back buffer sale en la trama que se publica a continuación.
+        """
+        if hook not in self.tick_hooks:
+            self.tick_hooks = self.tick_hooks + [hook]
+
+    def remove_tick_hook(self, hook):
+        self.tick_hooks = [h for h in self.tick_hooks if h != hook]
+
+    def _run_frame_hooks(self, frame):
+        for hook in self.frame_hooks:
+            try:
+                hook(frame)
+            except Exception:
+                logging.exception(f"{type(self).__name__}: error en frame hook {hook!r}")
+
+    @property
+    def dmx_data(self):
+        """Canales del back buffer. Escribir con `lock` tomado y no guardar la referencia
+        entre tramas: tras cada publicación apunta al otro buffer."""
+        return self._back_data
+
+    def _publish(self):
+        """Publicar el back buffer y devolver el paquete a enviar (cabecera incluida).
+
+        Sólo se llama desde el hilo de envío.
+        """
+        if self.tick_hooks:
+            now = time.monotonic()
+            for hook in self.tick_hooks:
+                try:
+                    hook(now)
+                except Exception:
+                    logging.exception(f"{type(self).__name__}: error en tick hook {hook!r}")
         with self.lock:
-            if 0 <= addr < self.num_channels:
-                self.dmx_data[addr] = int(max(0, min(255, int(value))))
-            else:
-                logging.warning(f"DMXSender.update_channel: addr {addr} fuera de rango")
+            self._front, self._back = self._back, self._front
+            self._front_data, self._back_data = self._back_data, self._front_data
+            self._front_array, self._back_array = self._back_array, self._front_array
+            self._back[:] = self._front
+            packet = self._front
+        if self.frame_hooks:
+            self._scratch[:] = packet
+            self._run_frame_hooks(self._scratch_data)
+            return self._scratch
+        return packet
 
-    def _send_once(self):
-        """Enviar un paquete DMX (break + MAB + datos)."""
-        # Copiar datos bajo lock para minimizar tiempo bloqueado
+    def _write(self, index, values):
+        """Aplicar valores ya validados al back buffer (index: entero, slice, índices o máscara)."""
         with self.lock:
-            packet = bytearray([0]) + bytes(self.dmx_data)
+            self._back_array[index] = values
+
+    def update_channel(self, addr, value):
+        """Actualizar un canal DMX (addr: 0-based). Asegura 0..255 y dentro de rango."""
+        if not 0 <= addr < self.num_channels:
+            logging.warning(f"{type(self).__name__}.update_channel: addr {addr} fuera de rango")
+            return
+        value = int(max(0, min(255, int(value))))
+        txn = getattr(self._local, 'txn', None)
+        if txn is not None and txn.depth:
+            txn.values[addr] = value
+            txn.touched[addr] = True
+            return
+        self._write(addr, value)
 
+    def update_channels(self, start, buffer):
+        """Escribir un bloque contiguo desde `start` (0-based) con un solo lock.
+
+        `buffer` puede ser bytes, bytearray, memoryview, un array NumPy o una
+        lista; los valores se recortan a 0..255 y lo que quede fuera del
+        universo se descarta.
+        """
+        values = as_levels(buffer).ravel()
+        start = int(start)
+        if start < 0:
+            values, start = values[-start:], 0
+        end = min(self.num_channels, start + len(values))
+        if end - start < len(values):
+            logging.warning(f"{type(self).__name__}.update_channels: {len(values) - max(0, end - start)} "
+                            f"canales fuera de rango descartados")
+        if end <= start:
+            return
+        values = values[:end - start]
+        txn = getattr(self._local, 'txn', None)
+        if txn is not None and txn.depth:
+            txn.values[start:end] = values
+            txn.touched[start:end] = True
+            return
+        self._write(slice(start, end), values)
+
+    def update_sparse(self, indices, values):
+        """Escribir canales sueltos: `values[i]` en `indices[i]` (o un único valor para todos)."""
+        indices = np.asarray(indices, dtype=np.intp).ravel()
+        values = np.broadcast_to(as_levels(values).ravel(), indices.shape)
+        valid = (indices >= 0) & (indices < self.num_channels)
+        if not valid.all():
+            logging.warning(f"{type(self).__name__}.update_sparse: {int((~valid).sum())} "
+                            f"canales fuera de rango descartados")
+            indices, values = indices[valid], values[valid]
+        txn = getattr(self._local, 'txn', None)
+        if txn is not None and txn.depth:
+            txn.values[indices] = values
+            txn.touched[indices] = True
+            return
+        self._write(indices, values)
+
+    @contextmanager
+    def frame(self):
+        """Transacción: las escrituras de este hilo dentro del bloque salen en la misma trama.
+
+            with sender.frame():
+                sender.update_channel(r, 255)
+                sender.update_channel(g, 0)
+                sender.update_channel(b, 0)
+
+        Las escrituras se acumulan sin lock y se aplican juntas al salir, así que
+        nunca se envía una trama con R actualizado y G/B pendientes. Los bloques
+        anidados se funden con el exterior. Si el bloque lanza una excepción no
+        se aplica nada.
+        """
+        txn = getattr(self._local, 'txn', None)
+        if txn is None:
+            txn = self._local.txn = FrameTransaction(self.num_channels)
+        if txn.depth == 0:
+            txn.reset()
+        txn.depth += 1
+        committed = False
         try:
-            # DMX break — en Python sleep el mínimo práctico suele ser ~1ms; usamos 1ms para ser seguro
-            self.serial.break_condition = True
-            time.sleep(0.001)  # break (>= 88us en la especificación, 1ms es seguro)
-            self.serial.break_condition = False
-            time.sleep(0.001)  # MAB (mark after break)
+            yield self
+            committed = True
+        finally:
+            txn.depth -= 1
+            if txn.depth == 0 and committed and txn.touched.any():
+                self._write(txn.touched, txn.values[txn.touched])
 
-            self.serial.write(packet)
-            # Flush to reduce buffering delay
-            try:
-                self.serial.flush()
-            except Exception:
-                pass
+    def _send_once(self):
+        """Enviar una trama. Implementado por cada transporte."""
+        raise NotImplementedError
 
-        except Exception as e:
-            logging.exception(f"DMXSender._send_once: error enviando paquete: {e}")
+    def _close(self):
+        """Cerrar el transporte. Implementado por cada transporte."""
+
+    def _next_interval(self, interval):
+        """Periodo hasta la siguiente trama. Los transportes adaptativos lo recalculan."""
+        return interval
 
     def send_loop(self, interval=0.023):
         """Bucle de envío continuo. """
-        logging.info("DMXSender: send loop started")
+        name = type(self).__name__
+        logging.info(f"{name}: send loop started")
         next_time = time.time()
         while self.running:
+            start = time.perf_counter()
             self._send_once()
+            self.stats.record(start, time.perf_counter())
             # control sencillo de frecuencia
-            next_time += interval
+            next_time += self._next_interval(interval)
             sleep_time = next_time - time.time()
             if sleep_time > 0:
                 time.sleep(sleep_time)
-        logging.info("DMXSender: send loop stopped")
+            else:
+                # Vamos tarde: realinear en vez de enviar ráfagas para recuperar
+                next_time = time.time()
+        logging.info(f"{name}: send loop stopped")
 
     def start(self, interval=0.023):
         """Inicia el hilo de envío. Llamadas repetidas no reiniciarán múltiples hilos."""
         if self.running:
-            logging.debug("DMXSender.start: ya estaba corriendo")
+            logging.debug(f"{type(self).__name__}.start: ya estaba corriendo")
             return
         self.interval = float(interval)
         self.running = True
         self._thread = threading.Thread(target=self.send_loop, args=(self.interval,), daemon=True)
         self._thread.start()
-        logging.info("DMXSender: started")
+        logging.info(f"{type(self).__name__}: started")
 
     def stop(self):
-        """Detiene el hilo de envío y cierra el puerto serial de forma segura."""
-        if not self.running:
-            return
+        """Detiene el hilo de envío y cierra el transporte de forma segura."""
         self.running = False
         if self._thread is not None:
             self._thread.join(timeout=1.0)
             self._thread = None
-        try:
-            if hasattr(self, 'serial') and self.serial is not None and self.serial.is_open:
-                self.serial.close()
-                logging.info("DMXSender: serial port closed")
-        except Exception:
-            logging.exception("DMXSender.stop: error cerrando serial")
+        self._close()
 
     def __del__(self):
         try:
@@ -124,4 +380,176 @@ class DMXSender:
             pass
 
 
+class NullOutput(DMXOutput):
+    """Salida sin transporte: publica las tramas a su ritmo (hooks incluidos) sin enviarlas."""
+
+    def _send_once(self):
+        self._publish()
+
+
+class StagedOutput(DMXOutput):
+    """Escrituras acumuladas hasta la próxima trama: flush() las aplica a `target` con un update_sparse.
+
+    Para productores que escriben más a menudo que las tramas (OSC, arrastres
+    de la UI): el último valor de cada canal gana y el destino recibe una sola
+    escritura por trama, desde un callback del reloj de tramas.
+    """
+
+    def __init__(self, target):
+        super().__init__(target.num_channels)
+        self.target = target
+        self.touched = np.zeros(self.num_channels, dtype=bool)
+
+    def _write(self, index, values):
+        with self.lock:
+            self._back_array[index] = values
+            self.touched[index] = True
+
+    def flush(self):
+        """Aplicar lo acumulado al destino; devuelve el número de canales escritos."""
+        with self.lock:
+            if not self.touched.any():
+                return 0
+            index = np.flatnonzero(self.touched)
+            values = self._back_array[index]
+            self.touched[:] = False
+        self.target.update_sparse(index, values)
+        return len(index)
+
+
+class DMXSender(DMXOutput):
+    """DMX sender for MAX485 connected to Raspberry Pi UART.
+
+    Usage:
+        d = DMXSender(port='/dev/serial0')
+        d.start()                 # comienza a transmitir en hilo de fondo
+        d.update_channel(0, 255)  # actualiza canal 1 (índice 0)
+        d.stop()                  # detiene y cierra puerto
+
+    Modo adaptativo (adaptive=True): cada trama se corta en el último canal
+    parcheado o distinto de cero (nunca menos de `min_length`) y el periodo se
+    ajusta a la duración real de esa trama en el cable, respetando el mínimo
+    legal de DMX512 y `max_fps` si se indica. Los fps conseguidos y la longitud
+    enviada quedan en `stats`.
+
+    break_mode elige cómo se genera el break/MAB (ver BREAK_MODES); `stats`
+    incluye periodo y jitter para comparar estrategias en el hardware real.
+    """
+
+    def __init__(self, port='/dev/serial0', baudrate=250000, num_channels=512, timeout=1.0,
+                 adaptive=False, min_length=DEFAULT_MIN_LENGTH, max_fps=None, break_mode='sleep'):
+        super().__init__(num_channels)
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+
+        self.adaptive = bool(adaptive)
+        self.min_length = max(1, min(int(min_length), self.num_channels))
+        self.max_fps = max_fps
+        self.patched_length = 0
+        self.frame_length = self.num_channels
+        self.set_break_mode(break_mode)
+
+        try:
+            self.serial = serial.Serial(
+                port,
+                baudrate=baudrate,
+                stopbits=serial.STOPBITS_TWO,
+                timeout=self.timeout,
+            )
+            logging.info(f"DMXSender: opened serial port {port} @ {baudrate}")
+        except Exception as e:
+            logging.exception(f"DMXSender: failed to open serial port {port}: {e}")
+            # Rethrow so callers can handle (main app will show mensaje y salir limpio)
+            raise
+
+    def _send_once(self):
+        """Enviar un paquete DMX (break + MAB + datos)."""
+        # Bajo lock sólo se intercambian los buffers; el front se escribe sin lock
+        packet = self._publish()
+        length = self._frame_length(packet)
+        self.frame_length = self.stats.frame_length = length
+
+        try:
+            self._send_break()
+            self.serial.write(packet if length == self.num_channels else memoryview(packet)[:length + 1])
+            # Flush to reduce buffering delay
+            try:
+                self.serial.flush()
+            except Exception:
+                pass
+
+        except Exception as e:
+            logging.exception(f"DMXSender._send_once: error enviando paquete: {e}")
+
+    # ------------------ Break / MAB ------------------------
+    def set_break_mode(self, mode):
+        """Elegir la estrategia de break/MAB y actualizar sus duraciones nominales."""
+        if mode not in BREAK_MODES:
+            raise ValueError(f"DMXSender: break_mode {mode!r} no soportado ({BREAK_MODES})")
+        self.break_mode = mode
+        if mode == 'sleep':
+            self.break_time, self.mab_time = 0.001, 0.001
+        elif mode == 'spin':
+            self.break_time, self.mab_time = 0.000110, 0.000016
+        else:
+            self.break_time, self.mab_time = 9.0 / BREAK_BAUDRATE, 2.0 / BREAK_BAUDRATE
+
+    def _send_break(self):
+        """Generar break + MAB antes de los datos según `break_mode`."""
+        if self.break_mode == 'baud':
+            # El 0x00 a baja velocidad es el break; sus stop bits, el MAB.
+            # flush() espera a que salga antes de volver a la velocidad DMX.
+            self.serial.baudrate = BREAK_BAUDRATE
+            self.serial.write(_BREAK_BYTE)
+            self.serial.flush()
+            self.serial.baudrate = self.baudrate
+        elif self.break_mode == 'spin':
+            self.serial.break_condition = True
+            _spin(self.break_time)
+            self.serial.break_condition = False
+            _spin(self.mab_time)
+        else:
+            # DMX break — en Python sleep el mínimo práctico suele ser ~1ms; usamos 1ms para ser seguro
+            self.serial.break_condition = True
+            time.sleep(0.001)  # break (>= 88us en la especificación, 1ms es seguro)
+            self.serial.break_condition = False
+            time.sleep(0.001)  # MAB (mark after break)
+
+    # ------------------ Modo adaptativo --------------------
+    def set_patched_length(self, length):
+        """Número de canales parcheados (se envían siempre aunque valgan 0)."""
+        self.patched_length = max(0, min(int(length), self.num_channels))
+
+    def _frame_length(self, packet):
+        """Canales a enviar en esta trama (packet incluye el start code)."""
+        if not self.adaptive:
+            return self.num_channels
+        nonzero = np.flatnonzero(np.frombuffer(packet, dtype=np.uint8, offset=1))
+        last = int(nonzero[-1]) + 1 if len(nonzero) else 0
+        return min(self.num_channels, max(self.min_length, self.patched_length, last))
+
+    def frame_time(self, length=None):
+        """Duración en el cable de una trama de `length` canales (break + MAB + slots)."""
+        length = self.frame_length if length is None else length
+        slot = 11.0 / self.baudrate  # start + 8 datos + 2 stop
+        return self.break_time + self.mab_time + (length + 1) * slot
+
+    def _next_interval(self, interval):
+        if not self.adaptive:
+            return interval
+        period = max(MIN_FRAME_PERIOD, self.frame_time())
+        if self.max_fps:
+            period = max(period, 1.0 / self.max_fps)
+        return period
+
+    def _close(self):
+        try:
+            if hasattr(self, 'serial') and self.serial is not None and self.serial.is_open:
+                self.serial.close()
+                logging.info("DMXSender: serial port closed")
+        except Exception:
+            logging.exception("DMXSender.stop: error cerrando serial")
+
+
 # === End of backend/dmx.py ===
@@ -1,84 +1,201 @@
 """
 Effects module for DMX moving heads.
 Supports ColorChase, Strobe, and Rainbow effects.
+
+Cada efecto calcula en cada tick un array (cabezas, canales) completo con
+NumPy, incluido un desfase de fase por cabeza, y el resultado se escribe en el
+universo con una única escritura en bloque (update_sparse). El coste por tick
+apenas cambia entre 2 y cientos de cabezas (ver benchmarks/bench_effects.py).
+
+Los efectos no duermen ni tienen hilo propio: el reloj de tramas
+(scheduler.frame_scheduler) llama a EffectManager en cada trama con un
+instante absoluto. Con sync (por defecto) el tiempo del efecto sale del reloj
+de beats (tempo.beat_clock): a REFERENCE_BPM va a su velocidad nominal y los
+pasos caen en la primera trama tras cada beat. set_speed escala ese tiempo.
 """
 
-import threading
-import time
-import colorsys
+import math
 import logging
 
+import numpy as np
+
+from .scheduler import frame_scheduler
+from .tempo import beat_clock, REFERENCE_BPM
+from .fixtures import CompiledRig, get_profile, DEFAULT_PROFILE
+
+RGB = ('red', 'green', 'blue')
+
+
+_HSV_SHIFT = np.array([5.0, 3.0, 1.0])
+
+
+def hsv_to_rgb(h, s, v):
+    """colorsys.hsv_to_rgb vectorizado: arrays (o escalares) en 0..1 -> (..., 3) en 0..1."""
+    h = np.asarray(h, dtype=np.float64)[..., np.newaxis]
+    s = np.asarray(s, dtype=np.float64)[..., np.newaxis]
+    v = np.asarray(v, dtype=np.float64)[..., np.newaxis]
+    k = (_HSV_SHIFT + (h % 1.0) * 6.0) % 6.0
+    return v - v * s * np.clip(np.minimum(k, 4.0 - k), 0.0, 1.0)
+
+
+class HeadLayout(CompiledRig):
+    """Rig de N cabezas iguales y contiguas desde start_address, compilado desde su perfil.
+
+    index(attributes) devuelve un array (cabezas, len(attributes)) con la
+    dirección 0-based de cada atributo (ver fixtures.CompiledRig).
+    """
+
+    def __init__(self, start_address, heads, mode_channels, profile=DEFAULT_PROFILE):
+        self.start_address = int(start_address)
+        self.heads = int(heads)
+        self.mode = get_profile(profile).mode(mode_channels)
+        self.mode_channels = self.mode.channels
+        self.bases = self.start_address - 1 + np.arange(self.heads) * self.mode_channels
+        super().__init__([(self.mode, base) for base in self.bases])
+
+
+class Effect:
+    """Efecto vectorizado: render(t, phase) -> array (cabezas, len(attributes)) en 0..255."""
+
+    attributes = RGB
+
+    def render(self, t, phase):
+        raise NotImplementedError
+
+
+class ColorChase(Effect):
+    """Cambia colores básicos en secuencia (cada `step` segundos)."""
+
+    def __init__(self, colors=((255, 0, 0), (0, 255, 0), (0, 0, 255)), step=0.5):
+        self.colors = np.asarray(colors, dtype=np.uint8)
+        self.step = float(step)
+
+    def render(self, t, phase):
+        n = len(self.colors)
+        index = (np.floor(t / self.step + phase * n).astype(np.intp)) % n
+        return self.colors[index]
+
+
+class Strobe(Effect):
+    """Enciende y apaga el canal de strobe/dimmer a intervalos fijos."""
+
+    attributes = ('dimmer',)
+
+    def __init__(self, half_period=0.2):
+        self.half_period = float(half_period)
+
+    def render(self, t, phase):
+        on = (np.floor(t / self.half_period + phase * 2).astype(np.intp) % 2) == 0
+        return np.where(on, 255, 0).astype(np.uint8)[:, np.newaxis]
+
+
+class Rainbow(Effect):
+    """Ciclo HSV de color arcoíris (`rate` vueltas por segundo)."""
+
+    def __init__(self, rate=0.1):
+        self.rate = float(rate)
+
+    def render(self, t, phase):
+        rgb = hsv_to_rgb(t * self.rate + phase, 1.0, 1.0)
+        return (rgb * 255).astype(np.uint8)
+
+
+EFFECTS = {
+    "ColorChase": ColorChase,
+    "Strobe": Strobe,
+    "Rainbow": Rainbow,
+}
+
+
+def render_into(dmx_sender, effect, layout, t, phase):
+    """Calcular un tick del efecto y escribirlo con una sola escritura en bloque."""
+    values = effect.render(t, phase)
+    dmx_sender.update_sparse(layout.index(effect.attributes), values)
+    return values
+
+
 class EffectManager:
-    def __init__(self):
+    """Efecto activo renderizado por el reloj de tramas (sin hilos propios)."""
+
+    def __init__(self, scheduler=None, clock=None, sync=True):
+        self.scheduler = scheduler or frame_scheduler
+        self.clock = clock or beat_clock
+        # sync: tiempo del efecto en beats del reloj (pasos en beat); si no, en segundos
+        self.sync = sync
+        self.speed = 1.0
         self.current_effect = None
         self.running = False
+        self._active = None
+        # (tiempo del efecto, base, velocidad) en el último cambio de velocidad
+        self._anchor = None
 
-    def run_effect(self, name, dmx_sender, start_address, heads, mode_channels):
-        """Inicia el efecto seleccionado en un hilo separado."""
+    def set_speed(self, value):
+        """Velocidad en porcentaje (100 = nominal), aplicada desde la próxima trama."""
+        self.speed = max(0.01, float(value) / 100.0)
+
+    def _base(self, now):
+        """Segundos de efecto a velocidad 1: beats del reloj a REFERENCE_BPM o tiempo real."""
+        if self.sync:
+            return self.clock.beat_at(now) * 60.0 / REFERENCE_BPM
+        return now
+
+    def run_effect(self, name, dmx_sender, start_address, heads, mode_channels, spread=0.0):
+        """Inicia el efecto seleccionado en el reloj de tramas.
+
+        spread: desfase entre cabezas como fracción de ciclo repartida en el rig
+        (0 = todas iguales, 1 = un ciclo completo a lo largo de las cabezas).
+        """
         self.stop_effect()  # Detiene cualquier efecto previo
+        factory = EFFECTS.get(name)
+        if factory is None:
+            logging.warning(f"Effect {name} not available")
+            return
+        layout = HeadLayout(start_address, heads, mode_channels)
+        phase = spread * np.arange(layout.heads) / max(1, layout.heads)
+        # t = 0 en el siguiente tick
+        self._active = (name, factory(), dmx_sender, layout, phase)
+        self._anchor = None
         self.running = True
         self.current_effect = name
-        thread = threading.Thread(
-            target=self._dispatch_effect,
-            args=(name, dmx_sender, start_address, heads, mode_channels),
-            daemon=True
-        )
-        thread.start()
-
-    def _dispatch_effect(self, name, dmx_sender, start_address, heads, mode_channels):
-        """Llama a la función correspondiente del efecto."""
-        if name == "ColorChase":
-            self.color_chase(dmx_sender, start_address, heads, mode_channels)
-        elif name == "Strobe":
-            self.strobe(dmx_sender, start_address, heads, mode_channels)
-        elif name == "Rainbow":
-            self.rainbow(dmx_sender, start_address, heads, mode_channels)
-        logging.info(f"Effect {name} finished")
+        self.scheduler.ensure_clock(dmx_sender)
+        self.scheduler.add(self._tick)
+
+    def _tick(self, now):
+        """Renderiza el efecto activo para el instante `now` del reloj de tramas."""
+        active = self._active
+        if active is None:
+            return False
+        name, effect, dmx_sender, layout, phase = active
+        base = self._base(now)
+        anchor = self._anchor
+        if anchor is None:
+            # Arranque: con sync, t = 0 en el último beat para que los pasos caigan en beat
+            start = math.floor(self.clock.beat_at(now)) * 60.0 / REFERENCE_BPM if self.sync else base
+            anchor = self._anchor = (0.0, start, self.speed)
+        if self.sync:
+            # Bloqueado al beat: la velocidad escala los beats desde el arranque
+            # (50 %, 200 %... siguen cayendo en beat, aunque el cambio salte de paso)
+            t = (base - anchor[1]) * self.speed
+        else:
+            t = anchor[0] + (base - anchor[1]) * anchor[2]
+            if anchor[2] != self.speed:
+                # Cambio de velocidad: el tiempo del efecto sigue desde donde estaba
+                self._anchor = (t, base, self.speed)
+        render_into(dmx_sender, effect, layout, t, phase)
 
     def stop_effect(self):
         """Detiene cualquier efecto en ejecución."""
+        if self.current_effect is not None:
+            logging.info(f"Effect {self.current_effect} finished")
+        self.scheduler.remove(self._tick)
+        active, self._active = self._active, None
+        # Si escribe en una capa del compositor, devolver sus canales a las capas inferiores
+        release = getattr(active[2], 'release', None) if active else None
+        if release is not None:
+            release()
         self.running = False
         self.current_effect = None
 
-    def color_chase(self, dmx_sender, start_address, heads, mode_channels):
-        """Cambia colores básicos en secuencia por cada cabeza."""
-        colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
-        while self.running and self.current_effect == "ColorChase":
-            for color in colors:
-                for head in range(heads):
-                    base = start_address - 1 + head * mode_channels
-                    r_idx = base + (3 if mode_channels == 9 else 6)
-                    dmx_sender.update_channel(r_idx, color[0])
-                    dmx_sender.update_channel(r_idx + 1, color[1])
-                    dmx_sender.update_channel(r_idx + 2, color[2])
-                time.sleep(0.5)
-
-    def strobe(self, dmx_sender, start_address, heads, mode_channels):
-        """Enciende y apaga el canal de strobe a intervalos fijos."""
-        on = False
-        while self.running and self.current_effect == "Strobe":
-            val = 255 if on else 0
-            for head in range(heads):
-                base = start_address - 1 + head * mode_channels
-                idx = base + (2 if mode_channels == 9 else 5)
-                dmx_sender.update_channel(idx, val)
-            on = not on
-            time.sleep(0.2)
-
-    def rainbow(self, dmx_sender, start_address, heads, mode_channels):
-        """Aplica un ciclo HSV de color arcoiris."""
-        hue = 0.0
-        while self.running and self.current_effect == "Rainbow":
-            r, g, b = [int(x * 255) for x in colorsys.hsv_to_rgb(hue, 1.0, 1.0)]
-            for head in range(heads):
-                base = start_address - 1 + head * mode_channels
-                r_idx = base + (3 if mode_channels == 9 else 6)
-                dmx_sender.update_channel(r_idx, r)
-                dmx_sender.update_channel(r_idx + 1, g)
-                dmx_sender.update_channel(r_idx + 2, b)
-            hue = (hue + 0.01) % 1.0
-            time.sleep(0.1)
-
 # Instancia única del manejador de efectos
 effect_manager = EffectManager()
 
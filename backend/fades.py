@@ -0,0 +1,206 @@
+"""
+Timed crossfades: scene recall with fade in/out, delay and easing.
+
+fade_to() starts a fade from the values the output holds now to the target
+values. Channels that go up use `fade_in`, channels that go down `fade_out`,
+and all of them start after `delay`. Coarse/fine pairs (pan/pan_fine,
+tilt/tilt_fine, see set_pairs) are interpolated as one 16-bit value, so moving
+heads glide instead of stepping 256 fine steps at a time.
+
+All active fades are compiled into flat lane arrays (source, target, duration,
+fade id...). Every frame the engine computes the progress of every lane in one
+vectorized pass and writes the result with a single update_sparse, so the
+per-frame cost barely grows with the number of simultaneous fades. A new fade
+takes over the channels it touches from older fades (LTP). Fades run on the
+frame-clock scheduler (scheduler.frame_scheduler).
+
+Usage:
+    fader = CrossfadeEngine(scene_layer)
+    fader.set_pairs(patch.pairs(1))
+    fader.fade_to(scene, fade_in=3.0, fade_out=1.5, delay=0.5, easing='inout')
+"""
+
+import threading
+import logging
+
+import numpy as np
+
+from .scheduler import frame_scheduler
+
+EASINGS = {
+    'linear': lambda p: p,
+    'in': lambda p: p * p,
+    'out': lambda p: p * (2.0 - p),
+    'inout': lambda p: p * p * (3.0 - 2.0 * p),
+    'sine': lambda p: 0.5 - 0.5 * np.cos(np.pi * p),
+}
+
+# Inversa de la duración de un fundido de 0 s: progreso 1 en cuanto empieza
+_SNAP = 1e12
+
+
+class Fade:
+    """Un fundido: canales de 8 bits y pares coarse/fine de 16 bits hacia un destino."""
+
+    def __init__(self, channels, source, target, coarse, fine, source16, target16,
+                 fade_in, fade_out, delay, easing):
+        if easing not in EASINGS:
+            raise ValueError(f"Fade: easing {easing!r} no soportado ({', '.join(EASINGS)})")
+        self.channels, self.source, self.target = channels, source, target
+        self.coarse, self.fine, self.source16, self.target16 = coarse, fine, source16, target16
+        self.fade_in = max(0.0, float(fade_in))
+        self.fade_out = max(0.0, float(fade_out))
+        self.delay = max(0.0, float(delay))
+        self.easing = easing
+        self.start = None
+        self.duration = self.delay + max(self._durations(source, target).max(initial=0.0),
+                                         self._durations(source16, target16).max(initial=0.0))
+
+    def __repr__(self):
+        return (f"Fade({len(self.channels)}ch + {len(self.coarse)}x16bit, in={self.fade_in}, "
+                f"out={self.fade_out}, delay={self.delay}, {self.easing})")
+
+    def _durations(self, source, target):
+        return np.where(target >= source, self.fade_in, self.fade_out)
+
+    def lanes(self):
+        """Carriles del fundido: 8 bits seguidos de 16 bits (origen, destino, duración)."""
+        source = np.concatenate([self.source, self.source16])
+        target = np.concatenate([self.target, self.target16])
+        return source, target, self._durations(source, target)
+
+    def drop(self, channels):
+        """Ceder `channels` a un fundido más nuevo; devuelve False si ya no le queda nada."""
+        keep = ~np.isin(self.channels, channels)
+        self.channels, self.source, self.target = self.channels[keep], self.source[keep], self.target[keep]
+        keep = ~(np.isin(self.coarse, channels) | np.isin(self.fine, channels))
+        self.coarse, self.fine = self.coarse[keep], self.fine[keep]
+        self.source16, self.target16 = self.source16[keep], self.target16[keep]
+        return bool(len(self.channels) or len(self.coarse))
+
+
+class CrossfadeEngine:
+    """Fundidos temporizados sobre una salida (o capa), evaluados en el reloj de tramas."""
+
+    def __init__(self, output, scheduler=None):
+        self.output = output
+        self.scheduler = scheduler or frame_scheduler
+        self.num_channels = output.num_channels
+        self.fades = []
+        self.lock = threading.Lock()
+        self.pairs = np.zeros((0, 2), dtype=np.intp)
+        self._plan = None
+
+    @property
+    def active(self):
+        return len(self.fades)
+
+    def set_pairs(self, pairs):
+        """Pares (n, 2) coarse/fine 0-based que se funden como un valor de 16 bits."""
+        self.pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+
+    def fade_to(self, values, channels=None, fade_in=2.0, fade_out=None, delay=0.0, easing='linear'):
+        """Fundir hacia `values` (universo completo, o un valor/array por canal de `channels`)."""
+        if isinstance(values, (bytes, bytearray, memoryview)):
+            values = np.frombuffer(values, dtype=np.uint8)
+        if channels is None:
+            channels = np.arange(min(len(values), self.num_channels), dtype=np.intp)
+            values = np.asarray(values, dtype=np.float64)[:len(channels)]
+        else:
+            channels = np.asarray(channels, dtype=np.intp).ravel()
+            values = np.broadcast_to(np.asarray(values, dtype=np.float64), channels.shape)
+        order = np.argsort(channels)
+        channels, target = channels[order], np.clip(values[order], 0, 255)
+        with self.output.lock:
+            current = np.frombuffer(self.output.dmx_data, dtype=np.uint8)[:self.num_channels].astype(np.float64)
+        # Pares de 16 bits con coarse y fine dentro del fundido
+        full = np.full(self.num_channels, np.nan)
+        full[channels] = target
+        pairs = self.pairs[~np.isnan(full[self.pairs]).any(axis=1)] if len(self.pairs) else self.pairs
+        coarse, fine = pairs[:, 0], pairs[:, 1]
+        single = ~np.isin(channels, pairs)
+        fade = Fade(channels[single], current[channels[single]], target[single],
+                    coarse, fine, current[coarse] * 256 + current[fine], full[coarse] * 256 + full[fine],
+                    fade_in, fade_in if fade_out is None else fade_out, delay, easing)
+        with self.lock:
+            self.fades = [f for f in self.fades if f.drop(channels)] + [fade]
+            self._compile()
+        self.scheduler.ensure_clock(self.output)
+        self.scheduler.add(self._tick)
+        logging.debug(f"CrossfadeEngine: {fade}")
+        return fade
+
+    def stop(self, fade=None):
+        """Detener un fundido (o todos); los canales se quedan en su valor actual."""
+        with self.lock:
+            self.fades = [] if fade is None else [f for f in self.fades if f is not fade]
+            self._compile()
+        if not self.fades:
+            self.scheduler.remove(self._tick)
+
+    def _compile(self):
+        """Aplanar los fundidos activos en arrays por carril (con self.lock tomado)."""
+        fades = self.fades
+        if not fades:
+            self._plan = None
+            return
+        lanes = [f.lanes() for f in fades]
+        counts8 = [len(f.channels) for f in fades]
+        counts = [len(source) for source, _, _ in lanes]
+        n8 = sum(counts8)
+        fade_ids = np.repeat(np.arange(len(fades)), counts)
+        # Carriles de 8 bits primero y de 16 bits después, en el orden de los fundidos
+        is16 = np.concatenate([np.r_[np.zeros(c8, bool), np.ones(c - c8, bool)] for c8, c in zip(counts8, counts)])
+        order = np.argsort(is16, kind='stable')
+        source = np.concatenate([lane[0] for lane in lanes])[order]
+        target = np.concatenate([lane[1] for lane in lanes])[order]
+        duration = np.concatenate([lane[2] for lane in lanes])[order]
+        fade_ids = fade_ids[order]
+        easing_masks = {}
+        for name in {f.easing for f in fades} - {'linear'}:
+            ids = [i for i, f in enumerate(fades) if f.easing == name]
+            easing_masks[name] = np.isin(fade_ids, ids)
+        self._plan = {
+            'fades': fades,
+            'starts': np.array([np.nan if f.start is None else f.start for f in fades]),
+            'delays': np.array([f.delay for f in fades]),
+            'durations': np.array([f.duration for f in fades]),
+            'fade_ids': fade_ids,
+            'source': source,
+            'delta': target - source,
+            'inv_duration': np.where(duration > 0, 1.0 / np.maximum(duration, 1e-9), _SNAP),
+            'easing': easing_masks,
+            'n8': n8,
+            'index': np.concatenate([np.concatenate([f.channels for f in fades]),
+                                     np.concatenate([f.coarse for f in fades]),
+                                     np.concatenate([f.fine for f in fades])]),
+        }
+
+    def _tick(self, now):
+        """Evaluar todos los fundidos en el instante `now` y escribirlos en una sola escritura."""
+        plan = self._plan
+        if plan is None:
+            return
+        starts = plan['starts']
+        unstarted = np.isnan(starts)
+        if unstarted.any():
+            # Los fundidos nuevos empiezan en este tick
+            starts[unstarted] = now
+            for fade, new in zip(plan['fades'], unstarted):
+                if new:
+                    fade.start = now
+        elapsed = now - starts
+        lane_time = (elapsed - plan['delays'])[plan['fade_ids']]
+        progress = np.clip((lane_time + 1e-12) * plan['inv_duration'], 0.0, 1.0)
+        for name, mask in plan['easing'].items():
+            progress[mask] = EASINGS[name](progress[mask])
+        values = np.rint(plan['source'] + plan['delta'] * progress)
+        n8 = plan['n8']
+        value16 = values[n8:]
+        self.output.update_sparse(plan['index'], np.concatenate([values[:n8], value16 // 256, value16 % 256]))
+        finished = elapsed >= plan['durations']
+        if finished.any():
+            done = [f for f, end in zip(plan['fades'], finished) if end]
+            with self.lock:
+                self.fades = [f for f in self.fades if f not in done]
+                self._compile()
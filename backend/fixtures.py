@@ -0,0 +1,166 @@
+"""
+Fixture profiles: declarative channel layouts compiled into NumPy index maps.
+
+Profiles live in backend/heads/profiles.json. Each one lists its modes and, per
+mode, the channel count and the offset of every attribute. It can also list
+16-bit coarse/fine pairs and default values. A CompiledRig turns a list of
+fixtures (mode + base address) into one address array per attribute, so
+"all dimmers" or "all RGB" for a whole rig is a single fancy-index write:
+
+    rig = CompiledRig([(get_profile('stagewash').mode('14CH'), base) for base in (0, 14, 28)])
+    rig.set(dmx_sender, ('red', 'green', 'blue'), (255, 0, 0))
+    rig.set(dmx_sender, 'dimmer', [255, 128, 0])
+"""
+
+import json
+import os
+import logging
+
+import numpy as np
+
+PROFILES_PATH = os.path.join(os.path.dirname(__file__), 'heads', 'profiles.json')
+# Perfil de las cabezas 9CH/14CH que maneja la aplicación
+DEFAULT_PROFILE = 'stagewash'
+
+_profiles = None
+
+
+class FixtureMode:
+    """Un modo de un perfil: número de canales, offsets por atributo, pares 16 bits y defaults."""
+
+    def __init__(self, name, channels, attributes, pairs=None, defaults=None):
+        self.name = name
+        self.channels = int(channels)
+        self.attributes = {attr: int(offset) for attr, offset in attributes.items()}
+        offsets = list(self.attributes.values())
+        if len(set(offsets)) != len(offsets) or any(not 0 <= o < self.channels for o in offsets):
+            raise ValueError(f"FixtureMode {name}: offsets repetidos o fuera de 0..{self.channels - 1}")
+        # Sólo los pares cuyos dos canales existen en este modo
+        self.pairs = {coarse: fine for coarse, fine in (pairs or {}).items()
+                      if coarse in self.attributes and fine in self.attributes}
+        self.defaults = np.zeros(self.channels, dtype=np.uint8)
+        for attr, value in (defaults or {}).items():
+            if attr in self.attributes:
+                self.defaults[self.attributes[attr]] = value
+
+    def __repr__(self):
+        return f"FixtureMode({self.name!r}, {self.channels}ch)"
+
+    def offset(self, attribute):
+        """Offset del atributo o None si el modo no lo tiene."""
+        return self.attributes.get(attribute)
+
+
+class FixtureProfile:
+    """Perfil de un modelo de fijación con sus modos."""
+
+    def __init__(self, key, name, modes):
+        self.key = key
+        self.name = name
+        self.modes = modes
+
+    def mode(self, mode):
+        """Modo por nombre ('14CH') o por número de canales (14)."""
+        if isinstance(mode, str):
+            key = mode.upper()
+            if key in self.modes:
+                return self.modes[key]
+        else:
+            for candidate in self.modes.values():
+                if candidate.channels == int(mode):
+                    return candidate
+        raise KeyError(f"Perfil {self.key}: modo {mode!r} no existe ({', '.join(self.modes)})")
+
+
+def load_profiles(path=PROFILES_PATH):
+    """Leer y validar los perfiles del archivo JSON."""
+    with open(path, 'r') as f:
+        raw = json.load(f)
+    profiles = {}
+    for key, spec in raw.items():
+        pairs = spec.get('pairs', {})
+        defaults = spec.get('defaults', {})
+        modes = {}
+        for mode_name, mode_spec in spec['modes'].items():
+            modes[mode_name.upper()] = FixtureMode(
+                mode_name.upper(), mode_spec['channels'], mode_spec['attributes'],
+                mode_spec.get('pairs', pairs), mode_spec.get('defaults', defaults))
+        profiles[key] = FixtureProfile(key, spec.get('name', key), modes)
+    logging.info(f"Fixture profiles loaded: {', '.join(profiles)}")
+    return profiles
+
+
+def get_profile(key=DEFAULT_PROFILE):
+    """Perfil por clave (los perfiles se cargan una sola vez)."""
+    global _profiles
+    if _profiles is None:
+        _profiles = load_profiles()
+    return _profiles[key]
+
+
+class CompiledRig:
+    """Fijaciones (modo + dirección base 0-based) compiladas en arrays de direcciones por atributo."""
+
+    def __init__(self, fixtures):
+        self.fixtures = [(mode, int(base)) for mode, base in fixtures]
+        self.count = len(self.fixtures)
+        self._cache = {}
+
+    def _compile(self, attributes):
+        members = [i for i, (mode, _) in enumerate(self.fixtures)
+                   if all(a in mode.attributes for a in attributes)]
+        index = np.array([[self.fixtures[i][1] + self.fixtures[i][0].attributes[a] for a in attributes]
+                          for i in members], dtype=np.intp).reshape(len(members), len(attributes))
+        return index, np.array(members, dtype=np.intp)
+
+    def _lookup(self, attributes):
+        attributes = (attributes,) if isinstance(attributes, str) else tuple(attributes)
+        entry = self._cache.get(attributes)
+        if entry is None:
+            entry = self._cache[attributes] = self._compile(attributes)
+        return entry
+
+    def index(self, attributes):
+        """Direcciones (fijaciones, len(attributes)) de las fijaciones que tienen todos los atributos."""
+        return self._lookup(attributes)[0]
+
+    def members(self, attributes):
+        """Posición en el rig de cada fila de index(attributes)."""
+        return self._lookup(attributes)[1]
+
+    def pairs(self, coarse):
+        """Direcciones (n, 2) coarse/fine del par 16 bits `coarse` (p.ej. 'pan')."""
+        fine = {mode.pairs.get(coarse) for mode, _ in self.fixtures} - {None}
+        if len(fine) != 1:
+            return np.zeros((0, 2), dtype=np.intp)
+        return self.index((coarse, fine.pop()))
+
+    def set(self, output, attributes, values):
+        """Escribir `attributes` de todo el rig en una sola escritura.
+
+        values: escalar, uno por atributo (len(attributes),) o una fila por
+        fijación (count, len(attributes)); con un solo atributo (str) también
+        vale uno por fijación (count,). Las filas de fijaciones sin esos
+        atributos se ignoran.
+        """
+        index, members = self._lookup(attributes)
+        if not index.size:
+            return
+        values = np.asarray(values)
+        if isinstance(attributes, str) and values.ndim == 1:
+            values = values[:, np.newaxis]
+        if values.ndim == 2 and len(values) == self.count and len(members) != self.count:
+            values = values[members]
+        output.update_sparse(index, np.broadcast_to(values, index.shape))
+
+    def defaults(self):
+        """(direcciones, valores) con los valores por defecto de todas las fijaciones."""
+        if not self.fixtures:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.uint8)
+        index = np.concatenate([base + np.arange(mode.channels) for mode, base in self.fixtures])
+        values = np.concatenate([mode.defaults for mode, _ in self.fixtures])
+        return index, values
+
+    def span(self):
+        """Dirección siguiente a la última ocupada por el rig."""
+        return max((base + mode.channels for mode, base in self.fixtures), default=0)
@@ -1,10 +1,29 @@
- 
+import logging
+
+from ..fixtures import get_profile
+
+
 class BaseHead:
+    # Clave del perfil en heads/profiles.json (la define cada subclase)
+    PROFILE = None
+
     def __init__(self, start_channel: int, mode: str = "14CH"):
         self.start = start_channel - 1
         self.mode = mode.upper()
+        profile = get_profile(self.PROFILE)
+        if self.mode not in profile.modes:
+            fallback = next(iter(profile.modes))
+            logging.warning(f"{type(self).__name__}: modo {self.mode} no existe, usando {fallback}")
+            self.mode = fallback
+        self.offsets = profile.modes[self.mode].attributes
 
     def update_channel(self, data, offset, value):
         index = self.start + offset
         if 0 <= index < len(data):
             data[index] = value
+
+    def set_attribute(self, data, attribute, value):
+        """Escribe el atributo si el modo lo tiene (si no, no hace nada)."""
+        offset = self.offsets.get(attribute)
+        if offset is not None:
+            self.update_channel(data, offset, value)
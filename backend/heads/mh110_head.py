@@ -1,20 +1,22 @@
 from .base_head import BaseHead
 
 class MH110Head(BaseHead):
-    def set_pan(self, data, value): self.update_channel(data, 0, value)
-    def set_pan_fine(self, data, value): self.update_channel(data, 1, value)
-    def set_tilt(self, data, value): self.update_channel(data, 2, value)
-    def set_tilt_fine(self, data, value): self.update_channel(data, 3, value)
-    def set_speed(self, data, value): self.update_channel(data, 4, value)
-    def set_dimmer(self, data, value): self.update_channel(data, 5, value)
+    PROFILE = 'mh110'
+
+    def set_pan(self, data, value): self.set_attribute(data, 'pan', value)
+    def set_pan_fine(self, data, value): self.set_attribute(data, 'pan_fine', value)
+    def set_tilt(self, data, value): self.set_attribute(data, 'tilt', value)
+    def set_tilt_fine(self, data, value): self.set_attribute(data, 'tilt_fine', value)
+    def set_speed(self, data, value): self.set_attribute(data, 'speed', value)
+    def set_dimmer(self, data, value): self.set_attribute(data, 'dimmer', value)
 
     def set_rgbw(self, data, r, g, b, w):
-        self.update_channel(data, 6, r)
-        self.update_channel(data, 7, g)
-        self.update_channel(data, 8, b)
-        self.update_channel(data, 9, w)
+        self.set_attribute(data, 'red', r)
+        self.set_attribute(data, 'green', g)
+        self.set_attribute(data, 'blue', b)
+        self.set_attribute(data, 'white', w)
 
-    def set_temp_color(self, data, value): self.update_channel(data, 10, value)
-    def set_internal_color(self, data, value): self.update_channel(data, 11, value)
-    def set_strobe(self, data, value): self.update_channel(data, 12, value)
-    def set_special_function(self, data, value): self.update_channel(data, 13, value)
+    def set_temp_color(self, data, value): self.set_attribute(data, 'temp_color', value)
+    def set_internal_color(self, data, value): self.set_attribute(data, 'internal_color', value)
+    def set_strobe(self, data, value): self.set_attribute(data, 'strobe', value)
+    def set_special_function(self, data, value): self.set_attribute(data, 'special_function', value)
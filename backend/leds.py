@@ -11,12 +11,20 @@ GPIO.setup(5, GPIO.OUT)   # Red LED
 GPIO.setup(6, GPIO.OUT)   # Green LED
 GPIO.setup(13, GPIO.OUT)  # Blue LED
 
+# Último color escrito: monitor_ir llama cada 100 ms, solo los cambios tocan GPIO y el log
+_current = None
+
 def set_led_color(red, green, blue):
+    global _current
+    color = (bool(red), bool(green), bool(blue))
+    if color == _current:
+        return
     try:
         GPIO.output(5, GPIO.HIGH if red else GPIO.LOW)
         GPIO.output(6, GPIO.HIGH if green else GPIO.LOW)
         GPIO.output(13, GPIO.HIGH if blue else GPIO.LOW)
-        logging.info(f"LEDs set: R={red}, G={green}, B={blue}")
+        _current = color
+        logging.debug(f"LEDs set: R={red}, G={green}, B={blue}")
     except Exception as e:
         logging.error(f"LED error: {e}")
 
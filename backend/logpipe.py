@@ -0,0 +1,216 @@
+"""
+Non-blocking logging: a queue, one writer thread and per-call-site rate limiting.
+
+setup_logging() replaces the root handlers with a QueueHandler, so a logging
+call on a hot path (sender loop, frame callbacks, OSC, slider moves) only
+formats the message and puts it on a bounded queue: it never waits for the
+disk or for Qt. If the queue is full the record is dropped and counted.
+
+Before queueing, RateLimiter lets through the first RATE_BURST records of each
+call site (file, line and the optional `log_key` extra) per RATE_INTERVAL and
+counts the rest; the writer thread then emits one summary per site with the
+last message:
+
+    DMX channel 5 set to 87 (312 times in 1.0 s)
+
+The writer thread hands records to the file handler (rotating) and to a
+LogRing, a bounded ring of formatted lines that the UI reads on a timer
+(read_since) instead of appending to a widget from every call.
+
+Usage:
+    ring = setup_logging('logs/dmx_controller.log', level=logging.INFO)
+    logging.info("DMX channel %d set to %d", ch, value, extra={'log_key': ch})
+    seq, lines = ring.read_since(seq)      # timer de la UI
+    shutdown_logging()
+"""
+
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from collections import deque
+
+# Registros por sitio de llamada que pasan en cada ventana antes de agregarse
+RATE_BURST = 5
+RATE_INTERVAL = 1.0
+QUEUE_SIZE = 10000
+FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class RateLimiter(logging.Filter):
+    """Filtro por sitio de llamada: RATE_BURST registros por ventana; el resto solo se cuenta."""
+
+    def __init__(self, burst=RATE_BURST, interval=RATE_INTERVAL):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.lock = threading.Lock()
+        # clave -> [inicio de ventana, registros en la ventana, último registro suprimido]
+        self._sites = {}
+        # Resúmenes de ventanas cerradas en filter(), para el hilo escritor
+        self._pending = []
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno, getattr(record, 'log_key', None))
+        now = record.created
+        with self.lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.interval:
+                if site is not None and site[2] is not None:
+                    # La ventana anterior tenía suprimidos: su resumen sale antes que este registro
+                    self._pending.append(self._summary(site))
+                self._sites[key] = [now, 1, None]
+                return True
+            site[1] += 1
+            if site[1] <= self.burst:
+                return True
+            site[2] = record
+            return False
+
+    def _summary(self, site):
+        start, count, last = site
+        record = logging.makeLogRecord(last.__dict__)
+        record.msg = f"{last.getMessage()} ({count} times in {max(last.created - start, 0.0):.1f} s)"
+        record.args = None
+        record.exc_info = record.exc_text = None
+        return record
+
+    def flush(self, now=None, force=False):
+        """Resúmenes de las ventanas cerradas (todas con force) y de los que esperaban en filter()."""
+        now = time.time() if now is None else now
+        with self.lock:
+            summaries, self._pending = self._pending, []
+            for key, site in list(self._sites.items()):
+                if force or now - site[0] >= self.interval:
+                    if site[2] is not None:
+                        summaries.append(self._summary(site))
+                    del self._sites[key]
+        return summaries
+
+
+class LogRing(logging.Handler):
+    """Últimas `capacity` líneas formateadas, con número de secuencia para leer solo las nuevas."""
+
+    def __init__(self, capacity=500, level=logging.INFO):
+        super().__init__(level)
+        self.lines = deque(maxlen=capacity)
+        self.seq = 0
+        self.setFormatter(logging.Formatter('%(asctime)s - %(message)s', '%H:%M:%S'))
+
+    def emit(self, record):
+        line = self.format(record)
+        with self.lock:
+            self.seq += 1
+            self.lines.append(line)
+
+    def read_since(self, last):
+        """(seq, líneas posteriores a `last`); si se perdieron por la capacidad, las que quedan."""
+        with self.lock:
+            seq = self.seq
+            n = min(seq - last, len(self.lines))
+            return seq, list(self.lines)[len(self.lines) - n:] if n > 0 else []
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (y cuenta) en vez de bloquear o fallar con la cola llena."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogWriter(threading.Thread):
+    """Hilo que vacía la cola en los handlers y emite los resúmenes del limitador."""
+
+    def __init__(self, log_queue, handlers, limiter, source):
+        super().__init__(name='log-writer', daemon=True)
+        self.queue = log_queue
+        self.handlers = handlers
+        self.limiter = limiter
+        self.source = source
+        self.running = True
+        self._dropped = 0
+
+    def _handle(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _maintenance(self, force=False):
+        for record in self.limiter.flush(force=force):
+            self._handle(record)
+        dropped = self.source.dropped
+        if dropped != self._dropped:
+            self._handle(logging.makeLogRecord({
+                'name': 'logpipe', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"Log queue full: {dropped - self._dropped} records dropped"}))
+            self._dropped = dropped
+
+    def run(self):
+        next_flush = time.monotonic() + self.limiter.interval
+        while self.running or not self.queue.empty():
+            try:
+                record = self.queue.get(timeout=self.limiter.interval / 2)
+            except queue.Empty:
+                record = None
+            if record is not None:
+                self._handle(record)
+            if time.monotonic() >= next_flush:
+                self._maintenance()
+                next_flush = time.monotonic() + self.limiter.interval
+        self._maintenance(force=True)
+        for handler in self.handlers:
+            handler.flush()
+
+    def stop(self):
+        self.running = False
+        self.join(timeout=2.0)
+
+
+_writer = None
+
+
+def setup_logging(path, level=logging.INFO, ring_capacity=500, burst=RATE_BURST, interval=RATE_INTERVAL,
+                  max_bytes=5 << 20, backups=3):
+    """Configurar el logging raíz (cola + hilo escritor) y devolver el LogRing de la UI."""
+    global _writer
+    shutdown_logging()
+    log_queue = queue.Queue(QUEUE_SIZE)
+    source = _QueueHandler(log_queue)
+    limiter = RateLimiter(burst, interval)
+    source.addFilter(limiter)
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+    file_handler.setFormatter(logging.Formatter(FORMAT))
+    file_handler.setLevel(level)
+    ring = LogRing(ring_capacity, max(level, logging.INFO))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(source)
+    root.setLevel(level)
+    _writer = LogWriter(log_queue, [file_handler, ring], limiter, source)
+    _writer.start()
+    return ring
+
+
+def shutdown_logging():
+    """Vaciar la cola, emitir los resúmenes pendientes y cerrar el fichero."""
+    global _writer
+    writer, _writer = _writer, None
+    if writer is None:
+        return
+    logging.getLogger().removeHandler(writer.source)
+    writer.stop()
+    for handler in writer.handlers:
+        handler.close()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,56 @@
+"""RateLimiter summaries and LogRing reads of backend/logpipe.py."""
+
+import logging
+
+from backend.logpipe import RateLimiter, LogRing
+
+
+def _record(msg, created, lineno=10, key=None):
+    record = logging.makeLogRecord({'msg': msg, 'pathname': 'x.py', 'lineno': lineno,
+                                    'levelno': logging.INFO, 'levelname': 'INFO'})
+    record.created = created
+    if key is not None:
+        record.log_key = key
+    return record
+
+
+def test_rate_limit_summary_counts():
+    limiter = RateLimiter(burst=5, interval=1.0)
+    passed = [limiter.filter(_record(f"value {i}", 100.0 + i * 0.01)) for i in range(12)]
+    assert passed == [True] * 5 + [False] * 7
+    summaries = limiter.flush(force=True)
+    assert len(summaries) == 1
+    assert summaries[0].getMessage() == "value 11 (12 times in 0.1 s)"
+    # Todo emitido: nada pendiente
+    assert limiter.flush(force=True) == []
+
+
+def test_rate_limit_per_site_and_key():
+    limiter = RateLimiter(burst=1, interval=1.0)
+    assert limiter.filter(_record("a", 100.0, lineno=1))
+    assert limiter.filter(_record("b", 100.0, lineno=2))
+    assert limiter.filter(_record("c", 100.0, lineno=1, key=5))
+    assert not limiter.filter(_record("a", 100.1, lineno=1))
+    assert [r.getMessage() for r in limiter.flush(force=True)] == ["a (2 times in 0.1 s)"]
+
+
+def test_rate_limit_new_window_queues_summary():
+    limiter = RateLimiter(burst=1, interval=1.0)
+    limiter.filter(_record("first", 100.0))
+    assert not limiter.filter(_record("second", 100.5))
+    # La ventana siguiente deja pasar el registro y deja el resumen de la anterior para flush()
+    assert limiter.filter(_record("third", 101.2))
+    assert [r.getMessage() for r in limiter.flush(now=101.3)] == ["second (2 times in 0.5 s)"]
+
+
+def test_ring_read_since_across_wrap():
+    ring = LogRing(capacity=3)
+    ring.setFormatter(logging.Formatter('%(message)s'))
+    for i in range(5):
+        ring.emit(_record(f"line {i}", 100.0 + i))
+    # Se perdieron las dos primeras por la capacidad: quedan las tres últimas
+    assert ring.read_since(0) == (5, ["line 2", "line 3", "line 4"])
+    assert ring.read_since(4) == (5, ["line 4"])
+    assert ring.read_since(5) == (5, [])
+    ring.emit(_record("line 5", 105.0))
+    assert ring.read_since(5) == (6, ["line 5"])
@@ -0,0 +1,317 @@
+"""
+Network DMX input: sACN (E1.31) and Art-Net receive with HTP/LTP merge.
+
+Received universes are kept per source (sACN CID or Art-Net sender IP) and
+merged into the outgoing frame of a DMXOutput once per frame, as one
+vectorized whole-universe operation registered as a frame hook. The packet
+threads never touch the sender lock; the local buffer (dmx_data) is left
+untouched, so when the console goes away (source timeout) the output falls
+back to whatever the Pi is doing.
+
+Merge rules:
+- Only sources with the highest active priority take part (sACN priority,
+  Art-Net uses `artnet_priority`).
+- HTP: per channel maximum of those sources and the local value.
+- LTP: per channel, the value of the source that changed it last overrides
+  the local value.
+
+Usage:
+    net = NetworkInput(mode='htp')
+    net.attach(dmx_sender, sacn_universe=1, artnet_universe=0)
+    net.start()
+    ...
+    net.stop()
+"""
+
+import select
+import socket
+import struct
+import threading
+import time
+import logging
+
+import numpy as np
+
+from .artnet import ARTNET_ID, ARTNET_PORT, OP_DMX, DMX_HEADER_SIZE
+
+SACN_PORT = 5568
+SACN_DEFAULT_PRIORITY = 100
+# E1.31: tiempo sin datos tras el cual se considera perdida la fuente
+SOURCE_TIMEOUT = 2.5
+
+_ACN_PACKET_ID = b'ASC-E1.17\x00\x00\x00'
+_VECTOR_ROOT_DATA = 0x00000004
+_VECTOR_FRAMING_DATA = 0x00000002
+_OPTION_TERMINATED = 0x40
+_OPTION_PREVIEW = 0x80
+_SACN_DATA_OFFSET = 126
+
+MERGE_MODES = ('htp', 'ltp')
+
+
+def sacn_multicast_group(universe):
+    """Grupo multicast E1.31 de un universo (239.255.hi.lo)."""
+    return f"239.255.{(universe >> 8) & 0xFF}.{universe & 0xFF}"
+
+
+def parse_sacn(data):
+    """Decodificar un paquete de datos E1.31.
+
+    Devuelve (cid, universe, priority, sequence, options, levels) o None si no
+    es un paquete DMX válido (start code 0).
+    """
+    if len(data) < _SACN_DATA_OFFSET or data[4:16] != _ACN_PACKET_ID:
+        return None
+    if struct.unpack_from('>I', data, 18)[0] != _VECTOR_ROOT_DATA:
+        return None
+    if struct.unpack_from('>I', data, 40)[0] != _VECTOR_FRAMING_DATA:
+        return None
+    cid = bytes(data[22:38])
+    priority = data[108]
+    sequence = data[111]
+    options = data[112]
+    universe = struct.unpack_from('>H', data, 113)[0]
+    count = struct.unpack_from('>H', data, 123)[0]
+    if data[125] != 0:
+        return None  # start code alternativo (RDM, text...), no son niveles
+    levels = data[_SACN_DATA_OFFSET:_SACN_DATA_OFFSET + max(0, count - 1)]
+    return cid, universe, priority, sequence, options, levels
+
+
+def parse_artdmx(data):
+    """Decodificar un ArtDmx. Devuelve (universe, sequence, levels) o None."""
+    if len(data) < DMX_HEADER_SIZE or data[:8] != ARTNET_ID:
+        return None
+    if struct.unpack_from('<H', data, 8)[0] != OP_DMX:
+        return None
+    sequence = data[12]
+    universe = data[14] | (data[15] << 8)
+    length = struct.unpack_from('>H', data, 16)[0]
+    return universe, sequence, data[DMX_HEADER_SIZE:DMX_HEADER_SIZE + length]
+
+
+class _Source:
+    """Último estado recibido de una fuente de red en un universo."""
+
+    def __init__(self, num_channels):
+        self.levels = np.zeros(num_channels, dtype=np.uint8)
+        self.changed = np.zeros(num_channels, dtype=np.float64)
+        self.length = 0
+        self.priority = SACN_DEFAULT_PRIORITY
+        self.last_seen = 0.0
+        self.sequence = None
+
+
+class UniverseMerge:
+    """Fuentes de red de un universo y su mezcla sobre la trama de salida (frame hook)."""
+
+    def __init__(self, mode='htp', timeout=SOURCE_TIMEOUT, num_channels=512):
+        if mode not in MERGE_MODES:
+            raise ValueError(f"UniverseMerge: modo {mode!r} no soportado ({MERGE_MODES})")
+        self.mode = mode
+        self.timeout = float(timeout)
+        self.num_channels = int(num_channels)
+        self.sources = {}
+        self.lock = threading.Lock()
+        self._index = np.arange(self.num_channels)
+
+    def update(self, key, levels, priority=SACN_DEFAULT_PRIORITY, sequence=None, now=None):
+        """Guardar los niveles recibidos de una fuente (copia vectorizada, sin tocar el sender)."""
+        now = time.monotonic() if now is None else now
+        incoming = np.frombuffer(levels, dtype=np.uint8)[:self.num_channels]
+        n = len(incoming)
+        with self.lock:
+            source = self.sources.get(key)
+            if source is None:
+                source = self.sources[key] = _Source(self.num_channels)
+                logging.info(f"NetworkInput: nueva fuente {key!r} (prioridad {priority})")
+            elif sequence is not None and source.sequence is not None:
+                # E1.31 6.7.2: descartar paquetes fuera de orden
+                diff = (sequence - source.sequence + 256) % 256
+                if diff == 0 or diff > 236:
+                    return
+            if source.last_seen == 0.0:
+                source.changed[:n] = now  # primer paquete: todos sus canales son los más recientes
+            else:
+                changed = source.levels[:n] != incoming
+                source.changed[:n][changed] = now
+            source.levels[:n] = incoming
+            source.length = max(source.length, n)
+            source.priority = priority
+            source.sequence = sequence
+            source.last_seen = now
+
+    def drop(self, key):
+        with self.lock:
+            if self.sources.pop(key, None) is not None:
+                logging.info(f"NetworkInput: fuente {key!r} terminada")
+
+    def active_sources(self, now=None):
+        """Fuentes vivas de mayor prioridad (elimina las que superan el timeout)."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            expired = [k for k, s in self.sources.items() if now - s.last_seen > self.timeout]
+            for key in expired:
+                del self.sources[key]
+                logging.warning(f"NetworkInput: fuente {key!r} perdida (timeout)")
+            if not self.sources:
+                return []
+            top = max(s.priority for s in self.sources.values())
+            return [s for s in self.sources.values() if s.priority == top]
+
+    def merge(self, frame, now=None):
+        """Mezclar las fuentes activas sobre `frame` (uint8 escribible), una sola vez por trama."""
+        sources = self.active_sources(now)
+        if not sources:
+            return
+        out = np.frombuffer(frame, dtype=np.uint8)
+        with self.lock:
+            length = min(len(out), max(s.length for s in sources))
+            if length == 0:
+                return
+            levels = np.stack([s.levels[:length] for s in sources])
+            if self.mode == 'htp':
+                np.maximum(out[:length], levels.max(axis=0), out=out[:length])
+            else:
+                changed = np.stack([s.changed[:length] for s in sources])
+                winner = changed.argmax(axis=0)
+                out[:length] = levels[winner, self._index[:length]]
+
+    __call__ = merge
+
+
+class NetworkInput:
+    """Receptor sACN/Art-Net. Un único hilo atiende ambos sockets con select()."""
+
+    def __init__(self, mode='htp', timeout=SOURCE_TIMEOUT, ip='0.0.0.0',
+                 artnet_port=ARTNET_PORT, sacn_port=SACN_PORT, artnet_priority=SACN_DEFAULT_PRIORITY):
+        self.mode = mode
+        self.timeout = timeout
+        self.ip = ip
+        self.artnet_port = artnet_port
+        self.sacn_port = sacn_port
+        self.artnet_priority = artnet_priority
+        self.running = False
+
+        self.sacn_universes = {}    # universo sACN -> UniverseMerge
+        self.artnet_universes = {}  # port-address Art-Net -> UniverseMerge
+        self._attached = []         # (output, UniverseMerge)
+        self._sockets = []
+        self._thread = None
+
+    def attach(self, output, sacn_universe=None, artnet_universe=None):
+        """Mezclar los universos de red indicados en la salida `output` (DMXOutput)."""
+        merge = UniverseMerge(self.mode, self.timeout, output.num_channels)
+        if sacn_universe is not None:
+            self.sacn_universes[int(sacn_universe)] = merge
+        if artnet_universe is not None:
+            self.artnet_universes[int(artnet_universe)] = merge
+        output.add_frame_hook(merge)
+        self._attached.append((output, merge))
+        return merge
+
+    def detach(self, output):
+        for out, merge in list(self._attached):
+            if out is output:
+                output.remove_frame_hook(merge)
+                self._attached.remove((out, merge))
+                for table in (self.sacn_universes, self.artnet_universes):
+                    for key in [k for k, m in table.items() if m is merge]:
+                        del table[key]
+
+    # ------------------ Paquetes --------------------------
+    def handle_sacn(self, data, addr):
+        parsed = parse_sacn(data)
+        if parsed is None:
+            return
+        cid, universe, priority, sequence, options, levels = parsed
+        merge = self.sacn_universes.get(universe)
+        if merge is None or options & _OPTION_PREVIEW:
+            return
+        key = ('sacn', cid)
+        if options & _OPTION_TERMINATED:
+            merge.drop(key)
+            return
+        merge.update(key, levels, priority, sequence)
+
+    def handle_artnet(self, data, addr):
+        parsed = parse_artdmx(data)
+        if parsed is None:
+            return
+        universe, sequence, levels = parsed
+        merge = self.artnet_universes.get(universe)
+        if merge is None:
+            return
+        # sequence 0 = el emisor no numera los paquetes
+        merge.update(('artnet', addr[0]), levels, self.artnet_priority, sequence or None)
+
+    # ------------------ Sockets ---------------------------
+    def _open_sacn(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.ip, self.sacn_port))
+        for universe in self.sacn_universes:
+            group = socket.inet_aton(sacn_multicast_group(universe))
+            iface = socket.inet_aton('0.0.0.0' if self.ip in ('', '0.0.0.0') else self.ip)
+            try:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, group + iface)
+            except OSError as e:
+                logging.warning(f"NetworkInput: no se pudo unir al multicast del universo {universe}: {e}")
+        return sock
+
+    def _open_artnet(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.ip, self.artnet_port))
+        return sock
+
+    def _receive_loop(self):
+        handlers = {}
+        for sock, handler in self._sockets:
+            handlers[sock] = handler
+        logging.info("NetworkInput: receive loop started")
+        while self.running:
+            try:
+                ready, _, _ = select.select(list(handlers), [], [], 0.2)
+            except (OSError, ValueError):
+                break
+            for sock in ready:
+                try:
+                    data, addr = sock.recvfrom(1144)
+                except OSError:
+                    continue
+                try:
+                    handlers[sock](data, addr)
+                except Exception:
+                    logging.exception("NetworkInput: error procesando paquete")
+        logging.info("NetworkInput: receive loop stopped")
+
+    def start(self):
+        """Abre los sockets (sólo de los protocolos con universos asignados) y arranca el hilo."""
+        if self.running:
+            logging.debug("NetworkInput.start: ya estaba corriendo")
+            return
+        if self.sacn_universes:
+            self._sockets.append((self._open_sacn(), self.handle_sacn))
+        if self.artnet_universes:
+            self._sockets.append((self._open_artnet(), self.handle_artnet))
+        if not self._sockets:
+            logging.warning("NetworkInput.start: no hay universos asignados")
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._receive_loop, daemon=True)
+        self._thread.start()
+        logging.info(f"NetworkInput: started (sACN {sorted(self.sacn_universes)}, "
+                     f"Art-Net {sorted(self.artnet_universes)}, {self.mode.upper()})")
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for sock, _ in self._sockets:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._sockets = []
@@ -1,38 +1,274 @@
 """
 OSC server module for remote DMX control.
+
+Address space (channels and universes are 1-based, values 0..255):
+
+    /dmx/channel   ch value              one channel
+    /dmx/range     start v1 v2 ...       consecutive channels (or start + blob)
+    /dmx/universe  blob                  whole universe from channel 1
+    /dmx/universe  universe blob         idem for another patched universe
+    /fixture/<id>/<attrs>   value(s)     fixture attributes from the patch
+    /group/<name>/<attrs>   value(s)     group attributes (one write per universe)
+    /scene/recall name, /scene/slot n    scene cache
+    /tempo/bpm f, /tempo/tap, /tempo/beat
+
+<attrs> is one attribute or several separated by commas
+(/group/front/red,green,blue 255 128 0); with one attribute, one value per
+fixture is also accepted. Each message is one block write, never a loop of
+update_channel, and nothing is logged per message.
+
+An OSC bundle is applied as one frame transaction over every output, so all
+its messages leave in the same DMX frame (no frame with half a bundle).
+Timetags are not waited for: bundles apply on arrival.
+
+The server is a single asyncio datagram endpoint in one thread (no thread per
+packet). It binds on start(), not on import. Handlers write into a staging
+buffer per output, and a frame clock callback applies each one with one
+update_sparse per frame: a burst of hundreds of messages between two frames
+costs one write. `packets` and `dispatch_times` (decode + handlers per
+datagram) are kept for the benchmark (benchmarks/bench_osc.py).
 """
 
-from pythonosc import osc_server, dispatcher
+import time
+import asyncio
+import socket
 import threading
 import logging
+from collections import deque
+from contextlib import ExitStack
+
+import numpy as np
+from pythonosc import dispatcher
+
+from .dmx import StagedOutput
+from .scheduler import frame_scheduler
+
+
+class _BundleDispatcher(dispatcher.Dispatcher):
+    """Dispatcher que aplica cada bundle dentro de una transacción de trama."""
+
+    def __init__(self, frame):
+        super().__init__(strict_timing=False)
+        self._frame = frame
+
+    def call_handlers_for_packet(self, data, client_address):
+        if not data.startswith(b'#bundle'):
+            return super().call_handlers_for_packet(data, client_address)
+        with self._frame():
+            return super().call_handlers_for_packet(data, client_address)
+
+
+class _OSCProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.handle_packet(data, addr)
+
 
 class OSCServer:
-    def __init__(self, ip="0.0.0.0", port=9000):
-        self.dispatcher = dispatcher.Dispatcher()
+    def __init__(self, ip="0.0.0.0", port=9000, scheduler=None):
+        self.ip = ip
+        self.port = port
+        self.scheduler = scheduler or frame_scheduler
+        self.dispatcher = _BundleDispatcher(self.frame)
         self.dispatcher.map("/dmx/channel", self.handle_dmx)
+        self.dispatcher.map("/dmx/range", self.handle_range)
+        self.dispatcher.map("/dmx/universe", self.handle_universe)
+        self.dispatcher.map("/fixture/*/*", self.handle_attributes)
+        self.dispatcher.map("/group/*/*", self.handle_attributes)
+        self.dispatcher.map("/scene/recall", self.handle_scene)
+        self.dispatcher.map("/scene/slot", self.handle_slot)
+        self.dispatcher.map("/tempo/bpm", self.handle_bpm)
+        self.dispatcher.map("/tempo/tap", self.handle_tap)
+        self.dispatcher.map("/tempo/beat", self.handle_beat)
         self.dmx_sender = None
+        self.outputs = {}
+        self.patch = None
+        self.scene_cache = None
+        self.scene_output = None
+        self.beat_clock = None
         self.running = False
-        self.server = osc_server.ThreadingOSCUDPServer((ip, port), self.dispatcher)
-        logging.info(f"OSC server initialized on {ip}:{port}")
+        self.address = None
+        self.messages = 0
+        self.packets = 0
+        self.errors = 0
+        self.dispatch_times = deque(maxlen=4096)
+        self._staging = []
+        self._loop = None
+        self._transport = None
+        self._thread = None
+
+    def frame(self):
+        """Transacción de trama sobre todas las salidas (los bundles salen en una trama)."""
+        stack = ExitStack()
+        for output in {id(o): o for o in self.outputs.values()}.values():
+            stack.enter_context(output.frame())
+        return stack
+
+    def _output(self, universe=1):
+        output = self.outputs.get(int(universe))
+        if output is None:
+            raise KeyError(f"universe {universe} not patched")
+        return output
+
+    def _error(self, address, error):
+        # Sin log por mensaje: solo el primer error de cada ráfaga
+        self.errors += 1
+        if self.errors == 1 or self.errors % 1000 == 0:
+            logging.warning(f"OSC {address}: {error} ({self.errors} errors)")
+
+    def handle_packet(self, data, client_address):
+        """Decodificar un datagrama y ejecutar sus handlers (hilo del bucle asyncio)."""
+        start = time.perf_counter()
+        self.packets += 1
+        try:
+            self.dispatcher.call_handlers_for_packet(data, client_address)
+        except Exception as e:
+            self._error('packet', e)
+        self.dispatch_times.append(time.perf_counter() - start)
+
+    def _flush(self, now):
+        """Callback del reloj de tramas: una escritura por salida con lo recibido desde la anterior."""
+        if not self.running:
+            return False
+        for staging in self._staging:
+            staging.flush()
 
     def handle_dmx(self, address, channel, value):
+        self.messages += 1
         if self.dmx_sender:
             self.dmx_sender.update_channel(channel - 1, int(value))
-            logging.info(f"OSC: Set channel {channel} to {value}")
 
-    def start(self, dmx_sender):
-        self.dmx_sender = dmx_sender
+    def handle_range(self, address, start, *values):
+        self.messages += 1
+        try:
+            if len(values) == 1 and isinstance(values[0], (bytes, bytearray)):
+                data = values[0]
+            else:
+                data = np.clip(np.rint(values), 0, 255).astype(np.uint8)
+            self._output().update_channels(int(start) - 1, data)
+        except (KeyError, ValueError, IndexError) as e:
+            self._error(address, e)
+
+    def handle_universe(self, address, *args):
+        self.messages += 1
+        try:
+            universe, blob = (args[0], args[1]) if len(args) == 2 else (1, args[0])
+            self._output(universe).update_channels(0, blob)
+        except (KeyError, ValueError, IndexError, TypeError) as e:
+            self._error(address, e)
+
+    def handle_attributes(self, address, *values):
+        self.messages += 1
+        if self.patch is None:
+            return
+        _, _, group, attrs = address.split('/', 3)
+        attributes = attrs.split(',')
+        try:
+            values = np.asarray(values, dtype=np.float64)
+            if len(attributes) == 1:
+                attributes = attributes[0]
+                values = values[0] if len(values) == 1 else values
+            elif len(values) != len(attributes):
+                values = values.reshape(-1, len(attributes))
+            self.patch.set(self.outputs, group, attributes, values)
+        except (KeyError, ValueError, IndexError) as e:
+            self._error(address, e)
+
+    def handle_scene(self, address, name):
+        if self.scene_cache:
+            try:
+                self.scene_cache.recall(str(name), self.scene_output or self.dmx_sender)
+            except KeyError as e:
+                logging.warning(f"OSC: {e}")
+
+    def handle_slot(self, address, slot):
+        if self.scene_cache:
+            try:
+                self.scene_cache.recall_slot(slot, self.scene_output or self.dmx_sender)
+            except KeyError:
+                logging.warning(f"OSC: scene slot {slot} not assigned")
+
+    def handle_bpm(self, address, bpm):
+        if self.beat_clock:
+            self.beat_clock.set_bpm(bpm, source='osc')
+
+    def handle_tap(self, address, *args):
+        if self.beat_clock:
+            self.beat_clock.tap()
+
+    def handle_beat(self, address, *args):
+        # Este mensaje marca un beat: se alinea la fase sin tocar el tempo
+        if self.beat_clock:
+            self.beat_clock.sync()
+
+    def start(self, dmx_sender, scene_cache=None, scene_output=None, beat_clock=None, patch=None, outputs=None):
+        if self.running:
+            logging.warning("OSC server already running")
+            return
+        targets = dict(outputs or {})
+        targets[1] = dmx_sender
+        # Universo 1 -> dmx_sender; el resto (/dmx/universe n, atributos del patch) en outputs.
+        # Los handlers escriben en buffers intermedios que se aplican una vez por trama.
+        staging = {id(out): StagedOutput(out) for out in targets.values()}
+        self._staging = list(staging.values())
+        self.outputs = {universe: staging[id(out)] for universe, out in targets.items()}
+        self.dmx_sender = self.outputs[1]
+        self.patch = patch
+        # Escenas desde la caché (/scene/recall nombre, /scene/slot n) sobre scene_output
+        self.scene_cache = scene_cache
+        self.scene_output = scene_output
+        # Tempo remoto (/tempo/bpm f, /tempo/tap, /tempo/beat)
+        self.beat_clock = beat_clock
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='osc', daemon=True)
+        self._thread.start()
+        # El puerto se abre aquí (no al importar): los errores llegan a quien llama
+        try:
+            asyncio.run_coroutine_threadsafe(self._bind(), self._loop).result(timeout=5.0)
+        except Exception:
+            self._shutdown_loop()
+            raise
         self.running = True
-        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.scheduler.ensure_clock(dmx_sender)
+        self.scheduler.add(self._flush)
+        logging.info(f"OSC server listening on {self.address[0]}:{self.address[1]}")
+
+    async def _bind(self):
+        self._transport, _ = await self._loop.create_datagram_endpoint(
+            lambda: _OSCProtocol(self), local_addr=(self.ip, self.port))
+        sock = self._transport.get_extra_info('socket')
+        # Ráfagas de cientos de datagramas entre dos lecturas
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.address = sock.getsockname()
+
+    def _shutdown_loop(self):
+        loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._transport is not None:
+            loop.call_soon_threadsafe(self._transport.close)
+            self._transport = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=2.0)
+        loop.close()
 
     def stop(self):
+        if not self.running:
+            return
         self.running = False
-        self.server.shutdown()
+        self.scheduler.remove(self._flush)
+        self._shutdown_loop()
+        # Lo recibido tras la última trama no se pierde
+        for staging in self._staging:
+            staging.flush()
+        logging.info("OSC server stopped")
 
 osc_server = OSCServer()
 
-def start_osc_server(dmx_sender):
-    osc_server.start(dmx_sender)
+def start_osc_server(dmx_sender, scene_cache=None, scene_output=None, beat_clock=None, patch=None, outputs=None):
+    osc_server.start(dmx_sender, scene_cache, scene_output, beat_clock, patch, outputs)
 
 def stop_osc_server():
     osc_server.stop()
@@ -0,0 +1,235 @@
+"""
+Patch: fixture instances (profile, mode, universe, address), groups and an
+address index.
+
+Every fixture has its own profile and mode from heads/profiles.json and sits at
+any address of any universe. Per universe the patch keeps the fixtures sorted
+by start address (an interval index): adding a fixture that overlaps another
+raises ValueError, and channel -> fixture lookups are a bisect, O(log n).
+
+Groups are ordered lists of fixture ids. Group operations resolve to one
+CompiledRig per universe, compiled once and cached until the patch changes, so
+"all dimmers of group X" is one update_sparse per universe however many mixed
+fixtures the group holds.
+
+Patch file (JSON):
+    {"fixtures": [{"id": "wash1", "profile": "stagewash", "mode": "14CH",
+                   "universe": 1, "address": 1}, ...],
+     "groups": {"front": ["wash1", "wash2"]}}
+
+Usage:
+    patch = Patch.load('patch.json')
+    patch.fixture_at(1, 17)                      # -> Fixture o None
+    patch.set(outputs, 'front', 'dimmer', 255)   # outputs: {universo: salida} o una salida
+"""
+
+import json
+import bisect
+import logging
+import threading
+
+import numpy as np
+
+from .fixtures import CompiledRig, get_profile, DEFAULT_PROFILE
+
+# Grupo implícito con todas las fijaciones
+ALL = 'all'
+
+
+class Fixture:
+    """Una fijación parcheada: perfil + modo en un universo a partir de `address` (1-based)."""
+
+    def __init__(self, fixture_id, address, universe=1, profile=DEFAULT_PROFILE, mode='14CH', name=None):
+        self.id = str(fixture_id)
+        self.profile = profile
+        self.mode = get_profile(profile).mode(mode)
+        self.universe = int(universe)
+        self.address = int(address)
+        self.name = name or self.id
+        # Rango 0-based [start, end)
+        self.start = self.address - 1
+        self.end = self.start + self.mode.channels
+
+    def __repr__(self):
+        return f"Fixture({self.id!r}, {self.profile} {self.mode.name}, u{self.universe} @{self.address})"
+
+    def to_dict(self):
+        return {'id': self.id, 'profile': self.profile, 'mode': self.mode.name,
+                'universe': self.universe, 'address': self.address, 'name': self.name}
+
+
+class Patch:
+    """Fijaciones, grupos e índice de direcciones por universo."""
+
+    def __init__(self, num_channels=512):
+        self.num_channels = num_channels
+        self.fixtures = {}
+        self.groups = {}
+        self.lock = threading.RLock()
+        # Por universo: direcciones de inicio ordenadas y las fijaciones en el mismo orden
+        self._starts = {}
+        self._ordered = {}
+        self._rigs = {}
+
+    def __len__(self):
+        return len(self.fixtures)
+
+    def __contains__(self, fixture_id):
+        return fixture_id in self.fixtures
+
+    def __getitem__(self, fixture_id):
+        return self.fixtures[fixture_id]
+
+    # ------------------ Fijaciones ------------------------
+    def add(self, fixture_id, address, universe=1, profile=DEFAULT_PROFILE, mode='14CH', name=None):
+        """Parchear una fijación; ValueError si se sale del universo o pisa a otra."""
+        fixture = Fixture(fixture_id, address, universe, profile, mode, name)
+        if fixture.start < 0 or fixture.end > self.num_channels:
+            raise ValueError(f"Patch: {fixture} se sale del universo (1..{self.num_channels})")
+        with self.lock:
+            if fixture.id in self.fixtures:
+                raise ValueError(f"Patch: id {fixture.id!r} repetido")
+            starts = self._starts.setdefault(fixture.universe, [])
+            ordered = self._ordered.setdefault(fixture.universe, [])
+            pos = bisect.bisect_left(starts, fixture.start)
+            # Solapes: sólo pueden ser el vecino anterior o el siguiente
+            if pos > 0 and ordered[pos - 1].end > fixture.start:
+                raise ValueError(f"Patch: {fixture} se solapa con {ordered[pos - 1]}")
+            if pos < len(ordered) and ordered[pos].start < fixture.end:
+                raise ValueError(f"Patch: {fixture} se solapa con {ordered[pos]}")
+            starts.insert(pos, fixture.start)
+            ordered.insert(pos, fixture)
+            self.fixtures[fixture.id] = fixture
+            self._rigs = {}
+        return fixture
+
+    def remove(self, fixture_id):
+        with self.lock:
+            fixture = self.fixtures.pop(fixture_id, None)
+            if fixture is None:
+                return
+            pos = self._ordered[fixture.universe].index(fixture)
+            del self._starts[fixture.universe][pos]
+            del self._ordered[fixture.universe][pos]
+            for name, members in self.groups.items():
+                if fixture_id in members:
+                    self.groups[name] = [m for m in members if m != fixture_id]
+            self._rigs = {}
+
+    def clear(self):
+        with self.lock:
+            self.fixtures = {}
+            self.groups = {}
+            self._starts = {}
+            self._ordered = {}
+            self._rigs = {}
+
+    def fixture_at(self, universe, channel):
+        """Fijación que ocupa el canal `channel` (1-based) del universo, o None. O(log n)."""
+        index = channel - 1
+        starts = self._starts.get(universe)
+        if not starts:
+            return None
+        pos = bisect.bisect_right(starts, index) - 1
+        if pos >= 0:
+            fixture = self._ordered[universe][pos]
+            if index < fixture.end:
+                return fixture
+        return None
+
+    def fixtures_in(self, universe):
+        """Fijaciones del universo ordenadas por dirección."""
+        return list(self._ordered.get(universe, ()))
+
+    def pairs(self, universe=1):
+        """Direcciones (n, 2) coarse/fine de todos los pares de 16 bits del universo."""
+        pairs = [(f.start + f.mode.attributes[coarse], f.start + f.mode.attributes[fine])
+                 for f in self._ordered.get(universe, ()) for coarse, fine in f.mode.pairs.items()]
+        return np.array(pairs, dtype=np.intp).reshape(-1, 2)
+
+    def span(self, universe):
+        """Canal siguiente al último ocupado en el universo (para la longitud de trama adaptativa)."""
+        ordered = self._ordered.get(universe)
+        return max(f.end for f in ordered) if ordered else 0
+
+    # ------------------ Grupos ----------------------------
+    def add_group(self, name, fixture_ids):
+        """Crear o reemplazar un grupo (el orden es el de `fixture_ids`)."""
+        missing = [fid for fid in fixture_ids if fid not in self.fixtures]
+        if missing:
+            raise KeyError(f"Patch: fijaciones no parcheadas en el grupo {name!r}: {missing}")
+        with self.lock:
+            self.groups[name] = list(fixture_ids)
+            self._rigs = {}
+
+    def remove_group(self, name):
+        with self.lock:
+            self.groups.pop(name, None)
+            self._rigs = {}
+
+    def members(self, group=ALL):
+        """Fijaciones del grupo, en su orden (ALL = todas; un id de fijación vale como grupo de una)."""
+        if group == ALL and ALL not in self.groups:
+            return list(self.fixtures.values())
+        if group not in self.groups and group in self.fixtures:
+            return [self.fixtures[group]]
+        return [self.fixtures[fid] for fid in self.groups[group]]
+
+    def rigs(self, group=ALL):
+        """{universo: (CompiledRig, posiciones en el grupo)} del grupo, compilado una vez."""
+        rigs = self._rigs.get(group)
+        if rigs is None:
+            with self.lock:
+                by_universe = {}
+                for position, fixture in enumerate(self.members(group)):
+                    by_universe.setdefault(fixture.universe, []).append((position, fixture))
+                rigs = {universe: (CompiledRig([(f.mode, f.start) for _, f in entries]),
+                                   np.array([p for p, _ in entries], dtype=np.intp))
+                        for universe, entries in by_universe.items()}
+                self._rigs[group] = rigs
+        return rigs
+
+    def index(self, group, attributes, universe=1):
+        """Direcciones (fijaciones, len(attributes)) del grupo en un universo."""
+        entry = self.rigs(group).get(universe)
+        return entry[0].index(attributes) if entry else np.zeros((0, 1), dtype=np.intp)
+
+    def set(self, outputs, group, attributes, values):
+        """Escribir atributos en todo el grupo: una escritura por universo.
+
+        outputs: {universo: salida} (salida o capa) o una sola salida para todos.
+        values: como CompiledRig.set; las filas por fijación siguen el orden del grupo.
+        """
+        values = np.asarray(values)
+        per_fixture = values.ndim == 2 or (isinstance(attributes, str) and values.ndim == 1)
+        for universe, (rig, positions) in self.rigs(group).items():
+            output = outputs.get(universe) if isinstance(outputs, dict) else outputs
+            if output is None:
+                continue
+            rig.set(output, attributes, values[positions] if per_fixture else values)
+
+    # ------------------ Persistencia ----------------------
+    def to_dict(self):
+        return {'fixtures': [f.to_dict() for u in sorted(self._ordered) for f in self._ordered[u]],
+                'groups': dict(self.groups)}
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def from_dict(cls, data, num_channels=512):
+        patch = cls(num_channels)
+        for spec in data.get('fixtures', []):
+            patch.add(spec['id'], spec['address'], spec.get('universe', 1),
+                      spec.get('profile', DEFAULT_PROFILE), spec.get('mode', '14CH'), spec.get('name'))
+        for name, members in data.get('groups', {}).items():
+            patch.add_group(name, members)
+        return patch
+
+    @classmethod
+    def load(cls, path, num_channels=512):
+        with open(path, 'r') as f:
+            patch = cls.from_dict(json.load(f), num_channels)
+        logging.info(f"Patch loaded: {len(patch)} fixtures, {len(patch.groups)} groups from {path}")
+        return patch
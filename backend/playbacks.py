@@ -0,0 +1,187 @@
+"""
+Playbacks: independent cue stacks rendered together on the frame clock.
+
+Each Playback owns a compositor layer (track_writes, LTP) and a cue list in the
+sequence format ({"scene"|"dmx"|"effect", "fade": s, "follow": s}), compiled
+with sequences.Timeline so every cue already holds its accumulated DMX state.
+GO fades from the layer's current values to the next cue's state over the
+cue's "fade" time; BACK does the same towards the previous cue; PAUSE freezes
+the playback clock. `rate` scales that clock (fades, follows, effects) and
+`master` is the layer opacity.
+
+PlaybackManager registers ONE scheduler callback that renders every playback
+in the same frame: no playback has a thread. GO/BACK only set a request that
+the next tick applies, so GO-to-light latency is at most one frame however
+many playbacks are active (go_latencies keeps the measured values; see
+benchmarks/bench_playbacks.py).
+
+Usage:
+    playbacks = PlaybackManager(compositor)
+    pb = playbacks.add_playback('A', cues, start_address=1, heads=4, mode_channels=14)
+    pb.go(); pb.rate = 2.0; pb.master = 0.5
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+from . import effects
+from .dmx import FrameStats
+from .scheduler import frame_scheduler
+from .sequences import Timeline
+
+# Después de los productores (0) y antes del compositor (100)
+PLAYBACK_PRIORITY = 50
+
+
+class Playback:
+    """Pila de cues con GO/BACK/PAUSE, velocidad y fader master, escrita en su propia capa."""
+
+    def __init__(self, name, layer, cues, layout, scene_loader=None):
+        self.name = name
+        self.layer = layer
+        self.cues = list(cues)
+        self.timeline = Timeline(self.cues, layout, scene_loader, layer.num_channels)
+        self.index = -1
+        self.rate = 1.0
+        self.paused = False
+        # Reloj propio de la playback (segundos de playback, escalados por rate)
+        self.clock = 0.0
+        self._last_now = None
+        # Órdenes pendientes (deque: append/popleft seguros entre hilos)
+        self._requests = deque()
+        self._fade = None
+        self._cue_start = 0.0
+        # Segundos entre cada GO/BACK y el tick que lo aplica (últimos 128)
+        self.go_latencies = deque(maxlen=128)
+
+    def __repr__(self):
+        return f"Playback({self.name!r}, cue {self.index + 1}/{len(self.cues)})"
+
+    @property
+    def master(self):
+        return self.layer.opacity
+
+    @master.setter
+    def master(self, value):
+        self.layer.opacity = min(1.0, max(0.0, float(value)))
+
+    # ------------------ Órdenes (cualquier hilo) ---------
+    def go(self, cue=None):
+        """Ir al siguiente cue (o al cue `cue`, 0-based) en el próximo tick."""
+        self._requests.append(('go', cue, time.perf_counter()))
+
+    def back(self):
+        self._requests.append(('back', None, time.perf_counter()))
+
+    def pause(self):
+        self.paused = not self.paused
+
+    def release(self):
+        """Soltar la playback: vuelve antes del primer cue y devuelve los canales a las capas inferiores."""
+        self._requests.append(('release', None, time.perf_counter()))
+
+    # ------------------ Render (hilo del reloj) ----------
+    def _apply(self, request):
+        kind, cue, requested = request
+        if kind == 'release':
+            self.index = -1
+            self._fade = None
+            self.layer.release()
+            return
+        if kind == 'go':
+            target = self.index + 1 if cue is None else int(cue)
+        else:
+            target = self.index - 1
+        if not 0 <= target < len(self.cues):
+            return
+        channels, values = self.timeline.snapshots[target]
+        with self.layer.lock:
+            current = self.layer._back_array[channels].astype(np.float64)
+        fade = float(self.cues[target].get("fade", 0.0))
+        self._fade = (channels, current, values.astype(np.float64) - current, self.clock, fade)
+        # Los canales de efectos de otros cues vuelven a las capas inferiores
+        self.layer.release()
+        self.index = target
+        self._cue_start = self.clock
+        self.go_latencies.append(time.perf_counter() - requested)
+        logging.info(f"Playback {self.name}: cue {target + 1}")
+
+    def tick(self, now):
+        dt = 0.0 if self._last_now is None else now - self._last_now
+        self._last_now = now
+        if not self.paused:
+            self.clock += dt * self.rate
+        while self._requests:
+            self._apply(self._requests.popleft())
+        if self.index < 0:
+            return
+        follow = self.cues[self.index].get("follow")
+        if follow is not None and not self.paused and self.clock - self._cue_start >= float(follow):
+            # Auto-follow: el siguiente cue entra en este mismo tick
+            self._apply(('go', None, time.perf_counter()))
+        if self._fade is not None:
+            channels, source, delta, start, duration = self._fade
+            progress = 1.0 if duration <= 0 else min(1.0, (self.clock - start) / duration)
+            self.layer.update_sparse(channels, np.rint(source + delta * progress))
+            if progress >= 1.0:
+                self._fade = None
+        cue_time = self.clock - self._cue_start
+        self.timeline.render(self.layer, self.index, self.timeline.starts[self.index] + cue_time)
+
+
+class PlaybackManager:
+    """Playbacks concurrentes sobre un compositor, todas en un único callback del reloj de tramas."""
+
+    def __init__(self, compositor, scheduler=None, scene_loader=None, below=None):
+        self.compositor = compositor
+        self.scheduler = scheduler or frame_scheduler
+        self.scene_loader = scene_loader
+        # Las capas de las playbacks se insertan debajo de esta capa (None = encima de todo)
+        self.below = below
+        self.playbacks = []
+        self.lock = threading.Lock()
+        self.stats = FrameStats()
+
+    def __getitem__(self, name):
+        for playback in self.playbacks:
+            if playback.name == name:
+                return playback
+        raise KeyError(name)
+
+    def __len__(self):
+        return len(self.playbacks)
+
+    def add_playback(self, name, cues, start_address=1, heads=1, mode_channels=14, master=1.0):
+        layout = effects.HeadLayout(start_address, heads, mode_channels)
+        position = None
+        if self.below is not None:
+            position = self.compositor.layers.index(self.compositor[self.below])
+        layer = self.compositor.add_layer(f'playback:{name}', track_writes=True, opacity=master, position=position)
+        playback = Playback(name, layer, cues, layout, self.scene_loader)
+        with self.lock:
+            # Copia al escribir: _tick recorre la lista sin tomar el lock
+            self.playbacks = self.playbacks + [playback]
+        self.scheduler.ensure_clock(self.compositor.output)
+        self.scheduler.add(self._tick, priority=PLAYBACK_PRIORITY)
+        return playback
+
+    def remove_playback(self, name):
+        with self.lock:
+            self.playbacks = [pb for pb in self.playbacks if pb.name != name]
+            empty = not self.playbacks
+        self.compositor.remove_layer(f'playback:{name}')
+        if empty:
+            self.scheduler.remove(self._tick)
+
+    def _tick(self, now):
+        start = time.perf_counter()
+        for playback in self.playbacks:
+            try:
+                playback.tick(now)
+            except Exception:
+                logging.exception(f"Playback {playback.name}: error en el render")
+        self.stats.record(start, time.perf_counter())
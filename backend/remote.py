@@ -0,0 +1,521 @@
+"""
+HTTP + WebSocket remote API with a delta-compressed live frame stream.
+
+A single asyncio server (own thread, standard library only: no aiohttp or
+websockets on the Pi) serves:
+
+    GET  /                      minimal live viewer (HTML + JS)
+    GET  /api/status            tempo, effect, sequence, frame stats
+    GET  /api/scenes            scene names in the library
+    GET  /api/frame             current output frame (512 values)
+    POST /api/scene             {"name": n} | {"slot": s}
+    POST /api/effect            {"name": "Rainbow"} | {"stop": true}
+    POST /api/sequence          {"steps": [...], "loop": b} | {"stop": true}
+    POST /api/channels          {"start": 1, "values": [...]} | {"channels": {"1": 255}}
+    GET  /ws?fps=N              WebSocket: live stream; text messages are
+                                commands {"cmd": "scene"|"effect"|..., ...}
+
+It binds 127.0.0.1 by default. With a token, every request except the viewer
+page needs `Authorization: Bearer <token>` or `?token=<token>` (the browser
+WebSocket cannot send headers; the viewer forwards its own ?token=); binding
+any other address without a token is refused. Requests carrying an Origin
+from another host are rejected (403) and no CORS headers are sent, so a web
+page on another site cannot drive the rig through the operator's browser.
+
+Stream messages are binary, header '>BI' (type, seq):
+
+    KEY   (1)  whole frame, run-length encoded as (count, value) byte pairs
+    DELTA (2)  only changed channels: segments '>HH' (start, count) + values;
+               changed channels less than MERGE_GAP apart share a segment
+
+A subscriber gets a KEY first and then, at most `fps` times per second (capped
+by the server's max_rate), a DELTA against the last frame actually sent to it
+(nothing if nothing changed; a KEY when that is smaller). A slow client whose
+socket buffer is still full skips frames instead of queueing them; its next
+delta is computed from what it really has. An idle 512-channel rig costs
+nothing, and a chase on a few fixtures costs tens of bytes per message instead
+of 512 bytes per frame (see benchmarks/bench_remote.py).
+
+Usage:
+    start_remote_api(dmx_sender, port=8080, host='0.0.0.0', token=secret,
+                     monitor=output, scene_cache=cache, rig=lambda: (1, 4, 14))
+"""
+
+import hmac
+import json
+import time
+import base64
+import struct
+import asyncio
+import hashlib
+import logging
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from . import effects
+from . import sequences
+
+KEY = 1
+DELTA = 2
+HEADER = struct.Struct('>BI')
+SEGMENT = struct.Struct('>HH')
+# Canales sin cambios entre dos cambios por debajo de los que no compensa abrir segmento
+MERGE_GAP = SEGMENT.size
+WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MAX_REQUEST = 1 << 20
+# Bytes pendientes en el socket de un suscriptor por encima de los que se salta tramas
+MAX_BUFFERED = 16 * 1024
+LOOPBACK = ('127.0.0.1', 'localhost', '::1')
+
+
+# ------------------ Codificación del stream -------------------
+def encode_key(seq, frame):
+    """Trama completa con RLE: pares (repeticiones 1..255, valor)."""
+    frame = np.asarray(frame, dtype=np.uint8)
+    n = len(frame)
+    starts = np.flatnonzero(np.r_[True, frame[1:] != frame[:-1]])
+    lengths = np.diff(np.r_[starts, n])
+    pieces = (lengths + 254) // 255
+    run = np.repeat(np.arange(len(starts)), pieces)
+    counts = np.full(len(run), 255, dtype=np.uint8)
+    counts[np.cumsum(pieces) - 1] = lengths - 255 * (pieces - 1)
+    body = np.empty(2 * len(run), dtype=np.uint8)
+    body[0::2] = counts
+    body[1::2] = frame[starts][run]
+    return HEADER.pack(KEY, seq) + body.tobytes()
+
+
+def encode_delta(seq, previous, frame):
+    """Solo los canales cambiados respecto a `previous`, en segmentos; None si no hay cambios."""
+    changed = np.flatnonzero(previous != frame)
+    if not len(changed):
+        return None
+    breaks = np.flatnonzero(np.diff(changed) > MERGE_GAP)
+    starts = changed[np.r_[0, breaks + 1]]
+    ends = changed[np.r_[breaks, len(changed) - 1]] + 1
+    parts = [HEADER.pack(DELTA, seq)]
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        parts.append(SEGMENT.pack(start, end - start))
+        parts.append(frame[start:end].tobytes())
+    return b''.join(parts)
+
+
+def decode(message, frame):
+    """Aplicar un mensaje del stream sobre `frame` (array uint8) y devolver su seq."""
+    kind, seq = HEADER.unpack_from(message)
+    body = np.frombuffer(message, dtype=np.uint8, offset=HEADER.size)
+    if kind == KEY:
+        values = np.repeat(body[1::2], body[0::2])
+        frame[:len(values)] = values
+        return seq
+    pos = HEADER.size
+    while pos < len(message):
+        start, count = SEGMENT.unpack_from(message, pos)
+        pos += SEGMENT.size
+        frame[start:start + count] = np.frombuffer(message, dtype=np.uint8, count=count, offset=pos)
+        pos += count
+    return seq
+
+
+# ------------------ WebSocket (RFC 6455, lo mínimo) -----------
+def ws_accept(key):
+    return base64.b64encode(hashlib.sha1(key.encode() + WS_GUID).digest()).decode()
+
+
+def ws_frame(payload, opcode=2, mask=None):
+    """Trama WebSocket final (opcode 1 texto, 2 binario, 8 cierre, 10 pong)."""
+    n = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if n < 126:
+        header = struct.pack('>BB', 0x80 | opcode, mask_bit | n)
+    elif n < 1 << 16:
+        header = struct.pack('>BBH', 0x80 | opcode, mask_bit | 126, n)
+    else:
+        header = struct.pack('>BBQ', 0x80 | opcode, mask_bit | 127, n)
+    if mask:
+        payload = _unmask(payload, mask)
+        header += mask
+    return header + payload
+
+
+def _unmask(payload, mask):
+    data = np.frombuffer(payload, dtype=np.uint8)
+    key = np.resize(np.frombuffer(mask, dtype=np.uint8), len(data))
+    return (data ^ key).tobytes()
+
+
+async def ws_read(reader):
+    """(opcode, payload) de la siguiente trama (los mensajes fragmentados se unen)."""
+    message, first_opcode = b'', None
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        opcode, n = b0 & 0x0F, b1 & 0x7F
+        if n == 126:
+            n, = struct.unpack('>H', await reader.readexactly(2))
+        elif n == 127:
+            n, = struct.unpack('>Q', await reader.readexactly(8))
+        if n > MAX_REQUEST:
+            raise ValueError("WebSocket: mensaje demasiado grande")
+        mask = await reader.readexactly(4) if b1 & 0x80 else None
+        payload = await reader.readexactly(n)
+        if mask:
+            payload = _unmask(payload, mask)
+        if opcode >= 8:
+            # Control (cierre/ping/pong): nunca fragmentado
+            return opcode, payload
+        message += payload
+        first_opcode = first_opcode or opcode
+        if b0 & 0x80:
+            return first_opcode, message
+
+
+class _Subscriber:
+    def __init__(self, writer, fps):
+        self.writer = writer
+        self.period = 1.0 / fps
+        self.next_time = 0.0
+        self.frame = None
+        self.bytes = 0
+        self.messages = 0
+        self.skipped = 0
+
+
+class RemoteAPI:
+    """Servidor HTTP + WebSocket del controlador (un hilo con su bucle asyncio)."""
+
+    def __init__(self, host="127.0.0.1", port=8080, max_rate=30.0, token=None):
+        self.host = host
+        self.port = port
+        self.max_rate = float(max_rate)
+        self.token = token or None
+        self.address = None
+        self.running = False
+        self.dmx_sender = None
+        self.monitor = None
+        self.scene_cache = None
+        self.scene_output = None
+        self.effects_output = None
+        self.rig = None
+        self.beat_clock = None
+        self.subscribers = set()
+        self.requests = 0
+        self._frame = None
+        self._seq = 0
+        self._loop = None
+        self._server = None
+        self._broadcaster = None
+        self._thread = None
+
+    # ------------------ Arranque --------------------------
+    def start(self, dmx_sender, monitor=None, scene_cache=None, scene_output=None,
+              effects_output=None, rig=None, beat_clock=None):
+        """Abrir el puerto y servir. monitor: salida cuyas tramas se emiten (por defecto dmx_sender)."""
+        if self.running:
+            logging.warning("Remote API already running")
+            return
+        if self.token is None and self.host not in LOOPBACK:
+            raise ValueError(f"Remote API on {self.host or 'all interfaces'} needs a token (DMX_REMOTE_TOKEN)")
+        self.dmx_sender = dmx_sender
+        self.monitor = monitor or dmx_sender
+        self.scene_cache = scene_cache
+        self.scene_output = scene_output or dmx_sender
+        self.effects_output = effects_output or dmx_sender
+        # rig() -> (start_address, heads, mode_channels) actuales para efectos/secuencias
+        self.rig = rig or (lambda: (1, 1, 14))
+        self.beat_clock = beat_clock
+        self._frame = np.zeros(self.monitor.num_channels, dtype=np.uint8)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='remote-api', daemon=True)
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self._bind(), self._loop).result(timeout=5.0)
+        except Exception:
+            self._shutdown_loop()
+            raise
+        self.running = True
+        if hasattr(self.monitor, 'add_frame_hook'):
+            self.monitor.add_frame_hook(self._capture)
+        self._broadcaster = asyncio.run_coroutine_threadsafe(self._broadcast(), self._loop)
+        logging.info(f"Remote API listening on http://{self.address[0]}:{self.address[1]}/")
+
+    async def _bind(self):
+        self._server = await asyncio.start_server(self._client, self.host, self.port)
+        self.address = self._server.sockets[0].getsockname()[:2]
+
+    async def _close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for sub in list(self.subscribers):
+            sub.writer.close()
+        if self._broadcaster is not None:
+            self._broadcaster.cancel()
+        # Una vuelta del bucle para que terminen las tareas canceladas
+        await asyncio.sleep(0)
+
+    def _shutdown_loop(self):
+        loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=2.0)
+        except Exception as e:
+            logging.warning(f"Remote API: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=2.0)
+        loop.close()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if hasattr(self.monitor, 'remove_frame_hook'):
+            self.monitor.remove_frame_hook(self._capture)
+        self._shutdown_loop()
+        self.subscribers.clear()
+        logging.info("Remote API stopped")
+
+    def _capture(self, frame):
+        """Frame hook (hilo de envío): copia de la última trama publicada."""
+        self._frame[:] = frame
+        self._seq += 1
+
+    def current_frame(self):
+        if hasattr(self.monitor, 'add_frame_hook') and self._seq:
+            return self._frame.copy()
+        with self.monitor.lock:
+            return self.monitor._back_array.copy()
+
+    # ------------------ Comandos --------------------------
+    def command(self, cmd, data):
+        """Ejecutar un comando (HTTP POST /api/<cmd> o WebSocket {"cmd": ...}) y devolver la respuesta."""
+        if cmd == 'channels':
+            if 'channels' in data:
+                channels = np.array([int(ch) - 1 for ch in data['channels']], dtype=np.intp)
+                self.dmx_sender.update_sparse(channels, list(data['channels'].values()))
+            else:
+                self.dmx_sender.update_channels(int(data.get('start', 1)) - 1, data['values'])
+            return {'ok': True}
+        if cmd == 'scene':
+            if self.scene_cache is None:
+                raise LookupError("no scene cache")
+            if 'slot' in data:
+                self.scene_cache.recall_slot(data['slot'], self.scene_output)
+            else:
+                self.scene_cache.recall(str(data['name']), self.scene_output)
+            return {'ok': True}
+        if cmd == 'effect':
+            if data.get('stop'):
+                effects.stop_effect()
+            else:
+                if data['name'] not in effects.EFFECTS:
+                    raise LookupError(f"effect {data['name']!r} not available")
+                effects.effect_manager.run_effect(data['name'], self.effects_output, *self.rig())
+            return {'ok': True, 'effect': effects.effect_manager.current_effect}
+        if cmd == 'sequence':
+            if data.get('stop'):
+                sequences.stop_sequence()
+            else:
+                started = sequences.sequence_manager.run_sequence(self.effects_output, *self.rig(), data['steps'],
+                                                                  loop=bool(data.get('loop')))
+                if started is False:
+                    raise ValueError("sequence could not be compiled (see log)")
+            return {'ok': True, 'running': sequences.sequence_manager.running}
+        raise LookupError(f"unknown command {cmd!r}")
+
+    def status(self):
+        manager = sequences.sequence_manager
+        status = {
+            'effect': effects.effect_manager.current_effect,
+            'effects': sorted(effects.EFFECTS),
+            'sequence': {'running': manager.running, 'position': round(manager.position, 3),
+                         'duration': manager.duration},
+            'subscribers': len(self.subscribers),
+            'requests': self.requests,
+        }
+        stats = getattr(self.monitor, 'stats', None)
+        if stats is not None:
+            status['frames'] = stats.snapshot()
+        if self.beat_clock is not None:
+            status['tempo'] = self.beat_clock.status()
+        return status
+
+    # ------------------ HTTP ------------------------------
+    async def _client(self, reader, writer):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+            if len(head) > MAX_REQUEST:
+                raise ValueError("request too large")
+            request, *lines = head.decode('latin-1').split('\r\n')
+            method, target, _ = request.split(' ', 2)
+            headers = {}
+            for line in lines:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+            self.requests += 1
+            denied = self._check_access(url.path, headers, query)
+            if denied:
+                writer.write(f"HTTP/1.1 {denied}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+                await writer.drain()
+                return
+            if url.path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                await self._websocket(reader, writer, headers, query)
+                return
+            length = int(headers.get('content-length', 0))
+            if length > MAX_REQUEST:
+                raise ValueError("request too large")
+            body = await reader.readexactly(length) if length else b''
+            status, content, ctype = self._http(method, url.path, body)
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(content)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + content)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logging.warning(f"Remote API: {e}")
+        finally:
+            writer.close()
+
+    def _check_access(self, path, headers, query):
+        """None si se atiende la petición; si no, la línea de estado del rechazo."""
+        # Un navegador manda Origin en peticiones entre sitios: solo se aceptan desde este mismo host
+        origin = headers.get('origin')
+        if origin and urlsplit(origin).netloc != headers.get('host'):
+            return '403 Forbidden'
+        if self.token is None or path == '/':
+            return None
+        auth = headers.get('authorization', '')
+        token = auth[7:] if auth[:7].lower() == 'bearer ' else query.get('token', [''])[0]
+        if not hmac.compare_digest(token.encode(), self.token.encode()):
+            return '401 Unauthorized'
+        return None
+
+    def _http(self, method, path, body):
+        try:
+            if method == 'GET' and path == '/':
+                return '200 OK', VIEWER.encode(), 'text/html; charset=utf-8'
+            if method == 'GET' and path == '/api/status':
+                result = self.status()
+            elif method == 'GET' and path == '/api/scenes':
+                library = getattr(self.scene_cache, 'library', None)
+                result = {'scenes': library.names() if library is not None else []}
+            elif method == 'GET' and path == '/api/frame':
+                result = {'frame': self.current_frame().tolist()}
+            elif method == 'POST' and path.startswith('/api/'):
+                result = self.command(path[5:], json.loads(body or b'{}'))
+            else:
+                return '404 Not Found', b'{"error": "not found"}', 'application/json'
+        except (LookupError, ValueError, TypeError) as e:
+            return '400 Bad Request', json.dumps({'error': str(e)}).encode(), 'application/json'
+        except Exception as e:
+            logging.exception(f"Remote API: {method} {path}")
+            return '500 Internal Server Error', json.dumps({'error': str(e)}).encode(), 'application/json'
+        return '200 OK', json.dumps(result).encode(), 'application/json'
+
+    # ------------------ WebSocket -------------------------
+    async def _websocket(self, reader, writer, headers, query):
+        key = headers.get('sec-websocket-key')
+        if not key:
+            raise ValueError("missing Sec-WebSocket-Key")
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {ws_accept(key)}\r\n\r\n").encode())
+        fps = min(self.max_rate, float(query.get('fps', [self.max_rate])[0]))
+        sub = _Subscriber(writer, max(0.1, fps))
+        self.subscribers.add(sub)
+        try:
+            while True:
+                opcode, payload = await ws_read(reader)
+                if opcode == 8:
+                    writer.write(ws_frame(payload[:2], opcode=8))
+                    break
+                if opcode == 9:
+                    writer.write(ws_frame(payload, opcode=10))
+                elif opcode == 1:
+                    try:
+                        data = json.loads(payload)
+                        result = self.command(data.pop('cmd'), data)
+                    except (LookupError, ValueError, TypeError) as e:
+                        result = {'error': str(e)}
+                    except Exception as e:
+                        logging.exception("Remote API: WebSocket command")
+                        result = {'error': str(e)}
+                    writer.write(ws_frame(json.dumps(result).encode(), opcode=1))
+                await writer.drain()
+        finally:
+            self.subscribers.discard(sub)
+
+    async def _broadcast(self):
+        """Emitir a cada suscriptor, a su ritmo, los cambios desde lo último que recibió."""
+        seq = 0
+        while self.running:
+            await asyncio.sleep(1.0 / self.max_rate)
+            if not self.subscribers:
+                continue
+            now = time.monotonic()
+            frame = self.current_frame()
+            seq += 1
+            key = None
+            for sub in list(self.subscribers):
+                if now < sub.next_time:
+                    continue
+                sub.next_time = max(sub.next_time + sub.period, now)
+                transport = sub.writer.transport
+                if transport.is_closing():
+                    continue
+                if transport.get_write_buffer_size() > MAX_BUFFERED:
+                    sub.skipped += 1
+                    continue
+                message = None if sub.frame is None else encode_delta(seq, sub.frame, frame)
+                if sub.frame is None or (message is not None and len(message) > 2 * len(frame) // 3):
+                    key = key or encode_key(seq, frame)
+                    if message is None or len(key) < len(message):
+                        message = key
+                if message is None:
+                    continue
+                sub.frame = frame
+                sub.writer.write(ws_frame(message))
+                sub.bytes += len(message)
+                sub.messages += 1
+
+
+VIEWER = """<!doctype html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width">
+<title>DMX live</title>
+<style>body{font:12px sans-serif;background:#111;color:#ddd}#g{display:grid;
+grid-template-columns:repeat(32,1fr);gap:1px}#g div{height:18px;text-align:center}</style>
+</head><body><div id="s">connecting...</div><div id="g"></div><script>
+const g=document.getElementById('g'),s=document.getElementById('s'),f=new Uint8Array(512),c=[];
+for(let i=0;i<512;i++){const d=document.createElement('div');d.title=i+1;g.appendChild(d);c.push(d);}
+const t=new URLSearchParams(location.search).get('token'),ws=new WebSocket((location.protocol=='https:'?'wss://':'ws://')+
+location.host+'/ws?fps=15'+(t?'&token='+encodeURIComponent(t):''));
+ws.binaryType='arraybuffer';let n=0,bytes=0;
+ws.onmessage=e=>{if(typeof e.data=='string')return;const v=new DataView(e.data),b=new Uint8Array(e.data);
+let p=5,changed=[];if(v.getUint8(0)==1){let i=0;for(;p<b.length;p+=2)for(let k=0;k<b[p];k++)f[i++]=b[p+1];
+changed=f.map((_,i)=>i);}else{while(p<b.length){const st=v.getUint16(p),cn=v.getUint16(p+2);p+=4;
+for(let k=0;k<cn;k++){f[st+k]=b[p+k];changed.push(st+k);}p+=cn;}}
+for(const i of changed){c[i].textContent=f[i];c[i].style.background='rgb(0,'+(f[i]>>1)+','+f[i]+')';}
+n++;bytes+=b.length;s.textContent='seq '+v.getUint32(1)+' - '+n+' msgs, '+bytes+' bytes';};
+ws.onclose=()=>s.textContent='disconnected';
+</script></body></html>
+"""
+
+remote_api = RemoteAPI()
+
+
+def start_remote_api(dmx_sender, port=None, host=None, token=None, **kwargs):
+    if port is not None:
+        remote_api.port = port
+    if host is not None:
+        remote_api.host = host
+    if token is not None:
+        remote_api.token = token or None
+    remote_api.start(dmx_sender, **kwargs)
+
+
+def stop_remote_api():
+    remote_api.stop()
@@ -0,0 +1,59 @@
+"""Stream encoding of backend/remote.py: KEY/DELTA round trips and WebSocket frames."""
+
+import asyncio
+
+import numpy as np
+
+from backend.remote import encode_key, encode_delta, decode, ws_frame, ws_read, HEADER, KEY, DELTA
+
+
+def test_key_round_trip():
+    rng = np.random.default_rng(1)
+    frame = rng.integers(0, 256, 512, dtype=np.uint8)
+    out = np.zeros(512, dtype=np.uint8)
+    assert decode(encode_key(7, frame), out) == 7
+    assert np.array_equal(out, frame)
+
+
+def test_key_splits_runs_longer_than_255():
+    frame = np.zeros(512, dtype=np.uint8)
+    frame[300:] = 9
+    message = encode_key(1, frame)
+    # 300 ceros = 255 + 45, 212 nueves: tres pares (repeticiones, valor)
+    assert HEADER.unpack_from(message) == (KEY, 1)
+    assert len(message) == HEADER.size + 3 * 2
+    out = np.full(512, 1, dtype=np.uint8)
+    decode(message, out)
+    assert np.array_equal(out, frame)
+
+
+def test_delta_round_trip():
+    rng = np.random.default_rng(2)
+    previous = rng.integers(0, 256, 512, dtype=np.uint8)
+    frame = previous.copy()
+    # Cambios sueltos, cercanos (se unen en un segmento) y en los extremos
+    for ch in (0, 10, 12, 200, 201, 202, 511):
+        frame[ch] = (int(frame[ch]) + 1) % 256
+    message = encode_delta(3, previous, frame)
+    assert HEADER.unpack_from(message) == (DELTA, 3)
+    out = previous.copy()
+    assert decode(message, out) == 3
+    assert np.array_equal(out, frame)
+
+
+def test_delta_without_changes_is_none():
+    frame = np.arange(512, dtype=np.uint16).astype(np.uint8)
+    assert encode_delta(1, frame, frame.copy()) is None
+
+
+def test_ws_frame_round_trip():
+    async def read(data):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await ws_read(reader)
+
+    payload = bytes(range(256)) * 300
+    # Como un cliente: enmascarado y con longitud de 64 bits
+    assert asyncio.run(read(ws_frame(payload, opcode=2, mask=b'\x01\x02\x03\x04'))) == (2, payload)
+    assert asyncio.run(read(ws_frame(b'{"cmd": "x"}', opcode=1))) == (1, b'{"cmd": "x"}')
@@ -0,0 +1,167 @@
+"""
+Scene cache: scenes kept in memory with size-bounded LRU eviction, named hot
+slots and background prefetch.
+
+Scenes are looked up by name in the SceneLibrary (backend/scenelib.py) or, if
+the key is a file path, loaded from JSON like scenes.load_scene. After the first
+load a recall is a dict lookup plus one update_channels, far below a frame.
+
+- Hot slots ('1', 'ir', ...) pin a scene outside the LRU, so GUI buttons, OSC
+  and the IR sensor recall it without touching the disk.
+- prefetch() loads scenes on a background thread, e.g. the scene steps of a
+  sequence as soon as it is loaded.
+- stats() returns hits, misses, hit rate, evictions and memory use.
+
+Usage:
+    cache = SceneCache(library, max_bytes=1 << 20)
+    cache.prefetch(['ROJO', 'azul'])
+    cache.assign('1', 'ROJO')
+    cache.recall_slot('1', scene_layer)
+"""
+
+import os
+import json
+import queue
+import logging
+import threading
+from collections import OrderedDict
+
+from .scenelib import scene_from_json
+
+DEFAULT_MAX_BYTES = 1 << 20
+
+
+class SceneCache:
+    """Caché LRU de escenas (bytes de 512 canales) con slots fijos y precarga en segundo plano."""
+
+    def __init__(self, library=None, max_bytes=DEFAULT_MAX_BYTES, channels=512):
+        self.library = library
+        self.max_bytes = int(max_bytes)
+        self.channels = channels
+        self.lock = threading.Lock()
+        self.slots = {}
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetched = 0
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ------------------ Carga -----------------------------
+    def _load(self, key):
+        if self.library is not None and key in self.library:
+            # copy() lee con el lock de la biblioteca: no mientras crece (se reabre el mmap)
+            return self.library.copy(key)
+        if os.path.exists(key):
+            with open(key, 'r') as f:
+                return scene_from_json(json.load(f), self.channels)
+        raise KeyError(f"SceneCache: escena {key!r} no está en la biblioteca ni es un archivo")
+
+    def _insert(self, key, data):
+        """Guardar `data` como la más reciente y desalojar las más antiguas (con self.lock tomado)."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = data
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def get(self, key):
+        """Canales de la escena (bytes). La carga desde disco sólo ocurre en un fallo."""
+        with self.lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        data = self._load(key)
+        with self.lock:
+            self._insert(key, data)
+        return data
+
+    def invalidate(self, key=None):
+        """Olvidar una escena (o todas) para que se vuelva a leer, p.ej. tras guardarla."""
+        with self.lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                data = self._entries.pop(key, None)
+                if data is not None:
+                    self._bytes -= len(data)
+
+    def recall(self, key, output):
+        """Escribir la escena en `output` con una sola escritura en bloque."""
+        output.update_channels(0, self.get(key))
+
+    # ------------------ Slots -----------------------------
+    def assign(self, slot, key):
+        """Fijar la escena `key` en el slot `slot` (queda en memoria aunque el LRU la desaloje)."""
+        self.slots[str(slot)] = (key, self.get(key))
+        logging.info(f"SceneCache: slot {slot} -> {key}")
+
+    def slot(self, slot):
+        """(clave, bytes) de un slot. KeyError si no está asignado."""
+        return self.slots[str(slot)]
+
+    def recall_slot(self, slot, output):
+        output.update_channels(0, self.slot(slot)[1])
+
+    # ------------------ Precarga --------------------------
+    def prefetch(self, keys):
+        """Cargar `keys` en segundo plano (las que ya están en caché no se tocan)."""
+        for key in keys:
+            self._queue.put(key)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+            self._thread.start()
+
+    def _prefetch_loop(self):
+        while True:
+            key = self._queue.get()
+            if key is None:
+                break
+            if key in self._entries:
+                continue
+            try:
+                data = self._load(key)
+            except Exception as e:
+                logging.warning(f"SceneCache: prefetch of {key!r} failed: {e}")
+                continue
+            with self.lock:
+                if key not in self._entries:
+                    self._insert(key, data)
+                    self.prefetched += 1
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    # ------------------ Estadísticas ----------------------
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'prefetched': self.prefetched,
+            'scenes': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'slots': {slot: key for slot, (key, _) in self.slots.items()},
+        }
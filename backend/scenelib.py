@@ -0,0 +1,250 @@
+"""
+Scene library: many scenes in one binary file, recalled through mmap.
+
+Layout (little endian):
+    header   32 bytes   magic 'DMXSCN1\\0', version, universes, channels, count, capacity
+    index    capacity x 64 bytes, scene name (UTF-8, NUL padded; empty = free slot)
+    records  capacity x universes x channels bytes, one fixed-size record per universe
+
+The index is read once when the file is opened (name -> slot), so recall is an
+O(1) offset computation and a zero-parse copy of a memoryview of the map into
+the output buffer. The file grows (capacity doubles) when it runs out of slots.
+
+Scenes saved by scenes.save_scene (JSON list of 512 ints, or {"addr": value}
+dicts like the sequence 'dmx' steps) are imported with import_json_scenes():
+
+    python -m backend.scenelib scenes.dmxs 1 2 3 ROJO azul c presets/empty.json
+
+Usage:
+    lib = SceneLibrary('scenes.dmxs')
+    lib.store('rojo', data)
+    lib.recall('rojo', dmx_sender)
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import logging
+import argparse
+import threading
+
+MAGIC = b'DMXSCN1\x00'
+VERSION = 1
+HEADER = struct.Struct('<8sHHHHII8x')
+NAME_SIZE = 64
+DEFAULT_CAPACITY = 64
+
+
+class SceneLibrary:
+    """Archivo de escenas con registros de tamaño fijo por universo, abierto con mmap."""
+
+    def __init__(self, path, universes=1, channels=512, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self.lock = threading.Lock()
+        # Mapas que no se pudieron cerrar por tener memoryviews vivas; close() lo reintenta
+        self._retired = []
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._create(path, universes, channels, capacity)
+        self._open()
+
+    # ------------------ Archivo ---------------------------
+    @staticmethod
+    def _create(path, universes, channels, capacity, scenes=()):
+        """Escribir un archivo nuevo con `scenes` [(nombre, bytes de todos los universos)]."""
+        record = universes * channels
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, universes, channels, 0, len(scenes), capacity))
+            index = bytearray(capacity * NAME_SIZE)
+            for slot, (name, _) in enumerate(scenes):
+                index[slot * NAME_SIZE:slot * NAME_SIZE + NAME_SIZE] = name.encode('utf-8').ljust(NAME_SIZE, b'\x00')
+            f.write(index)
+            for _, data in scenes:
+                f.write(data)
+            f.write(bytes(record * (capacity - len(scenes))))
+
+    def _open(self):
+        self._file = open(self.path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, self.universes, self.channels, _, self.count, self.capacity = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"SceneLibrary: {self.path} no es una biblioteca de escenas v{VERSION}")
+        self.record_size = self.universes * self.channels
+        self._data_offset = HEADER.size + self.capacity * NAME_SIZE
+        self._view = memoryview(self._map)
+        self._slots = {}
+        self._free = []
+        for slot in range(self.capacity):
+            raw = self._map[HEADER.size + slot * NAME_SIZE:HEADER.size + (slot + 1) * NAME_SIZE].rstrip(b'\x00')
+            if raw:
+                self._slots[raw.decode('utf-8')] = slot
+            else:
+                self._free.append(slot)
+        self._free.reverse()
+
+    def close(self):
+        view, self._view = getattr(self, '_view', None), None
+        if view is not None:
+            view.release()
+        maps, self._retired = getattr(self, '_retired', []), []
+        if getattr(self, '_map', None) is not None:
+            maps.append(self._map)
+            self._map = None
+        for mapped in maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # Aún hay memoryviews de record() vivas: se conserva el mapa y se reintenta en el próximo close()
+                logging.warning(f"SceneLibrary: {self.path} closed with records still referenced")
+                self._retired.append(mapped)
+        if getattr(self, '_file', None) is not None:
+            self._file.close()
+            self._file = None
+
+    def flush(self):
+        self._map.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _grow(self):
+        """Duplicar la capacidad reescribiendo el archivo (con self.lock tomado)."""
+        scenes = [(name, bytes(self._record(slot))) for name, slot in sorted(self._slots.items(), key=lambda i: i[1])]
+        universes, channels, capacity = self.universes, self.channels, self.capacity * 2
+        self.close()
+        tmp = self.path + '.tmp'
+        self._create(tmp, universes, channels, capacity, scenes)
+        os.replace(tmp, self.path)
+        self._open()
+        logging.info(f"SceneLibrary: {self.path} grown to {capacity} scenes")
+
+    # ------------------ Escenas ---------------------------
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, name):
+        return name in self._slots
+
+    def names(self):
+        return sorted(self._slots, key=self._slots.get)
+
+    def _record(self, slot, universe=None):
+        offset = self._data_offset + slot * self.record_size
+        if universe is None:
+            return self._view[offset:offset + self.record_size]
+        offset += (universe - 1) * self.channels
+        return self._view[offset:offset + self.channels]
+
+    def record(self, name, universe=1):
+        """memoryview (sin copia) de los canales de la escena en `universe`. KeyError si no existe.
+
+        Apunta al mmap: no guardarla más allá de la próxima escritura en la biblioteca,
+        y leerla con self.lock tomado si otro hilo puede guardar escenas (store() puede
+        reabrir el mapa). copy() hace las dos cosas.
+        """
+        return self._record(self._slots[name], universe)
+
+    def copy(self, name, universe=1):
+        """bytes de los canales de la escena en `universe`, leídos con el lock. KeyError si no existe."""
+        with self.lock:
+            return bytes(self._record(self._slots[name], universe))
+
+    def recall(self, name, output, universe=1):
+        """Copiar la escena a `output` sin parsear nada: una sola escritura en bloque."""
+        output.update_channels(0, self.copy(name, universe))
+
+    def store(self, name, data, universe=1):
+        """Guardar `data` (hasta `channels` valores) como el universo `universe` de la escena."""
+        encoded = name.encode('utf-8')
+        if not encoded or len(encoded) > NAME_SIZE:
+            raise ValueError(f"SceneLibrary: nombre de escena vacío o de más de {NAME_SIZE} bytes")
+        if not 1 <= universe <= self.universes:
+            raise ValueError(f"SceneLibrary: universo {universe} fuera de 1..{self.universes}")
+        data = bytes(data)[:self.channels]
+        with self.lock:
+            slot = self._slots.get(name)
+            if slot is None:
+                if not self._free:
+                    self._grow()
+                slot = self._free.pop()
+                self._record(slot)[:] = bytes(self.record_size)
+                self._map[HEADER.size + slot * NAME_SIZE:HEADER.size + (slot + 1) * NAME_SIZE] = \
+                    encoded.ljust(NAME_SIZE, b'\x00')
+                self._slots[name] = slot
+                self._write_count()
+            record = self._record(slot, universe)
+            record[:len(data)] = data
+            record[len(data):] = bytes(self.channels - len(data))
+
+    def remove(self, name):
+        with self.lock:
+            slot = self._slots.pop(name, None)
+            if slot is None:
+                return
+            self._map[HEADER.size + slot * NAME_SIZE:HEADER.size + (slot + 1) * NAME_SIZE] = bytes(NAME_SIZE)
+            self._free.append(slot)
+            self._write_count()
+
+    def _write_count(self):
+        self.count = len(self._slots)
+        header = HEADER.unpack_from(self._map, 0)
+        HEADER.pack_into(self._map, 0, *header[:5], self.count, self.capacity)
+
+
+def scene_from_json(data, channels=512):
+    """Escena JSON (lista de valores o {"dirección 1-based": valor}) -> bytes de `channels` canales."""
+    frame = bytearray(channels)
+    if isinstance(data, dict):
+        for addr, value in data.items():
+            if 1 <= int(addr) <= channels:
+                frame[int(addr) - 1] = max(0, min(255, int(value)))
+    else:
+        # Como el resto de escrituras DMX: fuera de 0..255 se recorta, no falla
+        values = [max(0, min(255, int(v))) for v in data[:channels]]
+        frame[:len(values)] = bytes(values)
+    return bytes(frame)
+
+
+def import_json_scenes(library, paths, universe=1):
+    """Importar escenas JSON a la biblioteca (nombre = archivo sin extensión). Devuelve los nombres."""
+    imported = []
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            with open(path, 'r') as f:
+                frame = scene_from_json(json.load(f), library.channels)
+        except Exception as e:
+            logging.error(f"SceneLibrary: no se pudo importar {path}: {e}")
+            continue
+        library.store(name, frame, universe)
+        imported.append(name)
+    library.flush()
+    logging.info(f"SceneLibrary: imported {len(imported)} scenes into {library.path}")
+    return imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importar escenas JSON a una biblioteca binaria")
+    parser.add_argument('library', help="archivo de la biblioteca (se crea si no existe)")
+    parser.add_argument('scenes', nargs='+', help="escenas JSON (p.ej. 1 2 3 ROJO azul c presets/empty.json)")
+    parser.add_argument('--universe', type=int, default=1)
+    args = parser.parse_args(argv)
+    with SceneLibrary(args.library, universes=max(1, args.universe)) as library:
+        for name in import_json_scenes(library, args.scenes, args.universe):
+            print(name)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Frame-clock scheduler: one render loop locked to the DMX frames.
+
+FrameScheduler registers itself as a tick hook on a DMXOutput, so it runs in
+the output's send thread right before each frame is published. Every tick it
+calls the registered callbacks (effects, sequences, playbacks...) with the
+same absolute timestamp (time.monotonic()) inside one `output.frame()`
+transaction, so everything they write leaves in that frame. No callback
+sleeps or owns a thread: timing is computed from the timestamp, so it does not
+drift and the thread count stays fixed however many effects are active.
+
+If the output has no send thread of its own the scheduler can run its own
+loop with start()/stop().
+
+Usage:
+    frame_scheduler.attach(dmx_sender)
+    frame_scheduler.add(callback)      # callback(now) -> False para darse de baja
+    frame_scheduler.add(render, priority=100)   # se ejecuta después (p.ej. el compositor)
+    frame_scheduler.remove(callback)
+"""
+
+import threading
+import time
+import logging
+from contextlib import nullcontext
+
+from .dmx import FrameStats
+
+
+class FrameScheduler:
+    """Reloj de render único: llama a los callbacks registrados una vez por trama."""
+
+    def __init__(self, interval=0.023):
+        self.interval = float(interval)
+        self.callbacks = []
+        self._priorities = {}
+        self.lock = threading.Lock()
+        self.output = None
+        self.running = False
+        self.ticks = 0
+        self.last_tick = None
+        self.stats = FrameStats()
+        self._thread = None
+
+    # ------------------ Registro --------------------------
+    def add(self, callback, priority=0):
+        """Registrar callback(now). Si devuelve False se da de baja tras ese tick.
+
+        Los callbacks se llaman por prioridad ascendente (a igual prioridad, por
+        orden de registro): los productores usan 0 y quien consume lo que estos
+        escriben en el tick (el compositor) una prioridad mayor.
+        """
+        with self.lock:
+            if callback not in self.callbacks:
+                self._priorities[callback] = priority
+                # Copia al escribir: tick() recorre la lista sin tomar el lock
+                self.callbacks = sorted(self.callbacks + [callback], key=self._priorities.__getitem__)
+
+    def remove(self, callback):
+        with self.lock:
+            self.callbacks = [cb for cb in self.callbacks if cb != callback]
+            self._priorities.pop(callback, None)
+
+    def attach(self, output):
+        """Sincronizar el render con las tramas de `output` (tick hook en su hilo de envío)."""
+        if output is self.output:
+            return
+        self.detach()
+        output.add_tick_hook(self.tick)
+        self.output = output
+        logging.info(f"FrameScheduler: attached to {type(output).__name__}")
+
+    def detach(self):
+        if self.output is not None:
+            self.output.remove_tick_hook(self.tick)
+            self.output = None
+
+    def ensure_clock(self, output):
+        """Asegurar que hay un reloj: engancharse a `output` o, si no se puede, hilo propio."""
+        if self.output is not None or self.running:
+            return
+        if hasattr(output, 'add_tick_hook'):
+            self.attach(output)
+        else:
+            self.start()
+
+    # ------------------ Tick ------------------------------
+    def tick(self, now=None):
+        """Ejecutar un tick: todos los callbacks con el mismo instante, una sola trama."""
+        now = time.monotonic() if now is None else now
+        callbacks = self.callbacks
+        self.ticks += 1
+        self.last_tick = now
+        if not callbacks:
+            return
+        start = time.perf_counter()
+        finished = []
+        with self.output.frame() if self.output is not None else nullcontext():
+            for callback in callbacks:
+                try:
+                    if callback(now) is False:
+                        finished.append(callback)
+                except Exception:
+                    logging.exception(f"FrameScheduler: error en {callback!r}, se da de baja")
+                    finished.append(callback)
+        for callback in finished:
+            self.remove(callback)
+        self.stats.record(start, time.perf_counter())
+
+    # ------------------ Reloj propio (sin salida) ---------
+    def _loop(self):
+        logging.info("FrameScheduler: own clock started")
+        next_time = time.monotonic()
+        while self.running:
+            self.tick()
+            next_time += self.interval
+            sleep_time = next_time - time.monotonic()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+            else:
+                next_time = time.monotonic()
+        logging.info("FrameScheduler: own clock stopped")
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.detach()
+
+
+# Instancia única del reloj de render
+frame_scheduler = FrameScheduler()
@@ -1,54 +1,257 @@
-import time
+"""
+Sequences: JSON steps compiled into a timeline and played on the frame clock.
+
+A sequence is a list of steps {"duration": s} plus one of "effect": name,
+"scene": name and/or "dmx": {"address": value}. Timeline compiles it ahead of
+time into absolute start times, one effect instance per effect span and, for
+every step, the DMX state accumulated up to that step (channels + values). A
+frame at time t is then:
+
+- step = bisect(starts, t)                       O(log n), so seeking is free
+- on a step change: write that step's accumulated DMX state in one write
+- inside an effect span: render the effect at t - span start
+
+Playback time is always derived from the frame clock's absolute timestamp
+(position = now - origin), never from summed sleeps, so it does not drift over
+long shows (see benchmarks/bench_timeline.py). seek(), pause()/resume() and
+looping only move the origin.
+"""
+
 import json
+import bisect
 import logging
+
+import numpy as np
+
 from . import effects
+from .scenelib import scene_from_json
+from .scheduler import frame_scheduler
+
+
+def _dmx_levels(dmx, num_channels):
+    """Canales 0-based y valores 0..255 de un paso {"dirección": valor}; descarta direcciones fuera de rango."""
+    addrs = np.array([int(addr_str) for addr_str in dmx], dtype=np.intp)
+    levels = np.clip(np.rint(np.asarray(list(dmx.values()), dtype=np.float64)), 0, 255).astype(np.uint8)
+    valid = (addrs >= 1) & (addrs <= num_channels)
+    if not valid.all():
+        logging.warning(f"Sequence: direcciones fuera de 1..{num_channels} descartadas: {addrs[~valid].tolist()}")
+    return addrs[valid] - 1, levels[valid]
+
+
+class Timeline:
+    """Secuencia compilada: instantes absolutos, tramos de efecto y estado DMX acumulado por paso."""
+
+    def __init__(self, sequence, layout=None, scene_loader=None, num_channels=512):
+        self.steps = list(sequence)
+        self.layout = layout
+        self.phase = np.zeros(layout.count if layout is not None else 0)
+        durations = [float(step.get("duration", 1)) for step in self.steps]  # usa duración por defecto si no está
+        ends = np.cumsum(durations) if durations else np.zeros(0)
+        self.starts = [float(end - d) for end, d in zip(ends, durations)]
+        self.ends = [float(end) for end in ends]
+        self.duration = self.ends[-1] if self.ends else 0.0
+        self.effects = []
+        self.snapshots = []
+        values = np.zeros(num_channels, dtype=np.uint8)
+        touched = np.zeros(num_channels, dtype=bool)
+        for step in self.steps:
+            factory = effects.EFFECTS.get(step.get("effect"))
+            if "effect" in step and factory is None:
+                logging.warning(f"Effect {step['effect']} not available")
+            self.effects.append(factory() if factory is not None and layout is not None else None)
+            if "scene" in step:
+                values[:] = np.frombuffer(scene_loader(step["scene"]), dtype=np.uint8)[:num_channels]
+                touched[:] = True
+            if "dmx" in step:
+                channels, levels = _dmx_levels(step["dmx"], num_channels)
+                values[channels] = levels
+                touched[channels] = True
+            index = np.flatnonzero(touched)
+            self.snapshots.append((index, values[index].copy()))
+
+    def __len__(self):
+        return len(self.steps)
+
+    def step_at(self, t):
+        """Índice del paso activo en el instante t (-1 antes del inicio, len() tras el final)."""
+        if t >= self.duration:
+            return len(self.steps)
+        return bisect.bisect_right(self.starts, t) - 1
+
+    def enter(self, dmx_sender, index):
+        """Escribir el estado DMX acumulado del paso `index` (una sola escritura)."""
+        release = getattr(dmx_sender, 'release', None)
+        if release is not None:
+            # Como al parar un efecto: los canales vuelven a las capas inferiores
+            release()
+        channels, values = self.snapshots[index]
+        if len(channels):
+            dmx_sender.update_sparse(channels, values)
+
+    def render(self, dmx_sender, index, t):
+        """Renderizar el efecto del paso `index` en el instante t de la secuencia."""
+        effect = self.effects[index]
+        if effect is not None:
+            effects.render_into(dmx_sender, effect, self.layout, t - self.starts[index], self.phase)
+
 
 class SequenceManager:
-    def __init__(self):
+    def __init__(self, scheduler=None, scene_cache=None):
+        self.scheduler = scheduler or frame_scheduler
+        # Caché de escenas para los pasos {"scene": nombre}; sin caché se leen del archivo
+        self.scene_cache = scene_cache
         self.running = False
+        self.paused = False
+        self.loop = False
         self.current_sequence = None
+        self.timeline = None
+        self._state = None
 
-    def run_sequence(self, dmx_sender, start_address, heads, mode_channels, sequence):
-        """Ejecuta una secuencia de pasos con efectos o datos DMX."""
+    def run_sequence(self, dmx_sender, start_address, heads, mode_channels, sequence, loop=False):
+        """Ejecuta una secuencia de pasos con efectos o datos DMX.
+
+        La secuencia se compila en un Timeline y se evalúa en el reloj de
+        tramas a partir del instante absoluto de cada trama. No bloquea.
+        Devuelve False (y lo registra) si la secuencia no se puede compilar.
+        """
+        self.stop()
+        try:
+            layout = effects.HeadLayout(start_address, heads, mode_channels)
+            timeline = Timeline(sequence, layout, self._scene, dmx_sender.num_channels)
+        except Exception as e:
+            # Escena que no existe, dirección no numérica, paso mal formado...
+            logging.error(f"Sequence error: {e}")
+            return False
+        self.timeline = timeline
         self.running = True
+        self.paused = False
+        self.loop = loop
         self.current_sequence = sequence
+        self._state = {
+            'sender': dmx_sender,
+            'origin': None,      # instante de reloj que corresponde a t = 0
+            'seek': 0.0,         # posición a aplicar en el próximo tick
+            'position': 0.0,
+            'index': -1,
+        }
+        self.scheduler.ensure_clock(dmx_sender)
+        self.scheduler.add(self._tick)
+        return True
+
+    def _scene(self, key):
+        if self.scene_cache is not None:
+            return self.scene_cache.get(key)
+        with open(key, 'r') as f:
+            return scene_from_json(json.load(f))
+
+    def prefetch_scenes(self, sequence):
+        """Precargar en segundo plano las escenas que usan los pasos de `sequence`."""
+        if self.scene_cache is not None and sequence:
+            self.scene_cache.prefetch([step["scene"] for step in sequence if "scene" in step])
+
+    # ------------------ Transporte ------------------------
+    @property
+    def position(self):
+        """Segundos desde el inicio de la secuencia (en el último tick)."""
+        return self._state['position'] if self._state else 0.0
+
+    @property
+    def duration(self):
+        return self.timeline.duration if self.timeline else 0.0
+
+    def seek(self, t):
+        """Saltar al instante t (se aplica en la próxima trama)."""
+        if self._state is not None:
+            self._state['seek'] = max(0.0, min(float(t), self.duration))
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        if self.paused and self._state is not None:
+            # Continuar desde donde se paró: se recoloca el origen en el próximo tick
+            self._state['seek'] = self._state['position']
+        self.paused = False
+
+    def _tick(self, now):
+        state = self._state
+        timeline = self.timeline
+        if state is None or not self.running:
+            return False
+        if state['seek'] is not None:
+            seek = state['seek']
+            state['origin'] = now - seek
+            state['seek'] = None
+            state['index'] = -1
+            if self.paused:
+                # Seek en pausa: se muestra la nueva posición y resume() sigue desde ella
+                state['position'] = seek
+                return self._show(state, timeline, min(seek, timeline.duration - 1e-9))
+        if self.paused:
+            return
+        t = now - state['origin']
+        if t >= timeline.duration:
+            if not self.loop or timeline.duration <= 0:
+                self._finish()
+                return False
+            # Bucle: el origen avanza un número entero de vueltas, sin acumular error
+            laps = t // timeline.duration
+            state['origin'] += laps * timeline.duration
+            t -= laps * timeline.duration
+            state['index'] = -1
+        state['position'] = t
+        return self._show(state, timeline, t)
+
+    def _show(self, state, timeline, t):
+        """Entrar (si cambia) y renderizar el paso del instante t."""
         try:
-            for step in sequence:
-                if not self.running:
-                    break
-                if "effect" in step:
-                    effects.run_effect(step["effect"], dmx_sender, start_address, heads, mode_channels)
-                    time.sleep(step.get("duration", 1))  # usa duración por defecto si no está
-                    effects.stop_effect()
-                elif "dmx" in step:
-                    for addr_str, value in step["dmx"].items():
-                        addr = int(addr_str) - 1
-                        dmx_sender.update_channel(addr, value)
-                    time.sleep(step.get("duration", 1))
-                logging.info(f"Sequence step executed: {step}")
+            index = timeline.step_at(t)
+            if not 0 <= index < len(timeline):
+                return
+            if index != state['index']:
+                state['index'] = index
+                timeline.enter(state['sender'], index)
+                logging.info(f"Sequence step executed: {timeline.steps[index]}")
+            timeline.render(state['sender'], index, t)
         except Exception as e:
             logging.error(f"Sequence error: {e}")
-        finally:
-            effects.stop_effect()  # Asegura que se detengan los efectos al finalizar
+            self._finish()
+            return False
+
+    def _finish(self):
+        sender = self._state['sender'] if self._state else None
+        release = getattr(sender, 'release', None)
+        if release is not None:
+            release()
+        self.running = False
+        self.paused = False
+        self.current_sequence = None
+        self._state = None
 
     def stop(self):
         """Detiene la ejecución de la secuencia."""
+        self.scheduler.remove(self._tick)
+        if self.running:
+            self._finish()
         self.running = False
         self.current_sequence = None
+        self._state = None
 
     def load_sequence(self, path):
         """Carga una secuencia desde un archivo JSON."""
         try:
             with open(path, 'r') as f:
-                return json.load(f)
+                sequence = json.load(f)
+            self.prefetch_scenes(sequence)
+            return sequence
         except Exception as e:
             logging.error(f"Error loading sequence: {e}")
             return []
 
 sequence_manager = SequenceManager()
 
-def run_sequence(dmx_sender, start_address, heads, mode_channels, sequence):
-    sequence_manager.run_sequence(dmx_sender, start_address, heads, mode_channels, sequence)
+def run_sequence(dmx_sender, start_address, heads, mode_channels, sequence, loop=False):
+    return sequence_manager.run_sequence(dmx_sender, start_address, heads, mode_channels, sequence, loop)
 
 def stop_sequence():
     sequence_manager.stop()
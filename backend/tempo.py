@@ -0,0 +1,195 @@
+"""
+Tempo: a phase-accurate beat clock fed by tap tempo, OSC and the audio beat.
+
+BeatClock keeps the tempo as one immutable state (anchor_time, anchor_beat,
+bpm), so beat_at(now) is a single multiply-add that any thread can evaluate
+for the frame's timestamp without locks; writers replace the whole tuple.
+Changing the tempo re-anchors at the current instant, so the phase never
+jumps.
+
+Inputs:
+- tap(): least-squares fit of the last taps (tempo) and the last tap lands
+  on a beat (phase); a pause longer than TAP_RESET starts a new tap series
+- set_bpm() / sync(): tempo and beat alignment from OSC (/tempo/bpm,
+  /tempo/beat, /tempo/tap) or the GUI
+- follow_audio(audio): a frame clock callback reads the analysis ring
+  (audio.AudioReactivity.ring), takes the estimated BPM and pulls the phase
+  towards bass onsets close to a beat (a first-order PLL, AUDIO_GAIN per
+  onset); after AUDIO_RELOCK onsets off the beat it re-locks on the next one
+
+EffectManager samples the clock every frame: effect time is derived from the
+beat count, so steps change in the first frame after the beat (error below
+one frame period; see benchmarks/bench_tempo.py).
+
+Usage:
+    beat_clock.tap(); beat_clock.tap(); ...
+    beat = beat_clock.beat_at(now)       # 12.37 -> beat 12, 37 % del siguiente
+"""
+
+import time
+import math
+import logging
+from collections import deque
+
+import numpy as np
+
+from .analyzer import ONSET, BPM, BASS, HIGH
+from .scheduler import frame_scheduler
+
+# Tempo al que los efectos van a su velocidad nominal (0.5 s por beat)
+REFERENCE_BPM = 120.0
+MIN_BPM = 30.0
+MAX_BPM = 300.0
+# Segundos sin taps tras los que empieza una serie nueva
+TAP_RESET = 2.0
+# Fracción del error de fase que corrige cada onset de audio
+AUDIO_GAIN = 0.25
+# Ventana (en beats) alrededor del beat previsto en la que un onset cuenta como beat
+AUDIO_WINDOW = 0.2
+# Onsets de graves seguidos fuera de la ventana tras los que se resincroniza la fase
+AUDIO_RELOCK = 4
+# Prioridad en el reloj de tramas: antes que los productores (0)
+TEMPO_PRIORITY = -10
+
+
+class BeatClock:
+    """Reloj de beats: tempo + fase, muestreado por los efectos en cada trama."""
+
+    def __init__(self, bpm=REFERENCE_BPM, scheduler=None):
+        self.scheduler = scheduler or frame_scheduler
+        # (instante de anclaje, beat en ese instante, bpm): se sustituye entero
+        self._state = (time.monotonic(), 0.0, float(bpm))
+        self.source = 'internal'
+        self._taps = deque(maxlen=8)
+        self._audio = None
+        self._audio_seq = 0
+        self._audio_misses = AUDIO_RELOCK
+        # Del golpe al instante estimado del onset: ~9 ms de detección (bench_audio)
+        # más medio hop de espera media hasta que la trama lee el anillo
+        self.audio_latency = 0.012
+        # Error de fase (beats) de los últimos onsets de audio usados para sincronizar
+        self.phase_errors = deque(maxlen=128)
+
+    @property
+    def bpm(self):
+        return self._state[2]
+
+    @property
+    def period(self):
+        """Segundos por beat."""
+        return 60.0 / self._state[2]
+
+    def beat_at(self, now):
+        anchor_time, anchor_beat, bpm = self._state
+        return anchor_beat + (now - anchor_time) * bpm / 60.0
+
+    def phase(self, now, division=1.0):
+        """Fase 0..1 dentro del beat (division=4: dentro del compás de 4 beats)."""
+        return (self.beat_at(now) / division) % 1.0
+
+    # ------------------ Entradas -------------------------
+    def set_bpm(self, bpm, now=None, source=None):
+        """Cambiar el tempo sin saltos de fase (se reancla en `now`)."""
+        now = time.monotonic() if now is None else now
+        bpm = min(MAX_BPM, max(MIN_BPM, float(bpm)))
+        self._state = (now, self.beat_at(now), bpm)
+        if source is not None:
+            self.source = source
+
+    def sync(self, beat_time=None, gain=1.0):
+        """Alinear el beat más cercano con `beat_time`, corrigiendo `gain` del error. Devuelve el error (beats)."""
+        beat_time = time.monotonic() if beat_time is None else beat_time
+        beat = self.beat_at(beat_time)
+        error = beat - round(beat)
+        self._state = (beat_time, beat - gain * error, self._state[2])
+        return error
+
+    def tap(self, now=None):
+        """Un tap: tempo por mínimos cuadrados de la serie y el último tap cae en beat."""
+        now = time.monotonic() if now is None else now
+        if self._taps and now - self._taps[-1] > TAP_RESET:
+            self._taps.clear()
+        self._taps.append(now)
+        self.source = 'tap'
+        if len(self._taps) < 2:
+            self.sync(now)
+            return self.bpm
+        taps = np.array(self._taps)
+        k = np.arange(len(taps))
+        period, offset = np.polyfit(k, taps, 1)
+        bpm = min(MAX_BPM, max(MIN_BPM, 60.0 / period))
+        last = offset + period * k[-1]
+        self._state = (last, round(self.beat_at(last)), bpm)
+        return bpm
+
+    # ------------------ Beat de audio ---------------------
+    def follow_audio(self, audio):
+        """Seguir el tempo y los onsets del análisis de audio (objeto con .ring y .hop_time)."""
+        self._audio = audio
+        self._audio_seq = 0
+        self._audio_misses = AUDIO_RELOCK
+        self.source = 'audio'
+        self.scheduler.add(self._audio_tick, priority=TEMPO_PRIORITY)
+
+    def unfollow_audio(self):
+        self.scheduler.remove(self._audio_tick)
+        self._audio = None
+        if self.source == 'audio':
+            self.source = 'internal'
+
+    def _audio_tick(self, now):
+        audio = self._audio
+        if audio is None:
+            return False
+        ring = audio.ring
+        if ring is None:
+            return
+        seq, rows = ring.read_since(self._audio_seq)
+        if seq < self._audio_seq:
+            # Anillo nuevo (el audio se ha reiniciado)
+            seq, rows = ring.read_since(0)
+        self._audio_seq = seq
+        if not len(rows):
+            return
+        self.apply_features(rows, now, audio.hop_time)
+
+    def apply_features(self, rows, now, hop_time):
+        """Aplicar vectores de análisis (analyzer.FEATURES) recibidos en el instante `now`."""
+        bpm = rows[-1, BPM]
+        if bpm > 0 and abs(bpm - self.bpm) > 0.005 * self.bpm:
+            self.set_bpm(bpm, now)
+        # Solo los onsets con más graves que agudos son candidatos a beat (bombo, no charles).
+        # Instante de cada uno: edad en hops dentro del lote menos la latencia del análisis
+        beats = np.flatnonzero((rows[:, ONSET] > 0) & (rows[:, BASS] > rows[:, HIGH]))
+        ages = (len(rows) - 1 - beats) * hop_time
+        for onset_time in now - ages - self.audio_latency:
+            if self._audio_misses >= AUDIO_RELOCK:
+                # Sin enganche: este onset pasa a ser beat directamente
+                self.sync(onset_time)
+                self._audio_misses = 0
+                continue
+            beat = self.beat_at(onset_time)
+            error = beat - round(beat)
+            if abs(error) <= AUDIO_WINDOW:
+                self.phase_errors.append(error)
+                self.sync(onset_time, AUDIO_GAIN)
+                self._audio_misses = 0
+            else:
+                self._audio_misses += 1
+
+    def status(self):
+        return {'bpm': round(self.bpm, 2), 'source': self.source,
+                'beat': math.floor(self.beat_at(time.monotonic()))}
+
+
+# Reloj de beats único (efectos, OSC, GUI)
+beat_clock = BeatClock()
+
+
+def tap(now=None):
+    return beat_clock.tap(now)
+
+
+def set_bpm(bpm):
+    beat_clock.set_bpm(bpm, source='manual')
+    logging.info(f"Tempo: {beat_clock.bpm:.1f} BPM")
@@ -0,0 +1,206 @@
+"""
+Multi-universe output engine.
+
+UniverseManager owns N DMX universes, each with its own output (a DMXSender on
+its own serial port, or any object exposing the same `_send_once` surface) and
+schedules all of their frames from a single clock thread.
+
+Each universe has a dedicated writer thread, so a slow port only delays its own
+frames: if a universe is still busy when its next frame is due, that frame is
+counted as dropped instead of blocking the clock or the other universes.
+
+Usage:
+    m = UniverseManager()
+    m.add_universe(1, port='/dev/serial0')
+    m.add_universe(2, port='/dev/ttyUSB0', interval=0.025)
+    m.start()
+    m.update_channel(2, 0, 255)   # universo 2, canal 1
+    m.stats()                     # {1: {'fps': ..., 'load': ...}, 2: {...}}
+    m.stop()
+"""
+
+import threading
+import time
+import logging
+
+from .dmx import DMXSender, FrameStats
+
+
+class Universe:
+    """Un universo gestionado: su salida, su periodo y sus estadísticas."""
+
+    def __init__(self, number, output, interval=0.023):
+        self.number = int(number)
+        self.output = output
+        self.interval = float(interval)
+        self.stats = FrameStats()
+        self.next_due = 0.0
+        self.active = True
+
+        self._due = threading.Event()
+        self._busy = False
+        self._thread = None
+
+    @property
+    def refresh_rate(self):
+        return 1.0 / self.interval if self.interval > 0 else 0.0
+
+    def frame_interval(self):
+        """Periodo de la próxima trama (las salidas adaptativas lo ajustan a su longitud)."""
+        next_interval = getattr(self.output, '_next_interval', None)
+        return next_interval(self.interval) if next_interval is not None else self.interval
+
+    def _worker(self, manager):
+        """Hilo de escritura del universo: espera la señal del reloj y envía una trama."""
+        while manager.running and self.active:
+            if not self._due.wait(timeout=0.1):
+                continue
+            self._due.clear()
+            if not (manager.running and self.active):
+                break
+            start = time.perf_counter()
+            try:
+                self.output._send_once()
+            except Exception:
+                logging.exception(f"Universe {self.number}: error enviando trama")
+            finally:
+                self.stats.record(start, time.perf_counter())
+                self._busy = False
+
+
+class UniverseManager:
+    """Gestiona N universos DMX sincronizados por un único reloj de tramas."""
+
+    def __init__(self):
+        self.universes = {}
+        self.lock = threading.Lock()
+        self.running = False
+        self._clock = None
+
+    def __getitem__(self, number):
+        return self.universes[number]
+
+    def __contains__(self, number):
+        return number in self.universes
+
+    def __len__(self):
+        return len(self.universes)
+
+    def add_universe(self, number, output=None, port=None, interval=0.023, **sender_kwargs):
+        """Añadir un universo. Si no se pasa `output` se abre un DMXSender en `port`."""
+        if output is None:
+            if port is None:
+                raise ValueError("add_universe: se necesita output o port")
+            output = DMXSender(port=port, **sender_kwargs)
+        universe = Universe(number, output, interval)
+        with self.lock:
+            if universe.number in self.universes:
+                raise ValueError(f"add_universe: el universo {number} ya existe")
+            self.universes[universe.number] = universe
+            if self.running:
+                self._start_worker(universe)
+        logging.info(f"UniverseManager: universe {number} added ({universe.refresh_rate:.1f} Hz)")
+        return universe
+
+    def remove_universe(self, number):
+        """Quitar un universo y cerrar su salida."""
+        with self.lock:
+            universe = self.universes.pop(number, None)
+        if universe is None:
+            return
+        universe.active = False
+        universe._due.set()
+        self._close_output(universe)
+        logging.info(f"UniverseManager: universe {number} removed")
+
+    def set_refresh_rate(self, number, hz):
+        """Cambiar la frecuencia de refresco (Hz) de un universo."""
+        if hz <= 0:
+            raise ValueError("set_refresh_rate: hz debe ser > 0")
+        self.universes[number].interval = 1.0 / float(hz)
+
+    def update_channel(self, number, addr, value):
+        """Actualizar un canal (addr: 0-based) del universo indicado."""
+        universe = self.universes.get(number)
+        if universe is None:
+            logging.warning(f"UniverseManager.update_channel: universo {number} no existe")
+            return
+        universe.output.update_channel(addr, value)
+
+    def stats(self):
+        """Frecuencia real y carga por universo."""
+        with self.lock:
+            universes = list(self.universes.values())
+        result = {}
+        for universe in universes:
+            snap = universe.stats.snapshot()
+            snap['refresh_rate'] = round(universe.refresh_rate, 2)
+            result[universe.number] = snap
+        return result
+
+    # ------------------ Reloj -----------------------------
+    def _start_worker(self, universe):
+        universe.next_due = time.perf_counter()
+        universe._thread = threading.Thread(target=universe._worker, args=(self,), daemon=True)
+        universe._thread.start()
+
+    def _clock_loop(self):
+        """Único reloj: despacha cada universo cuando vence su trama."""
+        logging.info("UniverseManager: clock started")
+        while self.running:
+            now = time.perf_counter()
+            with self.lock:
+                universes = list(self.universes.values())
+            next_wake = now + 0.1
+            for universe in universes:
+                if now >= universe.next_due:
+                    if universe._busy:
+                        # El puerto sigue ocupado con la trama anterior: no esperar por él
+                        universe.stats.dropped += 1
+                    else:
+                        universe._busy = True
+                        universe._due.set()
+                    interval = universe.frame_interval()
+                    universe.next_due += interval
+                    if universe.next_due < now:
+                        # Nos quedamos atrás (p.ej. pausa del sistema): realinear sin ráfagas
+                        universe.next_due = now + interval
+                next_wake = min(next_wake, universe.next_due)
+            sleep_time = next_wake - time.perf_counter()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+        logging.info("UniverseManager: clock stopped")
+
+    def start(self):
+        """Arranca el reloj y un hilo de escritura por universo."""
+        if self.running:
+            logging.debug("UniverseManager.start: ya estaba corriendo")
+            return
+        self.running = True
+        with self.lock:
+            for universe in self.universes.values():
+                self._start_worker(universe)
+        self._clock = threading.Thread(target=self._clock_loop, daemon=True)
+        self._clock.start()
+        logging.info(f"UniverseManager: started with {len(self.universes)} universes")
+
+    def stop(self):
+        """Detiene el reloj, los hilos de escritura y cierra todas las salidas."""
+        self.running = False
+        if self._clock is not None:
+            self._clock.join(timeout=1.0)
+            self._clock = None
+        with self.lock:
+            universes = list(self.universes.values())
+        for universe in universes:
+            universe._due.set()
+            if universe._thread is not None:
+                universe._thread.join(timeout=1.0)
+                universe._thread = None
+            self._close_output(universe)
+
+    def _close_output(self, universe):
+        try:
+            universe.output.stop()
+        except Exception:
+            logging.exception(f"UniverseManager: error cerrando universo {universe.number}")
@@ -0,0 +1,92 @@
+"""
+Coste por hop y latencia de detección del análisis de audio, sin tarjeta de sonido.
+
+La fuente sintética genera un bombo en cada beat (instantes conocidos) más
+charles y ruido; se analiza más rápido que el tiempo real y se mide el tiempo
+de CPU de cada hop, la latencia desde cada bombo hasta su onset (incluye el
+hop y la ventana de la FFT) y el BPM estimado. Con --wav se analiza un archivo
+(solo coste y BPM). Como referencia se mide la reducción original por bloque
+(np.abs(data).mean() cada 1024 muestras).
+
+    python -m benchmarks.bench_audio
+    python -m benchmarks.bench_audio --bpm 95 128 174 --hop 128 256 512
+    python -m benchmarks.bench_audio --wav tema.wav
+"""
+
+import time
+import logging
+import argparse
+
+import numpy as np
+
+from backend.analyzer import AudioAnalyzer, SyntheticSource, WavSource, ONSET, TIME
+
+
+def analyze(source, hop, fft_size):
+    analyzer = AudioAnalyzer(rate=source.rate, fft_size=fft_size, hop=hop)
+    costs, onsets = [], []
+    while True:
+        samples = source.read(hop)
+        if samples is None:
+            break
+        start = time.perf_counter()
+        results = analyzer.process(samples)
+        costs.append(time.perf_counter() - start)
+        onsets.extend(f[TIME] for f in results if f[ONSET])
+    return np.array(costs), np.array(onsets), analyzer
+
+
+def latencies(beats, onsets, window=0.1):
+    """Latencia de cada bombo hasta el primer onset posterior (dentro de `window`)."""
+    beats = np.asarray(beats)
+    after = np.searchsorted(onsets, beats)
+    found = after < len(onsets)
+    lat = onsets[after[found]] - beats[found]
+    return lat[lat <= window]
+
+
+def baseline_cost(seconds, rate=44100, chunk=1024):
+    data = (np.random.default_rng(0).standard_normal(int(seconds * rate)) * 8000).astype(np.int16)
+    start = time.perf_counter()
+    for i in range(0, len(data) - chunk, chunk):
+        np.abs(data[i:i + chunk]).mean() / 32768 * 255
+    return (time.perf_counter() - start) / (len(data) // chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bpm', type=float, nargs='+', default=[90.0, 120.0, 150.0])
+    parser.add_argument('--hop', type=int, nargs='+', default=[256, 512])
+    parser.add_argument('--fft', type=int, default=1024)
+    parser.add_argument('--seconds', type=float, default=30.0)
+    parser.add_argument('--wav', help="analizar un archivo WAV en lugar de la fuente sintética")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    base = baseline_cost(args.seconds)
+    print(f"original (media por bloque de 1024): {base * 1e6:.1f} us/bloque")
+    if args.wav:
+        for hop in args.hop:
+            with WavSource(args.wav) as source:
+                costs, onsets, analyzer = analyze(source, hop, args.fft)
+            print(f"{args.wav}: hop {hop}, {np.mean(costs) * 1e6:.1f} us/hop, "
+                  f"{len(onsets)} onsets, {analyzer.bpm:.1f} BPM")
+        return
+
+    print(f"{'hop':>5} {'hop ms':>7} {'BPM real':>9} {'BPM est.':>9} {'us/hop':>8} {'p99 us':>8} "
+          f"{'carga %':>8} {'detect.':>8} {'lat. ms':>8} {'p99 ms':>8}")
+    for hop in args.hop:
+        for bpm in args.bpm:
+            source = SyntheticSource(bpm=bpm, duration=args.seconds)
+            costs, onsets, analyzer = analyze(source, hop, args.fft)
+            lat = latencies(source.beat_times, onsets)
+            hop_ms = hop / source.rate * 1e3
+            per_hop = costs.sum() / max(1, len(costs))
+            print(f"{hop:>5} {hop_ms:>7.2f} {bpm:>9.1f} {analyzer.bpm:>9.1f} {per_hop * 1e6:>8.1f} "
+                  f"{np.percentile(costs, 99) * 1e6:>8.1f} {per_hop * 1e3 / hop_ms * 100:>8.2f} "
+                  f"{len(lat):>3}/{len(source.beat_times):<4} {lat.mean() * 1e3:>8.2f} "
+                  f"{np.percentile(lat, 99) * 1e3:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
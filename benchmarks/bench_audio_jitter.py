@@ -0,0 +1,60 @@
+"""
+Jitter de las tramas DMX sin audio, con el análisis en un hilo y en el proceso de audio.
+
+Una salida sin transporte envía tramas en su hilo (como DMXSender) con el
+reloj de tramas enganchado; la reactividad de audio analiza la fuente
+sintética en tiempo real y escribe en cada trama. Se mide el periodo real de
+cada trama (desviación típica, p99 de |periodo - media| y máximo) en tres
+casos: sin audio, análisis en un hilo de este intérprete (process=False) y
+análisis en el proceso de audio con el anillo en memoria compartida.
+
+    python -m benchmarks.bench_audio_jitter
+    python -m benchmarks.bench_audio_jitter --seconds 20 --interval 0.023
+"""
+
+import time
+import logging
+import argparse
+
+from backend.dmx import NullOutput, FrameStats
+from backend.scheduler import FrameScheduler
+from backend.audio import AudioReactivity
+
+
+def run(mode, seconds, interval, spec):
+    out = NullOutput()
+    out.stats = FrameStats(window=int(seconds / interval) + 16)
+    scheduler = FrameScheduler(interval)
+    scheduler.attach(out)
+    reactivity = AudioReactivity(scheduler)
+    if mode != 'none':
+        reactivity.start(out, 1, 8, 14, spec, process=(mode == 'process'))
+        # Arranque del proceso/fuente fuera de la medida
+        time.sleep(1.0)
+    out.start(interval)
+    time.sleep(seconds)
+    out.stop()
+    hops = reactivity.ring.seq if reactivity.ring is not None else 0
+    reactivity.stop()
+    scheduler.detach()
+    return out.stats, hops
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--interval', type=float, default=0.023)
+    parser.add_argument('--source', default='synthetic:120')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"periodo de trama {args.interval * 1e3:.1f} ms, {args.seconds:.0f} s por caso, fuente {args.source}")
+    print(f"{'audio':>8} {'tramas':>7} {'hops':>6} {'std ms':>8} {'p99 ms':>8} {'máx ms':>8}")
+    for mode in ('none', 'thread', 'process'):
+        stats, hops = run(mode, args.seconds, args.interval, args.source)
+        std, p99, _, high = stats.jitter()
+        print(f"{mode:>8} {stats.frames:>7} {hops:>6} {std * 1e3:>8.3f} {p99 * 1e3:>8.3f} {high * 1e3:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Compara las estrategias de break/MAB de DMXSender (sleep, spin, baud).
+
+Sin --port usa un pty como sustituto del UART (útil para medir el coste en
+CPU/jitter del lado Python); con --port mide sobre el hardware real.
+
+    python -m benchmarks.bench_break_modes
+    python -m benchmarks.bench_break_modes --port /dev/serial0 --seconds 10 --load
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from backend.dmx import DMXSender, BREAK_MODES
+
+
+def _pty_port():
+    """Abre un pty y descarta en segundo plano todo lo que se escriba en él."""
+    import pty
+    master, slave = pty.openpty()
+
+    def drain():
+        while True:
+            try:
+                os.read(master, 4096)
+            except OSError:
+                break
+
+    threading.Thread(target=drain, daemon=True).start()
+    return os.ttyname(slave)
+
+
+def _cpu_load(stop):
+    """Hilo que compite por el GIL, como la GUI o el audio en el Pi."""
+    x = 0
+    while not stop.is_set():
+        x = (x + 1) % 1000003
+
+
+def run(port, seconds, interval, load):
+    results = {}
+    for mode in BREAK_MODES:
+        sender = DMXSender(port=port, break_mode=mode)
+        stop = threading.Event()
+        if load:
+            threading.Thread(target=_cpu_load, args=(stop,), daemon=True).start()
+        sender.start(interval)
+        time.sleep(seconds)
+        sender.stop()
+        stop.set()
+        results[mode] = sender.stats.snapshot()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', help='puerto serial real (por defecto un pty)')
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--interval', type=float, default=0.023)
+    parser.add_argument('--load', action='store_true', help='añadir un hilo de carga de CPU')
+    args = parser.parse_args()
+
+    port = args.port or _pty_port()
+    print(f"port={port} interval={args.interval * 1000:.1f}ms load={args.load}")
+    print(f"{'mode':<6} {'fps':>7} {'period':>8} {'jitter':>8} {'p99':>8} {'min':>8} {'max':>8}  (ms)")
+    for mode, s in run(port, args.seconds, args.interval, args.load).items():
+        print(f"{mode:<6} {s['fps']:>7.2f} {s['period_ms']:>8.3f} {s['jitter_ms']:>8.3f} "
+              f"{s['p99_jitter_ms']:>8.3f} {s['min_ms']:>8.3f} {s['max_ms']:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
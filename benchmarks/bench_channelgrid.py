@@ -0,0 +1,135 @@
+"""
+Rejilla de canales de la pestaña Manual: coste del refresco y escrituras por arrastre.
+
+Refresco (por tick de la UI, `--universes` universos de 512 canales):
+- sliders: lo que hacía sync_sliders_with_dmx, un lock y una lectura por slider
+- vista:   ChannelView.refresh, una copia por salida bajo su lock + diff NumPy
+
+Arrastre: un fader mueve `--selection` canales con `--events` eventos por
+segundo durante `--seconds`, con tramas cada `--interval` en un reloj virtual.
+"directo" escribe cada evento en la salida (un update_channel por canal,
+como los sliders); "vista" pasa por ChannelView (StagedOutput + flush en el
+reloj de tramas). Se cuentan las escrituras que recibe la salida y se
+comprueba que la última trama lleva el último valor.
+
+No necesita PyQt5: mide la parte que no depende de la vista.
+
+    python -m benchmarks.bench_channelgrid
+    python -m benchmarks.bench_channelgrid --universes 1 4 8 --events 500
+"""
+
+import time
+import logging
+import argparse
+
+import numpy as np
+
+from backend.dmx import DMXOutput
+from backend.scheduler import FrameScheduler
+from backend.channelview import ChannelView
+
+CHANNELS = 512
+
+
+class _CountingOutput(DMXOutput):
+    """Salida sin transporte que cuenta las escrituras que recibe."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def _write(self, index, values):
+        self.writes += 1
+        super()._write(index, values)
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_refresh(universes, repeat):
+    outputs = {u: DMXOutput() for u in range(1, universes + 1)}
+    rng = np.random.default_rng(1)
+    for out in outputs.values():
+        out.update_channels(0, rng.integers(0, 256, CHANNELS, dtype=np.uint8))
+    view = ChannelView(outputs)
+    sliders = [(out, ch) for out in outputs.values() for ch in range(CHANNELS)]
+    shown = {}
+
+    def per_slider():
+        for out, ch in sliders:
+            with out.lock:
+                value = out.dmx_data[ch]
+            shown[(id(out), ch)] = int(value)
+
+    def snapshot():
+        view.refresh()
+
+    # Un canal cambia entre refrescos (caso típico)
+    outputs[1].update_channel(0, 7)
+    return best_of(per_slider, repeat), best_of(snapshot, repeat)
+
+
+def bench_drag(mode, args):
+    out = _CountingOutput()
+    scheduler = FrameScheduler(args.interval)
+    scheduler.output = out
+    view = ChannelView({1: out}, scheduler=scheduler)
+    view.start()
+    selection = np.arange(args.selection)
+    events = int(args.events * args.seconds)
+    frames = int(args.seconds / args.interval)
+    # Eventos y tramas en orden temporal (reloj virtual)
+    timeline = sorted([(k / args.events, 'event', k) for k in range(events)] +
+                      [((k + 1) * args.interval, 'frame', k) for k in range(frames)])
+    start = time.perf_counter()
+    value = 0
+    for now, kind, k in timeline:
+        if kind == 'frame':
+            scheduler.tick(now)
+            continue
+        value = k % 256
+        if mode == 'directo':
+            for ch in selection:
+                out.update_channel(int(ch), value)
+        else:
+            view.set_flat(selection, value)
+    scheduler.tick(args.seconds + args.interval)
+    elapsed = time.perf_counter() - start
+    view.stop()
+    ok = bool((out._back_array[selection] == value).all())
+    return out.writes, elapsed, ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--universes', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--events', type=float, default=200.0, help="eventos del fader por segundo")
+    parser.add_argument('--selection', type=int, default=9, help="canales que mueve el fader")
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--interval', type=float, default=0.023)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'universos':>9} {'sliders us':>10} {'vista us':>9} {'x':>6}")
+    for universes in args.universes:
+        old, new = bench_refresh(universes, args.repeat)
+        print(f"{universes:>9} {old * 1e6:>10.0f} {new * 1e6:>9.1f} {old / new:>6.0f}")
+
+    print(f"\narrastre: {args.events:.0f} eventos/s sobre {args.selection} canales durante "
+          f"{args.seconds:.0f} s, tramas cada {args.interval * 1e3:.0f} ms")
+    print(f"{'modo':>7} {'escrituras':>10} {'por trama':>9} {'ms':>7} {'último valor':>12}")
+    frames = args.seconds / args.interval
+    for mode in ('directo', 'vista'):
+        writes, elapsed, ok = bench_drag(mode, args)
+        print(f"{mode:>7} {writes:>10} {writes / frames:>9.1f} {elapsed * 1e3:>7.1f} {'ok' if ok else 'MAL':>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Coste por tick de los efectos vectorizados frente al bucle por canal original.
+
+    python -m benchmarks.bench_effects
+    python -m benchmarks.bench_effects --heads 2 16 128 512 --ticks 500
+"""
+
+import argparse
+import colorsys
+import time
+
+import numpy as np
+
+from backend.dmx import NullOutput
+from backend.effects import EFFECTS, HeadLayout, render_into
+
+
+def legacy_rainbow_tick(dmx_sender, start_address, heads, mode_channels, hue):
+    """Un tick del Rainbow original: colorsys + 3 update_channel por cabeza."""
+    r, g, b = [int(x * 255) for x in colorsys.hsv_to_rgb(hue, 1.0, 1.0)]
+    for head in range(heads):
+        base = start_address - 1 + head * mode_channels
+        r_idx = base + (3 if mode_channels == 9 else 6)
+        dmx_sender.update_channel(r_idx, r)
+        dmx_sender.update_channel(r_idx + 1, g)
+        dmx_sender.update_channel(r_idx + 2, b)
+
+
+def bench(heads, ticks, mode_channels=14):
+    out = NullOutput(num_channels=heads * mode_channels)
+    layout = HeadLayout(1, heads, mode_channels)
+    phase = np.arange(heads) / heads
+    row = {}
+    for name, factory in EFFECTS.items():
+        effect = factory()
+        start = time.perf_counter()
+        for i in range(ticks):
+            render_into(out, effect, layout, i * 0.023, phase)
+        row[name] = (time.perf_counter() - start) / ticks * 1e6
+    start = time.perf_counter()
+    for i in range(ticks):
+        legacy_rainbow_tick(out, 1, heads, mode_channels, (i * 0.01) % 1.0)
+    row['legacy Rainbow'] = (time.perf_counter() - start) / ticks * 1e6
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--heads', type=int, nargs='+', default=[2, 8, 32, 128, 512])
+    parser.add_argument('--ticks', type=int, default=300)
+    args = parser.parse_args()
+
+    columns = list(EFFECTS) + ['legacy Rainbow']
+    print(f"{'heads':>6} " + ' '.join(f"{c:>15}" for c in columns) + "   (us/tick)")
+    for heads in args.heads:
+        row = bench(heads, args.ticks)
+        print(f"{heads:>6} " + ' '.join(f"{row[c]:>15.1f}" for c in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Coste de loguear en un camino caliente: FileHandler síncrono frente a logpipe.
+
+Simula un arrastre de slider (un logging.info por movimiento, `--rate`
+movimientos por segundo sobre `--channels` canales) durante `--seconds` y mide
+lo que tarda cada llamada en el hilo que loguea, y las líneas que acaban en el
+fichero. "síncrono" es la configuración anterior de main.py (basicConfig a
+fichero, nivel DEBUG, una escritura por llamada); "logpipe" es
+backend/logpipe.py (cola + hilo escritor + límite por canal).
+
+Un `--stall` mayor que 0 añade esa pausa a cada escritura en disco (tarjeta
+SD lenta): con el handler síncrono la paga quien loguea.
+
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --rate 500 --stall 0.002
+"""
+
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+import numpy as np
+
+from backend import logpipe
+
+
+class _SlowFile(logging.FileHandler):
+    """FileHandler con una pausa por escritura (disco lento)."""
+
+    stall = 0.0
+
+    def emit(self, record):
+        if self.stall:
+            time.sleep(self.stall)
+        super().emit(record)
+
+
+def drag(rate, channels, seconds):
+    """Llamadas de log de un arrastre de slider; devuelve la duración de cada una (s)."""
+    times = []
+    n = int(rate * seconds)
+    next_time = time.perf_counter()
+    for i in range(n):
+        ch = i % channels
+        start = time.perf_counter()
+        logging.info(f"DMX channel {ch + 1} set to {i % 256}", extra={'log_key': ch})
+        times.append(time.perf_counter() - start)
+        next_time += 1.0 / rate
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    return np.array(times)
+
+
+def slow_file(path, stall):
+    handler = _SlowFile(path)
+    handler.stall = stall
+    handler.setFormatter(logging.Formatter(logpipe.FORMAT))
+    return handler
+
+
+def run_sync(path, args):
+    root = logging.getLogger()
+    handler = slow_file(path, args.stall)
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    times = drag(args.rate, args.channels, args.seconds)
+    root.removeHandler(handler)
+    handler.close()
+    return times
+
+
+def run_pipe(path, args):
+    logpipe.setup_logging(os.devnull)
+    # Mismo fichero lento que el síncrono, pero escrito desde el hilo de logpipe
+    handlers = logpipe._writer.handlers
+    handlers[0].close()
+    handlers[0] = slow_file(path, args.stall)
+    times = drag(args.rate, args.channels, args.seconds)
+    logpipe.shutdown_logging()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rate', type=float, default=200.0, help="movimientos de slider por segundo")
+    parser.add_argument('--channels', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--stall', type=float, default=0.0, help="pausa por escritura en disco (s)")
+    args = parser.parse_args()
+
+    print(f"{args.rate:.0f} llamadas/s sobre {args.channels} canales durante {args.seconds:.0f} s, "
+          f"pausa de disco {args.stall * 1e3:.1f} ms")
+    print(f"{'handler':>9} {'llamadas':>8} {'p50 us':>8} {'p99 us':>8} {'máx us':>8} {'líneas':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, run in (('síncrono', run_sync), ('logpipe', run_pipe)):
+            path = os.path.join(tmp, f'{name}.log')
+            times = run(path, args)
+            with open(path, encoding='utf-8') as f:
+                lines = sum(1 for _ in f)
+            p50, p99 = np.percentile(times, [50, 99]) * 1e6
+            print(f"{name:>9} {len(times):>8} {p50:>8.1f} {p99:>8.1f} {times.max() * 1e6:>8.1f} {lines:>7}")
+
+
+if __name__ == '__main__':
+    main()
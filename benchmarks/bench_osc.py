@@ -0,0 +1,171 @@
+"""
+Cliente OSC local: rendimiento y latencia de aplicación de un universo completo por OSC.
+
+Se arranca el servidor OSC en 127.0.0.1 sobre una salida sin transporte que
+envía tramas a su ritmo (como DMXSender) con el reloj de tramas enganchado, y
+el cliente envía `--fps` universos completos por segundo de cuatro formas:
+
+- channel:  512 datagramas /dmx/channel (lo que hace hoy una superficie OSC)
+- bundle:   un bundle con los 512 /dmx/channel (una transacción de trama)
+- range:    un /dmx/range 1 v1..v512
+- universe: un /dmx/universe con un blob de 512 bytes
+
+Los últimos 4 canales de cada universo llevan su número: la latencia va del
+envío del primer datagrama a la primera trama DMX publicada que lo contiene
+entero. "despacho" es el tiempo de decodificar y ejecutar los handlers de un
+datagrama, y "jitter" el p99 de |periodo - media| de las tramas DMX durante
+la carga. Se comparan el servidor asyncio de backend/osc.py y el anterior
+(ThreadingOSCUDPServer de python-osc, un hilo por datagrama, escritura
+directa). Los datagramas se construyen antes de medir.
+
+    python -m benchmarks.bench_osc
+    python -m benchmarks.bench_osc --fps 44 --seconds 5 --modes bundle universe
+"""
+
+import time
+import socket
+import logging
+import argparse
+import threading
+
+import numpy as np
+from pythonosc.osc_server import ThreadingOSCUDPServer
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_bundle_builder import OscBundleBuilder, IMMEDIATELY
+
+from backend.dmx import NullOutput, FrameStats
+from backend.scheduler import FrameScheduler
+from backend.osc import OSCServer
+
+CHANNELS = 512
+
+
+class _StampedOutput(NullOutput):
+    """NullOutput que anota cuándo sale en una trama cada número de universo."""
+
+    def __init__(self):
+        super().__init__()
+        self.published = {}
+        self.add_frame_hook(self._stamp)
+
+    def _stamp(self, frame):
+        stamp = int.from_bytes(bytes(frame[-4:]), 'big')
+        if stamp not in self.published:
+            self.published[stamp] = time.perf_counter()
+
+
+class _ThreadingServer(OSCServer):
+    """Servidor anterior: ThreadingOSCUDPServer (un hilo por datagrama) escribiendo directamente."""
+
+    def start(self, dmx_sender, **kwargs):
+        self.outputs = {1: dmx_sender}
+        self.dmx_sender = dmx_sender
+        self._udp = ThreadingOSCUDPServer((self.ip, self.port), self)
+        self._udp.max_packet_size = 65535
+        self.address = self._udp.server_address
+        threading.Thread(target=self._udp.serve_forever, daemon=True).start()
+
+    def call_handlers_for_packet(self, data, client_address):
+        self.handle_packet(data, client_address)
+        return []
+
+    def stop(self):
+        self._udp.shutdown()
+        self._udp.server_close()
+
+
+def message(address, *args):
+    builder = OscMessageBuilder(address)
+    for arg in args:
+        builder.add_arg(arg)
+    return builder.build()
+
+
+def datagrams(mode, values):
+    """Datagramas de un universo en el modo dado."""
+    if mode == 'channel':
+        return [message('/dmx/channel', ch + 1, int(v)).dgram for ch, v in enumerate(values)]
+    if mode == 'bundle':
+        bundle = OscBundleBuilder(IMMEDIATELY)
+        for ch, v in enumerate(values):
+            bundle.add_content(message('/dmx/channel', ch + 1, int(v)))
+        return [bundle.build().dgram]
+    if mode == 'range':
+        return [message('/dmx/range', 1, *(int(v) for v in values)).dgram]
+    return [message('/dmx/universe', bytes(values)).dgram]
+
+
+def run(server_class, mode, fps, seconds, interval):
+    out = _StampedOutput()
+    out.stats = FrameStats(window=int(seconds / interval) + 64)
+    scheduler = FrameScheduler(interval)
+    scheduler.attach(out)
+    server = server_class('127.0.0.1', 0, scheduler)
+    server.start(out)
+    out.start(interval)
+    frames = []
+    rng = np.random.default_rng(1)
+    for stamp in range(1, int(fps * seconds) + 1):
+        values = rng.integers(0, 256, CHANNELS, dtype=np.uint8)
+        values[-4:] = np.frombuffer(stamp.to_bytes(4, 'big'), dtype=np.uint8)
+        frames.append((stamp, datagrams(mode, values)))
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sent = {}
+    start = time.perf_counter()
+    next_time = start
+    for stamp, grams in frames:
+        sent[stamp] = time.perf_counter()
+        for gram in grams:
+            sock.sendto(gram, server.address)
+        next_time += 1.0 / fps
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed = time.perf_counter() - start
+    time.sleep(0.5)
+    server.stop()
+    out.stop()
+    scheduler.detach()
+    sock.close()
+    latencies = np.array([out.published[s] - t for s, t in sent.items() if s in out.published])
+    return {
+        'offered': sum(len(g) for _, g in frames) / elapsed,
+        'handled': server.packets / elapsed,
+        'applied': len(latencies),
+        'frames': len(frames),
+        'latencies': latencies,
+        'dispatch': np.array(server.dispatch_times),
+        'jitter': out.stats.jitter()[1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--interval', type=float, default=0.023, help="periodo de trama DMX (s)")
+    parser.add_argument('--modes', nargs='+', default=['channel', 'bundle', 'range', 'universe'])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    servers = {'threading': _ThreadingServer, 'asyncio': OSCServer}
+
+    print(f"{args.fps:.0f} universos/s de {CHANNELS} canales durante {args.seconds:.0f} s, "
+          f"tramas DMX cada {args.interval * 1e3:.0f} ms")
+    print(f"{'servidor':>9} {'modo':>9} {'enviados/s':>10} {'atendidos/s':>11} {'universos':>11} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'despacho p99 us':>15} {'jitter ms':>9}")
+    for mode in args.modes:
+        for name, server_class in servers.items():
+            r = run(server_class, mode, args.fps, args.seconds, args.interval)
+            lat = r['latencies']
+            p50, p99 = np.percentile(lat, [50, 99]) * 1e3 if len(lat) else (float('nan'),) * 2
+            dispatch = np.percentile(r['dispatch'], 99) * 1e6 if len(r['dispatch']) else float('nan')
+            print(f"{name:>9} {mode:>9} {r['offered']:>10.0f} {r['handled']:>11.0f} "
+                  f"{r['applied']:>5}/{r['frames']:<5} {p50:>7.2f} {p99:>7.2f} {dispatch:>15.1f} "
+                  f"{r['jitter'] * 1e3:>9.2f}")
+            # Que terminen los hilos por datagrama antes del siguiente caso
+            while threading.active_count() > 1:
+                time.sleep(0.05)
+
+
+if __name__ == '__main__':
+    main()
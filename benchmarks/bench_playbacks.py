@@ -0,0 +1,78 @@
+"""
+Latencia GO -> trama con 1..N playbacks activas en el mismo reloj de tramas.
+
+Una salida sin transporte envía tramas en su hilo (como DMXSender); otro hilo
+pulsa GO en playbacks al azar y se mide el tiempo hasta el tick que lo aplica,
+que es el que publica la trama siguiente.
+
+    python -m benchmarks.bench_playbacks
+    python -m benchmarks.bench_playbacks --playbacks 1 8 32 64 --seconds 5
+"""
+
+import time
+import random
+import logging
+import argparse
+
+from backend.dmx import NullOutput
+from backend.scheduler import FrameScheduler
+from backend.compositor import Compositor
+from backend.playbacks import PlaybackManager
+
+
+def cue_list(n, rng):
+    cues = []
+    for i in range(n):
+        cue = {"fade": rng.choice([0.0, 0.5, 2.0])}
+        if i % 4 == 3:
+            cue["effect"] = rng.choice(["ColorChase", "Rainbow", "Strobe"])
+        else:
+            cue["dmx"] = {str(rng.randint(1, 512)): rng.randint(0, 255) for _ in range(16)}
+        cues.append(cue)
+    return cues
+
+
+def run(count, seconds, interval, rng):
+    out = NullOutput()
+    scheduler = FrameScheduler(interval)
+    scheduler.attach(out)
+    compositor = Compositor(out, scheduler)
+    compositor.start()
+    manager = PlaybackManager(compositor, scheduler)
+    playbacks = [manager.add_playback(f'P{i}', cue_list(50, rng), 1 + (i % 8) * 56, 4, 14) for i in range(count)]
+    out.start(interval)
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        rng.choice(playbacks).go(rng.randrange(50))
+        time.sleep(rng.uniform(0.0, 2 * interval))
+    time.sleep(2 * interval)
+    out.stop()
+    scheduler.detach()
+    latencies = sorted(l for pb in playbacks for l in pb.go_latencies)
+    return latencies, manager.stats.snapshot(), out.stats.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--playbacks', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--interval', type=float, default=0.023)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    rng = random.Random(1)
+
+    print(f"periodo de trama {args.interval * 1e3:.1f} ms")
+    print(f"{'playbacks':>9} {'GOs':>5} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'render us':>10} {'fps':>6}")
+    for count in args.playbacks:
+        latencies, render, frames = run(count, args.seconds, args.interval, rng)
+        if not latencies:
+            continue
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        render_us = render['load'] * render['period_ms'] * 1e3
+        print(f"{count:>9} {len(latencies):>5} {p50 * 1e3:>8.2f} {p99 * 1e3:>8.2f} {latencies[-1] * 1e3:>8.2f} "
+              f"{render_us:>10.1f} {frames['fps']:>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+API remota local: ancho de banda del stream de tramas y latencia HTTP.
+
+Se arranca backend/remote.py en 127.0.0.1 sobre una salida sin transporte que
+publica tramas cada `--interval` y en la que un productor escribe, en cada
+trama, una de estas cargas:
+
+- idle:   nada cambia
+- chase:  un paso de color sobre `--heads` cabezas de 14 canales cada 0.5 s
+- rainbow: arcoíris continuo sobre las mismas cabezas (cambian cada trama)
+- noise:  los 512 canales aleatorios en cada trama (peor caso)
+
+Un cliente WebSocket mínimo (en el mismo proceso, su propio bucle) reconstruye
+las tramas con remote.decode y, al final, comprueba que su copia coincide con
+la última trama emitida. Se compara con mandar el universo entero en crudo a
+la misma cadencia (512 B por mensaje). Después se mide la latencia de
+peticiones HTTP (GET /api/status, POST /api/channels) con conexiones nuevas.
+
+    python -m benchmarks.bench_remote
+    python -m benchmarks.bench_remote --fps 30 --seconds 5 --loads chase noise
+"""
+
+import os
+import json
+import time
+import base64
+import asyncio
+import logging
+import argparse
+import threading
+
+import numpy as np
+
+from backend.dmx import NullOutput
+from backend.effects import hsv_to_rgb
+from backend.remote import RemoteAPI, decode, ws_read, ws_frame, HEADER, KEY
+
+CHANNELS = 512
+
+
+class _Producer(threading.Thread):
+    """Escribe la carga en la salida al ritmo de las tramas."""
+
+    def __init__(self, out, load, heads, interval):
+        super().__init__(daemon=True)
+        self.out, self.load, self.heads, self.interval = out, load, heads, interval
+        self.running = True
+        self.rng = np.random.default_rng(1)
+
+    def run(self):
+        start = time.monotonic()
+        while self.running:
+            t = time.monotonic() - start
+            if self.load == 'noise':
+                self.out.update_channels(0, self.rng.integers(0, 256, CHANNELS, dtype=np.uint8))
+            elif self.load != 'idle':
+                frame = np.zeros(self.heads * 14, dtype=np.uint8)
+                for head in range(self.heads):
+                    if self.load == 'chase':
+                        rgb = ((255, 0, 0), (0, 255, 0), (0, 0, 255))[(int(t / 0.5) + head) % 3]
+                    else:
+                        rgb = np.rint(hsv_to_rgb((t * 0.1 + head / self.heads) % 1.0, 1.0, 1.0) * 255)
+                    frame[head * 14:head * 14 + 4] = (255, *rgb)
+                self.out.update_channels(0, frame)
+            time.sleep(self.interval)
+
+
+async def ws_client(port, fps, seconds):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(f"GET /ws?fps={fps} HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+                 f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+    await reader.readuntil(b'\r\n\r\n')
+    frame = np.zeros(CHANNELS, dtype=np.uint8)
+    stats = {'messages': 0, 'keys': 0, 'bytes': 0}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            opcode, payload = await asyncio.wait_for(ws_read(reader), deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            break
+        if opcode != 2:
+            continue
+        decode(payload, frame)
+        stats['messages'] += 1
+        stats['keys'] += HEADER.unpack_from(payload)[0] == KEY
+        stats['bytes'] += len(payload) + 2
+    writer.write(ws_frame(b'\x03\xe8', opcode=8, mask=os.urandom(4)))
+    writer.close()
+    return frame, stats
+
+
+async def http_request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = json.dumps(body).encode() if body is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def run_stream(load, args):
+    out = NullOutput()
+    api = RemoteAPI('127.0.0.1', 0, max_rate=args.fps)
+    api.start(out)
+    out.start(args.interval)
+    producer = _Producer(out, load, args.heads, args.interval)
+    producer.start()
+    time.sleep(0.2)
+    # El productor para antes que el cliente: su copia debe acabar igual que la última trama
+    stopper = threading.Timer(args.seconds - 0.3, lambda: setattr(producer, 'running', False))
+    stopper.start()
+    frame, stats = asyncio.run(ws_client(api.address[1], args.fps, args.seconds))
+    producer.join()
+    expected = api.current_frame()
+    api.stop()
+    out.stop()
+    return stats, np.count_nonzero(frame != expected)
+
+
+def run_http(args):
+    out = NullOutput()
+    api = RemoteAPI('127.0.0.1', 0)
+    api.start(out)
+    port = api.address[1]
+    results = {}
+
+    async def measure():
+        for name, method, path, body in (('GET status', 'GET', '/api/status', None),
+                                         ('POST channels', 'POST', '/api/channels',
+                                          {'start': 1, 'values': list(range(64))})):
+            times = []
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                response = await http_request(port, method, path, body)
+                times.append(time.perf_counter() - start)
+                assert response.startswith(b'HTTP/1.1 200'), response[:64]
+            results[name] = np.array(times)
+
+    asyncio.run(measure())
+    api.stop()
+    assert bytes(out.dmx_data[:64]) == bytes(range(64))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--fps', type=float, default=30.0, help="cadencia del stream")
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--interval', type=float, default=0.023, help="periodo de trama DMX (s)")
+    parser.add_argument('--heads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--loads', nargs='+', default=['idle', 'chase', 'rainbow', 'noise'])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    raw = (CHANNELS + 4) * args.fps
+    print(f"stream a {args.fps:.0f} tramas/s durante {args.seconds:.0f} s, "
+          f"{args.heads} cabezas; crudo = {raw / 1e3:.1f} kB/s")
+    print(f"{'carga':>8} {'mensajes':>8} {'clave':>5} {'B/mensaje':>9} {'kB/s':>7} {'vs crudo':>8} {'difieren':>8}")
+    for load in args.loads:
+        stats, mismatches = run_stream(load, args)
+        rate = stats['bytes'] / args.seconds
+        per = stats['bytes'] / max(1, stats['messages'])
+        print(f"{load:>8} {stats['messages']:>8} {stats['keys']:>5} {per:>9.1f} {rate / 1e3:>7.2f} "
+              f"{rate / raw * 100:>7.1f}% {mismatches:>8}")
+
+    print(f"\nHTTP, {args.requests} peticiones con conexión nueva")
+    print(f"{'petición':>14} {'p50 ms':>7} {'p99 ms':>7}")
+    for name, times in run_http(args).items():
+        p50, p99 = np.percentile(times, [50, 99]) * 1e3
+        print(f"{name:>14} {p50:>7.2f} {p99:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
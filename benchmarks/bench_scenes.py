@@ -0,0 +1,63 @@
+"""
+Latencia de recuperación de escenas: JSON (scenes.load_scene) frente a la biblioteca binaria (mmap).
+
+    python -m benchmarks.bench_scenes
+    python -m benchmarks.bench_scenes --recalls 5000 1 2 3 ROJO azul c
+"""
+
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+from backend.dmx import DMXOutput
+from backend import scenes
+from backend.scenelib import SceneLibrary, import_json_scenes
+
+DEFAULT_SCENES = ['1', '2', '3', 'ROJO', 'azul', 'c', 'presets/empty.json']
+
+
+def per_call(fn, names, recalls):
+    start = time.perf_counter()
+    for i in range(recalls):
+        fn(names[i % len(names)])
+    return (time.perf_counter() - start) / recalls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('scenes', nargs='*', default=DEFAULT_SCENES)
+    parser.add_argument('--recalls', type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    paths = [p for p in args.scenes if os.path.exists(p)]
+    # La carga JSON sólo admite listas; el resto (p.ej. presets/empty.json) sólo entra en la biblioteca
+    json_paths = [p for p in paths if isinstance(scenes.load_scene(p), list)]
+    out = DMXOutput()
+
+    def json_update_channel(path):
+        for addr, value in enumerate(scenes.load_scene(path)):
+            out.update_channel(addr, value)
+
+    def json_update_channels(path):
+        out.update_channels(0, scenes.load_scene(path))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library = SceneLibrary(os.path.join(tmp, 'scenes.dmxs'))
+        names = import_json_scenes(library, paths)
+        rows = [
+            ('load_scene + 512 update_channel', per_call(json_update_channel, json_paths, args.recalls)),
+            ('load_scene + update_channels', per_call(json_update_channels, json_paths, args.recalls)),
+            ('SceneLibrary.recall (mmap)', per_call(lambda n: library.recall(n, out), names, args.recalls)),
+        ]
+        library.close()
+
+    print(f"{len(paths)} escenas, {args.recalls} recuperaciones")
+    for label, us in rows:
+        print(f"{label:>34}: {us:8.1f} us/escena")
+
+
+if __name__ == '__main__':
+    main()
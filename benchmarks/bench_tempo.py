@@ -0,0 +1,143 @@
+"""
+Error de fase de los efectos sincronizados al beat: tap tempo y beat de audio.
+
+Con un reloj de tramas virtual (periodo + jitter) se ejecuta ColorChase
+sincronizado (un paso por beat) y se mide, en cada cambio de paso, el retraso
+de la trama respecto al beat real:
+
+- reloj: tempo y fase exactos (set_bpm + sync); solo mide la cuantización a
+  tramas del motor de efectos
+- tap: N taps con error humano (gaussiano) sobre un tempo conocido; después
+  el reloj corre solo, así que el error incluye la estimación del tap
+- audio: la fuente sintética se analiza en tiempo virtual y sus vectores se
+  entregan al reloj de beats en cada trama (BPM + onsets, como follow_audio);
+  se mide tras `--warmup` segundos
+
+"en trama" es la fracción de pasos que caen en la primera trama tras el beat
+(0 <= retraso < periodo de trama).
+
+    python -m benchmarks.bench_tempo
+    python -m benchmarks.bench_tempo --bpm 100 128 140 --tap-jitter 0.02
+"""
+
+import random
+import logging
+import argparse
+
+import numpy as np
+
+from backend.dmx import DMXOutput
+from backend.scheduler import FrameScheduler
+from backend.effects import EffectManager
+from backend.tempo import BeatClock
+from backend.analyzer import AudioAnalyzer, SyntheticSource
+
+
+def run_frames(clock, seconds, interval, jitter, rng, t0=1000.0, before_tick=None):
+    """Ejecutar ColorChase sincronizado y devolver los instantes de cada cambio de paso."""
+    out = DMXOutput()
+    scheduler = FrameScheduler(interval)
+    scheduler.output = out
+    clock.scheduler = scheduler
+    manager = EffectManager(scheduler, clock)
+    manager.run_effect('ColorChase', out, 1, 1, 14)
+    changes = []
+    last = None
+    for k in range(int(seconds / interval)):
+        now = t0 + k * interval + rng.uniform(0.0, jitter)
+        if before_tick is not None:
+            before_tick(now)
+        scheduler.tick(now)
+        frame = bytes(out.dmx_data[:14])
+        if last is not None and frame != last:
+            changes.append(now)
+        last = frame
+    return np.array(changes)
+
+
+def lags(changes, beats):
+    """Retraso de cada cambio de paso respecto al beat real más cercano anterior o posterior."""
+    index = np.clip(np.searchsorted(beats, changes), 1, len(beats) - 1)
+    before, after = beats[index - 1], beats[index]
+    nearest = np.where(changes - before <= after - changes, before, after)
+    return changes - nearest
+
+
+def report(name, bpm, est_bpm, lag, interval):
+    inside = np.mean((lag >= 0) & (lag < interval)) * 100
+    print(f"{name:>6} {bpm:>7.1f} {est_bpm:>8.2f} {len(lag):>6} {np.mean(lag) * 1e3:>8.2f} "
+          f"{np.percentile(np.abs(lag), 99) * 1e3:>8.2f} {np.max(np.abs(lag)) * 1e3:>8.2f} {inside:>7.1f}%")
+
+
+def bench_clock(bpm, args, rng):
+    t0 = 1000.0
+    period = 60.0 / bpm
+    clock = BeatClock()
+    clock.set_bpm(bpm, t0)
+    clock.sync(t0)
+    changes = run_frames(clock, args.seconds, args.interval, args.jitter, rng, t0)
+    beats = t0 + period * np.arange(-1, int(args.seconds / period) + 2)
+    report('reloj', bpm, clock.bpm, lags(changes, beats), args.interval)
+
+
+def bench_tap(bpm, args, rng):
+    t0 = 1000.0
+    period = 60.0 / bpm
+    clock = BeatClock()
+    taps = t0 - period * np.arange(args.taps)[::-1]
+    for tap in taps:
+        clock.tap(tap + rng.gauss(0.0, args.tap_jitter))
+    changes = run_frames(clock, args.seconds, args.interval, args.jitter, rng, t0)
+    beats = t0 + period * np.arange(-1, int(args.seconds / period) + 2)
+    report('tap', bpm, clock.bpm, lags(changes, beats), args.interval)
+
+
+def bench_audio(bpm, args, rng):
+    t0 = 1000.0
+    clock = BeatClock()
+    source = SyntheticSource(bpm=bpm)
+    analyzer = AudioAnalyzer(rate=source.rate, hop=256)
+    hop_time = analyzer.hop_time
+    fed = [0.0]
+
+    def feed(now):
+        rows = []
+        while t0 + fed[0] + hop_time <= now:
+            rows.extend(analyzer.process(source.read(analyzer.hop)))
+            fed[0] += hop_time
+        if rows:
+            clock.apply_features(np.array(rows), now, hop_time)
+
+    changes = run_frames(clock, args.warmup + args.seconds, args.interval, args.jitter, rng, t0, feed)
+    beats = t0 + np.array(source.beat_times)
+    changes = changes[changes >= t0 + args.warmup]
+    report('audio', bpm, clock.bpm, lags(changes, beats), args.interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bpm', type=float, nargs='+', default=[90.0, 120.0, 128.0, 150.0])
+    parser.add_argument('--seconds', type=float, default=30.0)
+    parser.add_argument('--warmup', type=float, default=8.0)
+    parser.add_argument('--interval', type=float, default=0.023)
+    parser.add_argument('--jitter', type=float, default=0.002, help="jitter máximo del reloj de tramas (s)")
+    parser.add_argument('--taps', type=int, default=8)
+    parser.add_argument('--tap-jitter', type=float, default=0.01, help="desviación de cada tap (s)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+
+    print(f"periodo de trama {args.interval * 1e3:.1f} ms, {args.seconds:.0f} s por caso")
+    print(f"{'fuente':>6} {'BPM':>7} {'BPM est.':>8} {'pasos':>6} {'media ms':>8} {'p99 ms':>8} "
+          f"{'máx ms':>8} {'en trama':>8}")
+    for bpm in args.bpm:
+        bench_clock(bpm, args, rng)
+    for bpm in args.bpm:
+        bench_tap(bpm, args, rng)
+    for bpm in args.bpm:
+        bench_audio(bpm, args, rng)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Deriva de las secuencias en shows largos: Timeline en el reloj de tramas frente a sleep por paso.
+
+Se simulan horas de tramas con un reloj virtual (periodo + jitter) sobre una
+secuencia en bucle y se mide, en cada cambio de paso, el error respecto al
+instante ideal. El método original (time.sleep(duration) por paso) se estima
+sumando en cada paso el retraso real medido de time.sleep en esta máquina.
+
+    python -m benchmarks.bench_timeline
+    python -m benchmarks.bench_timeline --hours 8 --steps 50 --jitter 0.003
+"""
+
+import time
+import random
+import logging
+import argparse
+
+from backend.dmx import DMXOutput
+from backend.scheduler import FrameScheduler
+from backend.sequences import SequenceManager
+
+
+def sleep_overshoot(samples=200, duration=0.01):
+    """Retraso medio real de time.sleep(duration) más el trabajo de un paso (s)."""
+    total = 0.0
+    for _ in range(samples):
+        start = time.perf_counter()
+        time.sleep(duration)
+        total += time.perf_counter() - start - duration
+    return total / samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--hours', type=float, default=4.0)
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.023)
+    parser.add_argument('--jitter', type=float, default=0.002, help="jitter máximo del reloj de tramas (s)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+
+    sequence = []
+    for i in range(args.steps):
+        step = {"duration": round(rng.uniform(0.5, 5.0), 3)}
+        if i % 3 == 0:
+            step["effect"] = rng.choice(["ColorChase", "Strobe", "Rainbow"])
+        else:
+            step["dmx"] = {str(rng.randint(1, 28)): rng.randint(0, 255)}
+        sequence.append(step)
+
+    out = DMXOutput()
+    scheduler = FrameScheduler(args.interval)
+    scheduler.output = out
+    manager = SequenceManager(scheduler)
+    manager.run_sequence(out, 1, 2, 14, sequence, loop=True)
+    timeline = manager.timeline
+
+    t0 = 1000.0
+    frames = int(args.hours * 3600 / args.interval)
+    report_every = int(3600 / args.interval)
+    index, laps = -1, 0
+    worst = 0.0
+    transitions = 0
+    rows = []
+    start = time.perf_counter()
+    for k in range(frames):
+        now = t0 + k * args.interval + rng.uniform(0.0, args.jitter)
+        scheduler.tick(now)
+        new_index = manager._state['index']
+        if new_index != index:
+            if new_index < index:
+                laps += 1
+            index = new_index
+            ideal = t0 + laps * timeline.duration + timeline.starts[index]
+            worst = max(worst, now - ideal)
+            transitions += 1
+        if (k + 1) % report_every == 0:
+            rows.append(((k + 1) * args.interval / 3600, worst, transitions))
+    elapsed = time.perf_counter() - start
+
+    overshoot = sleep_overshoot()
+    print(f"{args.steps} pasos, {timeline.duration:.1f} s por vuelta, {frames} tramas simuladas "
+          f"({elapsed / frames * 1e6:.1f} us/trama)")
+    print(f"time.sleep: retraso medido {overshoot * 1e3:.3f} ms por paso")
+    print(f"{'horas':>6} {'cambios':>9} {'error máx. Timeline':>20} {'deriva sleep/paso':>19}")
+    for hours, worst, count in rows:
+        print(f"{hours:>6.1f} {count:>9} {worst * 1e3:>17.2f} ms {count * overshoot:>17.2f} s")
+
+
+if __name__ == '__main__':
+    main()
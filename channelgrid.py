@@ -0,0 +1,228 @@
+"""
+Manual tab channel grid (PyQt5): a virtualized model/view over whole universes.
+
+ChannelGridModel exposes backend.channelview.ChannelView as a table of
+COLUMNS channels per row (32 rows per 512-channel universe). QTableView only
+asks for the cells on screen, so the widget cost does not grow with the number
+of channels, fixtures or universes, and nothing is rebuilt when the mode or
+the number of heads changes.
+
+ChannelGrid refreshes at most `fps` times per second while visible: one
+snapshot of the buffers (ChannelView.refresh) and one dataChanged per block
+of changed rows that is on screen. The fader writes the selected channels
+through ChannelView.set_flat: however fast it is dragged, the outputs get at
+most one write per frame. Double-click edits a single cell the same way.
+
+Usage:
+    grid = ChannelGrid(ChannelView(monitors, targets), patch)
+    grid.view.start()
+    grid.show_channels(1, start_address - 1, count)
+"""
+
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QItemSelection, QItemSelectionModel, QTimer, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor, QFont
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSlider, QTableView, QHeaderView, QAbstractItemView
+)
+
+# Canales por fila de la rejilla
+COLUMNS = 16
+# Refrescos por segundo como máximo (la pestaña oculta no refresca)
+REFRESH_FPS = 20
+
+
+class ChannelGridModel(QAbstractTableModel):
+    """Modelo de tabla sobre ChannelView: celda (fila, columna) = canal fila * COLUMNS + columna."""
+
+    def __init__(self, view, patch=None, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.patch = patch
+        # Fondos por valor (gris 0..255) y texto legible sobre cada uno, creados una vez
+        self._backgrounds = [QBrush(QColor(v, v, v)) for v in range(256)]
+        self._foregrounds = [QBrush(QColor(Qt.white if v < 128 else Qt.black)) for v in range(256)]
+        self._patched_font = QFont()
+        self._patched_font.setBold(True)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.view) // COLUMNS
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else COLUMNS
+
+    def flat(self, index):
+        return index.row() * COLUMNS + index.column()
+
+    def fixture_at(self, flat):
+        """(fijación, atributo) del canal, o (None, None) si no está parcheado."""
+        if self.patch is None:
+            return None, None
+        universe, channel = self.view.locate(flat)
+        fixture = self.patch.fixture_at(universe, channel + 1)
+        if fixture is None:
+            return None, None
+        offset = channel - fixture.start
+        for attribute, attr_offset in fixture.mode.attributes.items():
+            if attr_offset == offset:
+                return fixture, attribute
+        return fixture, f"ch{offset + 1}"
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        flat = self.flat(index)
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return int(self.view.values.flat[flat])
+        if role == Qt.BackgroundRole:
+            return self._backgrounds[self.view.values.flat[flat]]
+        if role == Qt.ForegroundRole:
+            return self._foregrounds[self.view.values.flat[flat]]
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.FontRole:
+            return self._patched_font if self.fixture_at(flat)[0] is not None else None
+        if role == Qt.ToolTipRole:
+            universe, channel = self.view.locate(flat)
+            fixture, attribute = self.fixture_at(flat)
+            owner = f" - {fixture.id} {attribute}" if fixture is not None else ""
+            return f"U{universe} {channel + 1:03d}{owner}"
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return f"+{section}"
+        universe, channel = self.view.locate(section * COLUMNS)
+        return f"U{universe} {channel + 1:03d}"
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        try:
+            value = max(0, min(255, int(value)))
+        except (TypeError, ValueError):
+            return False
+        self.view.set_flat([self.flat(index)], value)
+        # La celda se actualiza en el próximo refresco, con el valor que realmente salió
+        return True
+
+    def refresh(self, first_row, last_row):
+        """Instantánea y repintado de las celdas cambiadas entre las filas visibles. Devuelve los cambios."""
+        changed = self.view.refresh()
+        rows = changed // COLUMNS
+        visible = (rows >= first_row) & (rows <= last_row)
+        if visible.any():
+            rows, columns = rows[visible], changed[visible] % COLUMNS
+            # Un dataChanged por bloque de filas contiguas, acotado a sus columnas cambiadas
+            breaks = np.flatnonzero(np.diff(rows) > 1) + 1
+            for block_rows, block_columns in zip(np.split(rows, breaks), np.split(columns, breaks)):
+                self.dataChanged.emit(self.index(int(block_rows[0]), int(block_columns.min())),
+                                      self.index(int(block_rows[-1]), int(block_columns.max())),
+                                      [Qt.DisplayRole, Qt.BackgroundRole, Qt.ForegroundRole])
+        return len(changed)
+
+    def patch_changed(self):
+        """Repintar negritas y tooltips tras cambiar el patch (solo se pintan las visibles)."""
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, COLUMNS - 1),
+                                  [Qt.FontRole, Qt.ToolTipRole])
+
+    def set_outputs(self, monitors, targets=None):
+        self.beginResetModel()
+        self.view.set_outputs(monitors, targets)
+        self.endResetModel()
+
+
+class ChannelGrid(QWidget):
+    """Rejilla de canales virtualizada y fader para los canales seleccionados."""
+
+    # (índices planos, valor) tras cada movimiento del fader
+    channels_set = pyqtSignal(object, int)
+
+    def __init__(self, view, patch=None, fps=REFRESH_FPS, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.model = ChannelGridModel(view, patch, self)
+        self.selection = np.zeros(0, dtype=np.intp)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.table.setWordWrap(False)
+        # Tamaños fijos: la vista no pregunta el tamaño de cada fila/columna
+        for header, size in ((self.table.horizontalHeader(), 34), (self.table.verticalHeader(), 20)):
+            header.setSectionResizeMode(QHeaderView.Fixed)
+            header.setDefaultSectionSize(size)
+        self.table.selectionModel().selectionChanged.connect(self._selection_changed)
+
+        self.fader = QSlider(Qt.Horizontal)
+        self.fader.setRange(0, 255)
+        self.fader.valueChanged.connect(self.set_selected)
+        self.fader_label = QLabel("0 canales")
+
+        h_fader = QHBoxLayout()
+        h_fader.addWidget(QLabel("Fader:"))
+        h_fader.addWidget(self.fader)
+        h_fader.addWidget(self.fader_label)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.table)
+        layout.addLayout(h_fader)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(int(1000 / fps))
+
+    def visible_rows(self):
+        first = self.table.rowAt(0)
+        if first < 0:
+            return 0, -1
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        return first, last if last >= 0 else self.model.rowCount() - 1
+
+    def refresh(self):
+        # Pestaña oculta: ni instantánea ni repintado (al mostrarse se pinta entera)
+        if self.isVisible():
+            self.model.refresh(*self.visible_rows())
+
+    def _selection_changed(self, *_):
+        indexes = self.table.selectionModel().selectedIndexes()
+        self.selection = np.array(sorted(self.model.flat(i) for i in indexes), dtype=np.intp)
+        self.fader_label.setText(f"{len(self.selection)} canales")
+        if len(self.selection):
+            # El fader parte del valor del primer canal seleccionado
+            self.fader.blockSignals(True)
+            self.fader.setValue(int(self.view.values.flat[self.selection[0]]))
+            self.fader.blockSignals(False)
+
+    def set_selected(self, value):
+        if not len(self.selection):
+            return
+        self.view.set_flat(self.selection, value)
+        self.channels_set.emit(self.selection, int(value))
+
+    def show_channels(self, universe, start, count, select=False):
+        """Desplazar la vista hasta los canales [start, start + count) del universo (y seleccionarlos)."""
+        if universe not in self.view.universes or count <= 0:
+            return
+        first = self.view.universes.index(universe) * self.view.num_channels + start
+        last = first + count - 1
+        self.table.scrollTo(self.model.index(first // COLUMNS, 0), QAbstractItemView.PositionAtTop)
+        if select:
+            selection = QItemSelection()
+            for row in range(first // COLUMNS, last // COLUMNS + 1):
+                left = max(first, row * COLUMNS) % COLUMNS
+                right = min(last, row * COLUMNS + COLUMNS - 1) % COLUMNS
+                selection.select(self.model.index(row, left), self.model.index(row, right))
+            self.table.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+
+    def stop(self):
+        self.timer.stop()
+        self.view.stop()
@@ -12,32 +12,64 @@ Este archivo está corregido y reforzado:
 import os
 import sys
 import json
-import time
 import threading
 import logging
 import types
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QTabWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QSlider, QPushButton, QComboBox, QSpinBox, QTextEdit,
+    QLabel, QSlider, QPushButton, QComboBox, QSpinBox, QDoubleSpinBox, QCheckBox, QTextEdit,
     QFileDialog, QMessageBox
 )
 from PyQt5.QtCore import Qt, QTimer
 
+from backend import logpipe
+import channelgrid
+
 # Crear carpeta de logs antes de configurar logging
 os.makedirs('logs', exist_ok=True)
-logging.basicConfig(
-    filename='logs/dmx_controller.log',
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Logging sin bloqueos: cola + hilo escritor, con límite por sitio de llamada (ver backend/logpipe.py).
+# DMX_LOG_LEVEL=DEBUG para depurar; por defecto INFO
+DMX_LOG_LEVEL = os.environ.get('DMX_LOG_LEVEL', 'INFO').upper()
+LOG_RING = logpipe.setup_logging('logs/dmx_controller.log', level=getattr(logging, DMX_LOG_LEVEL, logging.INFO))
+# Líneas que conserva el panel de logs de la UI
+LOG_VIEW_LINES = 500
 
 # Configuración de puerto DMX (cámbiala aquí si usas otro puerto)
 DMX_PORT = os.environ.get('DMX_PORT', '/dev/serial0')
 DMX_BAUDRATE = int(os.environ.get('DMX_BAUDRATE', '250000'))
+# Universos adicionales: lista de puertos separada por comas (universo 1 = primer puerto)
+DMX_PORTS = [p.strip() for p in os.environ.get('DMX_PORTS', DMX_PORT).split(',') if p.strip()]
+# Modo adaptativo: tramas cortadas al último canal en uso y frecuencia máxima legal
+DMX_ADAPTIVE = os.environ.get('DMX_ADAPTIVE', '0') == '1'
+# Estrategia de break/MAB del UART: sleep (por defecto), spin o baud
+DMX_BREAK_MODE = os.environ.get('DMX_BREAK_MODE', 'sleep')
+# Entrada DMX por red (sACN/Art-Net): 'htp' o 'ltp' para activarla, vacío = desactivada
+DMX_NET_INPUT = os.environ.get('DMX_NET_INPUT', '').lower()
+# Patch de fijaciones adicionales (JSON, ver backend/patch.py); vacío = sólo las cabezas de la UI
+DMX_PATCH = os.environ.get('DMX_PATCH', '')
+# Biblioteca binaria de escenas (ver backend/scenelib.py); se crea si no existe
+DMX_SCENE_LIBRARY = os.environ.get('DMX_SCENE_LIBRARY', os.path.join('presets', 'scenes.dmxs'))
+# Puerto de la API remota HTTP/WebSocket (ver backend/remote.py); vacío = desactivada
+DMX_REMOTE_PORT = os.environ.get('DMX_REMOTE_PORT', '')
+# Dirección de escucha de la API remota; fuera de 127.0.0.1 exige DMX_REMOTE_TOKEN
+DMX_REMOTE_HOST = os.environ.get('DMX_REMOTE_HOST', '127.0.0.1')
+DMX_REMOTE_TOKEN = os.environ.get('DMX_REMOTE_TOKEN', '')
 
 # Intentar importar módulos del /backend; si faltan, crear stubs que no rompan la app
 try:
     from backend import dmx as dmx
+    from backend import universes as universes
+    from backend import netinput as netinput
+    from backend import scheduler as scheduler
+    from backend import compositor as compositor
+    from backend import fixtures as fixtures
+    from backend import patch as patch
+    from backend import fades as fades
+    from backend import scenelib as scenelib
+    from backend import scenecache as scenecache
+    from backend import playbacks as playbacks
+    from backend import tempo as tempo
+    from backend import channelview as channelview
 except Exception as e:
     logging.exception('No se pudo importar backend.dmx; la aplicación no podrá usar DMX: %s', e)
     raise SystemExit(f"Error crítico: no se puede importar backend.dmx: {e}")
@@ -83,6 +115,9 @@ def _stub_module(name):
     elif name == 'osc':
         m.start_osc_server = lambda *a, **k: logging.warning('osc.start_osc_server (stub)')
         m.stop_osc_server = lambda : logging.warning('osc.stop_osc_server (stub)')
+    elif name == 'remote':
+        m.start_remote_api = lambda *a, **k: logging.warning('remote.start_remote_api (stub)')
+        m.stop_remote_api = lambda : logging.warning('remote.stop_remote_api (stub)')
     elif name == 'sequences':
         m.load_sequence = lambda p: None
         m.run_sequence = lambda *a, **k: logging.warning('sequences.run_sequence (stub)')
@@ -90,7 +125,7 @@ def _stub_module(name):
     return m
 
 # Intentar importar los módulos no críticos y crear stubs si faltan
-backend_names = ('effects', 'sensors', 'scenes', 'leds', 'ir', 'audio', 'osc', 'sequences')
+backend_names = ('effects', 'sensors', 'scenes', 'leds', 'ir', 'audio', 'osc', 'sequences', 'remote')
 backend = {}
 for name in backend_names:
     try:
@@ -108,6 +143,7 @@ ir = backend['ir']
 audio = backend['audio']
 osc = backend['osc']
 sequences = backend['sequences']
+remote = backend['remote']
 
 
 class DMXControllerApp(QWidget):
@@ -126,16 +162,53 @@ class DMXControllerApp(QWidget):
         self.last_temperature = None
         self.last_humidity = None
 
-        # DMX: inicializar y arrancar
+        # DMX: un universo por puerto, todos sincronizados por el mismo reloj
+        self.universes = universes.UniverseManager()
+        for number, port in enumerate(DMX_PORTS, start=1):
+            try:
+                self.universes.add_universe(number, port=port, baudrate=DMX_BAUDRATE, adaptive=DMX_ADAPTIVE, break_mode=DMX_BREAK_MODE)
+            except Exception as e:
+                logging.exception('No se pudo inicializar DMXSender: %s', e)
+                QMessageBox.critical(self, 'Error DMX', f'No se pudo abrir el puerto DMX ({port}).\n{e}')
+                self.universes.stop()
+                raise SystemExit(1)
+        # Salida del universo 1 y capas que se mezclan en ella una vez por trama:
+        # escena base < efectos < programador manual < remoto (OSC)
+        self.output = self.universes[1].output
+        self.compositor = compositor.Compositor(self.output)
+        self.scene_layer = self.compositor.add_layer('scene')
+        self.fx_layer = self.compositor.add_layer('effects', track_writes=True)
+        self.dmx = self.compositor.add_layer('programmer', track_writes=True)
+        self.remote_layer = self.compositor.add_layer('remote', track_writes=True)
+        # Las escenas se recuperan con fundido sobre la capa de escena
+        self.scene_fader = fades.CrossfadeEngine(self.scene_layer)
         try:
-            self.dmx = dmx.DMXSender(port=DMX_PORT, baudrate=DMX_BAUDRATE)
+            self.scene_library = scenelib.SceneLibrary(DMX_SCENE_LIBRARY)
         except Exception as e:
-            logging.exception('No se pudo inicializar DMXSender: %s', e)
-            QMessageBox.critical(self, 'Error DMX', f'No se pudo abrir el puerto DMX ({DMX_PORT}).\n{e}')
-            raise SystemExit(1)
+            logging.exception('No se pudo abrir la biblioteca de escenas %s: %s', DMX_SCENE_LIBRARY, e)
+            self.scene_library = None
+        # Escenas en memoria (LRU + slots para GUI/OSC/IR); las secuencias precargan las suyas
+        self.scene_cache = scenecache.SceneCache(self.scene_library)
+        if hasattr(sequences, 'sequence_manager'):
+            sequences.sequence_manager.scene_cache = self.scene_cache
+        # Pilas de cues concurrentes, cada una en su capa entre efectos y programador
+        self.playbacks = playbacks.PlaybackManager(self.compositor, scene_loader=self.scene_cache.get, below='programmer')
+
+        # Patch: las cabezas de la UI (grupo 'heads') más las fijaciones de DMX_PATCH
+        self.patch = patch.Patch()
+        if DMX_PATCH:
+            try:
+                self.patch = patch.Patch.load(DMX_PATCH)
+            except Exception as e:
+                logging.exception('No se pudo cargar el patch %s: %s', DMX_PATCH, e)
+        self.repatch_heads()
 
-        # Iniciar transmisión DMX en hilo propio del sender
-        self.dmx.start()
+        # Efectos, secuencias y compositor se renderizan en el reloj de tramas del universo 1
+        scheduler.frame_scheduler.attach(self.output)
+        self.compositor.start()
+
+        # Iniciar transmisión DMX (reloj único + un hilo de escritura por puerto)
+        self.universes.start()
 
         # UI
         self.init_ui()
@@ -161,6 +234,8 @@ class DMXControllerApp(QWidget):
         # Log panel
         self.log_view = QTextEdit()
         self.log_view.setReadOnly(True)
+        self.log_view.document().setMaximumBlockCount(LOG_VIEW_LINES)
+        self.log_seq = 0
         layout.addWidget(QLabel("Logs:"))
         layout.addWidget(self.log_view)
 
@@ -188,22 +263,30 @@ class DMXControllerApp(QWidget):
 
         h_conf.addWidget(QLabel("Heads:"))
         self.heads_spin = QSpinBox()
-        self.heads_spin.setRange(1, 10)
+        self.heads_spin.setRange(1, self.max_heads())
         self.heads_spin.setValue(self.heads)
         self.heads_spin.valueChanged.connect(self.change_heads)
         h_conf.addWidget(self.heads_spin)
         layout.addLayout(h_conf)
 
-        # Sliders for each head and channel
-        self.sliders = {}
-        self.slider_layout = QVBoxLayout()
-        layout.addLayout(self.slider_layout)
-        self.create_controls()
+        # Rejilla de canales de todos los universos (modelo/vista, ver channelgrid.py):
+        # se muestra la salida mezclada y se escribe en el programador
+        self.channel_view = channelview.ChannelView(
+            {number: universe.output for number, universe in self.universes.universes.items()},
+            self.patch_outputs())
+        self.channel_view.start()
+        self.channel_grid = channelgrid.ChannelGrid(self.channel_view, self.patch)
+        self.channel_grid.channels_set.connect(self.grid_channels_set)
+        layout.addWidget(self.channel_grid)
+        self.show_heads()
 
         # Buttons
         btn_blackout = QPushButton("Blackout")
         btn_blackout.clicked.connect(self.blackout)
         layout.addWidget(btn_blackout)
+        btn_release = QPushButton("Release Manual")
+        btn_release.clicked.connect(self.release_manual)
+        layout.addWidget(btn_release)
 
         tab.setLayout(layout)
         return tab
@@ -233,6 +316,24 @@ class DMXControllerApp(QWidget):
         self.speed_slider.valueChanged.connect(self.update_effect_speed)
         layout.addWidget(QLabel("Effect Speed"))
         layout.addWidget(self.speed_slider)
+        # Tempo: los efectos van sincronizados al reloj de beats (tap, BPM, beat del audio)
+        h_tempo = QHBoxLayout()
+        btn_tap = QPushButton("Tap")
+        btn_tap.clicked.connect(self.tap_tempo)
+        h_tempo.addWidget(btn_tap)
+        h_tempo.addWidget(QLabel("BPM:"))
+        self.bpm_spin = QDoubleSpinBox()
+        self.bpm_spin.setRange(tempo.MIN_BPM, tempo.MAX_BPM)
+        self.bpm_spin.setSingleStep(0.5)
+        self.bpm_spin.setValue(tempo.beat_clock.bpm)
+        self.bpm_spin.valueChanged.connect(self.set_tempo)
+        h_tempo.addWidget(self.bpm_spin)
+        self.audio_beat_check = QCheckBox("Follow Audio Beat")
+        self.audio_beat_check.toggled.connect(self.follow_audio_beat)
+        h_tempo.addWidget(self.audio_beat_check)
+        self.tempo_label = QLabel("")
+        h_tempo.addWidget(self.tempo_label)
+        layout.addLayout(h_tempo)
         tab.setLayout(layout)
         return tab
 
@@ -245,6 +346,52 @@ class DMXControllerApp(QWidget):
         btn_load.clicked.connect(self.load_scene)
         layout.addWidget(btn_save)
         layout.addWidget(btn_load)
+
+        # Biblioteca de escenas: recuperación directa desde el mmap
+        h_lib = QHBoxLayout()
+        self.scene_combo = QComboBox()
+        self.refresh_scene_combo()
+        h_lib.addWidget(self.scene_combo)
+        btn_recall = QPushButton("Recall")
+        btn_recall.clicked.connect(lambda: self.recall_scene(self.scene_combo.currentText()))
+        h_lib.addWidget(btn_recall)
+        btn_import = QPushButton("Import JSON Scenes")
+        btn_import.clicked.connect(self.import_scenes)
+        h_lib.addWidget(btn_import)
+        layout.addLayout(h_lib)
+
+        # Slots: la escena elegida queda fija en memoria ('ir' se recupera con el sensor IR)
+        h_slots = QHBoxLayout()
+        h_slots.addWidget(QLabel("Slot:"))
+        self.slot_combo = QComboBox()
+        self.slot_combo.addItems(["1", "2", "3", "4", "ir"])
+        h_slots.addWidget(self.slot_combo)
+        btn_assign = QPushButton("Assign")
+        btn_assign.clicked.connect(self.assign_slot)
+        h_slots.addWidget(btn_assign)
+        btn_slot = QPushButton("Recall Slot")
+        btn_slot.clicked.connect(self.recall_slot)
+        h_slots.addWidget(btn_slot)
+        layout.addLayout(h_slots)
+        self.cache_label = QLabel()
+        layout.addWidget(self.cache_label)
+        self.update_cache_label()
+
+        # Tiempos del fundido al cargar una escena (0 = corte)
+        h_fade = QHBoxLayout()
+        self.fade_in_spin = QDoubleSpinBox()
+        self.fade_out_spin = QDoubleSpinBox()
+        self.fade_delay_spin = QDoubleSpinBox()
+        for label, spin in (("Fade in (s):", self.fade_in_spin), ("Fade out (s):", self.fade_out_spin),
+                            ("Delay (s):", self.fade_delay_spin)):
+            spin.setRange(0.0, 60.0)
+            spin.setSingleStep(0.5)
+            h_fade.addWidget(QLabel(label))
+            h_fade.addWidget(spin)
+        self.easing_combo = QComboBox()
+        self.easing_combo.addItems(list(fades.EASINGS))
+        h_fade.addWidget(self.easing_combo)
+        layout.addLayout(h_fade)
         tab.setLayout(layout)
         return tab
 
@@ -274,136 +421,235 @@ class DMXControllerApp(QWidget):
         layout.addWidget(btn_load)
         layout.addWidget(btn_run)
         layout.addWidget(btn_stop)
+
+        # Transporte: bucle, pausa y posición (arrastrar = saltar a ese instante)
+        h_transport = QHBoxLayout()
+        self.loop_check = QCheckBox("Loop")
+        h_transport.addWidget(self.loop_check)
+        btn_pause = QPushButton("Pause/Resume")
+        btn_pause.clicked.connect(self.pause_sequence)
+        h_transport.addWidget(btn_pause)
+        self.seq_slider = QSlider(Qt.Horizontal)
+        self.seq_slider.setRange(0, 1000)
+        self.seq_slider.sliderMoved.connect(self.seek_sequence)
+        h_transport.addWidget(self.seq_slider)
+        self.seq_label = QLabel("0.0 / 0.0 s")
+        h_transport.addWidget(self.seq_label)
+        layout.addLayout(h_transport)
+
+        # Playbacks: la secuencia cargada como pila de cues independiente (varias a la vez)
+        h_pb = QHBoxLayout()
+        btn_add_pb = QPushButton("New Playback")
+        btn_add_pb.clicked.connect(self.add_playback)
+        h_pb.addWidget(btn_add_pb)
+        self.playback_combo = QComboBox()
+        self.playback_combo.currentTextChanged.connect(self.select_playback)
+        h_pb.addWidget(self.playback_combo)
+        for label, handler in (("GO", self.playback_go), ("BACK", self.playback_back),
+                               ("PAUSE", self.playback_pause), ("Remove", self.remove_playback)):
+            btn = QPushButton(label)
+            btn.clicked.connect(handler)
+            h_pb.addWidget(btn)
+        h_pb.addWidget(QLabel("Rate:"))
+        self.rate_spin = QDoubleSpinBox()
+        self.rate_spin.setRange(0.1, 10.0)
+        self.rate_spin.setSingleStep(0.1)
+        self.rate_spin.setValue(1.0)
+        self.rate_spin.valueChanged.connect(self.playback_rate)
+        h_pb.addWidget(self.rate_spin)
+        h_pb.addWidget(QLabel("Master:"))
+        self.master_slider = QSlider(Qt.Horizontal)
+        self.master_slider.setRange(0, 100)
+        self.master_slider.setValue(100)
+        self.master_slider.valueChanged.connect(self.playback_master)
+        h_pb.addWidget(self.master_slider)
+        layout.addLayout(h_pb)
         tab.setLayout(layout)
         return tab
 
     # ------------------ Helpers -----------------------------
-    def clear_layout(self, layout):
-        if layout is None:
-            return
-        while layout.count():
-            item = layout.takeAt(0)
-            widget = item.widget()
-            if widget is not None:
-                widget.deleteLater()
-            else:
-                child_layout = item.layout()
-                if child_layout is not None:
-                    self.clear_layout(child_layout)
-
-    def create_controls(self):
-        # Remove existing controls
-        self.clear_layout(self.slider_layout)
-        self.sliders = {}
-
+    def max_heads(self):
+        # Cabezas que caben en el universo a partir de la dirección 1 con el modo actual
+        return self.patch.num_channels // self.mode_channels
+
+    def repatch_heads(self):
+        """Volver a parchear las cabezas de la UI (H1..Hn contiguas desde start_address)."""
+        for fixture_id in self.patch.groups.get('heads', []):
+            self.patch.remove(fixture_id)
+        ids = []
         for head in range(self.heads):
-            for ch in range(self.mode_channels):
-                h_layout = QHBoxLayout()
-                lbl = QLabel(f"H{head+1}-CH{ch+1}")
-                slider = QSlider(Qt.Horizontal)
-                slider.setRange(0, 255)
-                # capture head and ch by default args
-                slider.valueChanged.connect(lambda val, h=head, c=ch: self.update_dmx(h, c, val))
-                h_layout.addWidget(lbl)
-                h_layout.addWidget(slider)
-                self.sliders[(head, ch)] = slider
-                self.slider_layout.addLayout(h_layout)
-
-        # After creating sliders, sync their positions from current DMX buffer
-        self.sync_sliders_with_dmx()
-        self.log(f"Controls created: {self.heads} heads x {self.mode_channels} channels")
-
-    def sync_sliders_with_dmx(self):
-        # Set each slider to reflect DMX buffer value (block signals to avoid feedback)
-        for (head, ch), slider in self.sliders.items():
-            addr = self.start_address - 1 + head * self.mode_channels + ch
-            with self.dmx.lock:
-                if 0 <= addr < len(self.dmx.dmx_data):
-                    value = self.dmx.dmx_data[addr]
-                else:
-                    value = 0
-            slider.blockSignals(True)
-            slider.setValue(int(value))
-            slider.blockSignals(False)
+            address = self.start_address + head * self.mode_channels
+            try:
+                self.patch.add(f"H{head + 1}", address, 1, fixtures.DEFAULT_PROFILE, self.mode_channels)
+            except ValueError as e:
+                logging.warning(f"Head H{head + 1} not patched: {e}")
+                continue
+            ids.append(f"H{head + 1}")
+        self.patch.add_group('heads', ids)
+        self.scene_fader.set_pairs(self.patch.pairs(1))
+        self.update_patched_length()
+
+    def patch_outputs(self):
+        # Escrituras de grupo: el universo 1 pasa por el programador, el resto directo a su salida
+        outputs = {number: universe.output for number, universe in self.universes.universes.items()}
+        outputs[1] = self.dmx
+        return outputs
+
+    def update_patched_length(self):
+        # En modo adaptativo se envía al menos hasta el último canal de la última fijación
+        for number, universe in self.universes.universes.items():
+            if hasattr(universe.output, 'set_patched_length'):
+                universe.output.set_patched_length(self.patch.span(number))
+
+    def show_heads(self):
+        # Llevar la rejilla a los canales de las cabezas de la UI; la selección del fader la hace el usuario
+        # (seleccionarlos todos movería pan/tilt/strobe a la vez con el dimmer)
+        self.channel_grid.model.patch_changed()
+        self.channel_grid.show_channels(1, self.start_address - 1, self.heads * self.mode_channels)
 
     # ------------------ Event handlers ---------------------
     def change_mode(self, index):
         self.mode_channels = 9 if index == 0 else 14
-        self.create_controls()
+        self.heads_spin.setRange(1, self.max_heads())
+        self.repatch_heads()
+        self.show_heads()
         self.log(f"Changed to {self.mode_channels}CH mode")
 
     def change_address(self, value):
         self.start_address = int(value)
-        # After address change, resync sliders to reflect new mapping
-        self.sync_sliders_with_dmx()
+        self.repatch_heads()
+        self.show_heads()
         self.log(f"Start address set to d{str(value).zfill(3)}")
 
     def change_heads(self, value):
         self.heads = int(value)
-        self.create_controls()
+        self.repatch_heads()
+        self.show_heads()
         self.log(f"Number of heads set to {self.heads}")
 
-    def update_dmx(self, head, channel, value):
-        addr = self.start_address - 1 + head * self.mode_channels + channel
-        self.dmx.update_channel(addr, value)
-        self.log(f"DMX channel {addr+1} set to {value}")
+    def grid_channels_set(self, indices, value):
+        universe, channel = self.channel_view.locate(indices[0])
+        more = f" (+{len(indices) - 1})" if len(indices) > 1 else ""
+        # Un fader arrastrado loguea unas pocas veces y luego un resumen por segundo y selección
+        self.log(f"DMX U{universe} channel {channel + 1}{more} set to {value}", key=int(indices[0]))
 
     def blackout(self):
-        for head in range(self.heads):
-            for ch in range(self.mode_channels):
-                addr = self.start_address - 1 + head * self.mode_channels + ch
-                self.dmx.update_channel(addr, 0)
-        self.sync_sliders_with_dmx()
+        self.dmx.update_channels(self.start_address - 1, bytes(self.heads * self.mode_channels))
         self.log("Blackout activated")
 
+    def release_manual(self):
+        # Devolver todos los canales del programador a escena/efectos
+        self.dmx.release()
+        self.log("Manual control released")
+
     def pick_color(self):
         from PyQt5.QtGui import QColor
         from PyQt5.QtWidgets import QColorDialog
         color = QColorDialog.getColor()
         if color.isValid():
-            for head in range(self.heads):
-                base = self.start_address - 1 + head * self.mode_channels
-                # mapping RGB indices (heurística; depende de tu modo real)
-                r_idx = base + (3 if self.mode_channels == 9 else 6)
-                g_idx = r_idx + 1
-                b_idx = r_idx + 2
-                self.dmx.update_channel(r_idx, color.red())
-                self.dmx.update_channel(g_idx, color.green())
-                self.dmx.update_channel(b_idx, color.blue())
-            self.sync_sliders_with_dmx()
+            # Todas las fijaciones cambian en la misma trama: una escritura por universo
+            self.patch.set(self.patch_outputs(), patch.ALL, ('red', 'green', 'blue'),
+                           (color.red(), color.green(), color.blue()))
             self.log(f"Color applied: {color.name()}")
 
     def save_scene(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save Scene", filter="JSON Files (*.json)")
         if path:
-            scenes.save_scene(self.dmx.dmx_data, path)
+            with self.output.lock:
+                data = bytes(self.output.dmx_data)
+            scenes.save_scene(data, path)
+            name = os.path.splitext(os.path.basename(path))[0]
+            if self.scene_library is not None:
+                self.scene_library.store(name, data)
+                self.refresh_scene_combo()
+            self.scene_cache.invalidate(path)
+            self.scene_cache.invalidate(name)
             self.log(f"Scene saved: {path}")
 
     def load_scene(self):
         path, _ = QFileDialog.getOpenFileName(self, "Load Scene", filter="JSON Files (*.json)")
         if path:
-            data = scenes.load_scene(path)
-            # data expected as iterable of ints
-            for i, value in enumerate(data):
-                self.dmx.update_channel(i, int(value))
-            self.sync_sliders_with_dmx()
+            # Lista de 512 valores o {"dirección": valor}
+            try:
+                self.apply_scene(self.scene_cache.get(path))
+            except Exception as e:
+                self.log(f"Error loading scene {path}: {e}")
+                return
             self.log(f"Scene loaded: {path}")
 
+    def apply_scene(self, data):
+        """Llevar la capa de escena a `data` con los tiempos de fundido de la UI (0 = corte)."""
+        fade_in, fade_out = self.fade_in_spin.value(), self.fade_out_spin.value()
+        delay = self.fade_delay_spin.value()
+        if fade_in or fade_out or delay:
+            self.scene_fader.fade_to(data, fade_in=fade_in, fade_out=fade_out, delay=delay,
+                                     easing=self.easing_combo.currentText())
+        else:
+            self.scene_fader.stop()
+            self.scene_layer.update_channels(0, data)
+        self.update_cache_label()
+
+    def recall_scene(self, name):
+        try:
+            self.apply_scene(self.scene_cache.get(name))
+        except KeyError:
+            self.log(f"Scene {name!r} not in library")
+            return
+        self.log(f"Scene recalled: {name}")
+
+    def assign_slot(self):
+        name = self.scene_combo.currentText()
+        if not name:
+            return
+        try:
+            self.scene_cache.assign(self.slot_combo.currentText(), name)
+        except KeyError:
+            self.log(f"Scene {name!r} not in library")
+            return
+        self.update_cache_label()
+        self.log(f"Slot {self.slot_combo.currentText()} = {name}")
+
+    def recall_slot(self):
+        slot = self.slot_combo.currentText()
+        try:
+            name, data = self.scene_cache.slot(slot)
+        except KeyError:
+            self.log(f"Slot {slot} not assigned")
+            return
+        self.apply_scene(data)
+        self.log(f"Slot {slot} recalled: {name}")
+
+    def update_cache_label(self):
+        st = self.scene_cache.stats()
+        self.cache_label.setText(f"Cache: {st['scenes']} scenes, hits {st['hits']} / misses {st['misses']} "
+                                 f"({st['hit_rate']:.0%}), evictions {st['evictions']}, prefetched {st['prefetched']}")
+
+    def refresh_scene_combo(self):
+        self.scene_combo.clear()
+        if self.scene_library is not None:
+            self.scene_combo.addItems(self.scene_library.names())
+
+    def import_scenes(self):
+        if self.scene_library is None:
+            return
+        paths, _ = QFileDialog.getOpenFileNames(self, "Import Scenes")
+        if paths:
+            names = scenelib.import_json_scenes(self.scene_library, paths)
+            self.refresh_scene_combo()
+            self.log(f"Scenes imported: {', '.join(names)}")
+
     def run_effect(self, name):
-        if getattr(self, 'effect_thread', None) and self.effect_thread.is_alive():
-            self.log("Another effect is running")
+        # Ninguno bloquea: los efectos se renderizan en el reloj de tramas y el
+        # audio gestiona su propio hilo de captura
+        manager = getattr(effects, 'effect_manager', None)
+        if manager is not None and manager.current_effect == name:
+            # Relanzarlo liberaría la capa y reanclaría el efecto al beat actual
+            self.log(f"Effect {name} already running")
             return
         if name == "AudioReactivity":
-            self.effect_thread = threading.Thread(
-                target=lambda: audio.run_audio_reactivity(self.dmx, self.start_address, self.heads, self.mode_channels),
-                daemon=True
-            )
+            audio.run_audio_reactivity(self.fx_layer, self.start_address, self.heads, self.mode_channels)
         else:
-            self.effect_thread = threading.Thread(
-                target=lambda: effects.run_effect(name, self.dmx, self.start_address, self.heads, self.mode_channels),
-                daemon=True
-            )
-        self.effect_thread.start()
+            effects.run_effect(name, self.fx_layer, self.start_address, self.heads, self.mode_channels)
         self.log(f"Effect {name} started")
         leds.set_led_color(0, 0, 1)
 
@@ -413,7 +659,7 @@ class DMXControllerApp(QWidget):
             audio.stop_audio_reactivity()
         except Exception:
             logging.exception('Error stopping effect/audio')
-        self.effect_thread = None
+        self.fx_layer.release()
         self.log("Effect stopped")
         leds.set_led_color(0, 1, 0)
 
@@ -424,6 +670,33 @@ class DMXControllerApp(QWidget):
         except Exception:
             logging.exception('Error setting effect speed')
 
+    def tap_tempo(self):
+        tempo.beat_clock.tap()
+        self.update_tempo_label()
+
+    def set_tempo(self, value):
+        tempo.set_bpm(value)
+
+    def follow_audio_beat(self, enabled):
+        if enabled:
+            reactivity = getattr(audio, 'audio_reactivity', None)
+            if reactivity is None:
+                self.log("Audio beat not available")
+                return
+            tempo.beat_clock.follow_audio(reactivity)
+            self.log("Tempo follows the audio beat (start AudioReactivity for input)")
+        else:
+            tempo.beat_clock.unfollow_audio()
+
+    def update_tempo_label(self):
+        status = tempo.beat_clock.status()
+        if not self.bpm_spin.hasFocus():
+            # Sin señal: reflejar el tempo de tap/audio/OSC sin volver a fijarlo
+            self.bpm_spin.blockSignals(True)
+            self.bpm_spin.setValue(status['bpm'])
+            self.bpm_spin.blockSignals(False)
+        self.tempo_label.setText(f"{status['bpm']:.1f} BPM ({status['source']})")
+
     def load_sequence(self):
         path, _ = QFileDialog.getOpenFileName(self, "Load Sequence", filter="JSON Files (*.json)")
         if path:
@@ -432,25 +705,115 @@ class DMXControllerApp(QWidget):
 
     def run_sequence(self):
         if hasattr(self, 'current_sequence') and self.current_sequence:
-            if getattr(self, 'sequence_thread', None) and self.sequence_thread.is_alive():
+            if getattr(getattr(sequences, 'sequence_manager', None), 'running', False):
                 self.log("Another sequence is running")
                 return
-            self.sequence_thread = threading.Thread(
-                target=lambda: sequences.run_sequence(self.dmx, self.start_address, self.heads, self.mode_channels, self.current_sequence),
-                daemon=True
-            )
-            self.sequence_thread.start()
+            started = sequences.run_sequence(self.fx_layer, self.start_address, self.heads, self.mode_channels,
+                                             self.current_sequence, loop=self.loop_check.isChecked())
+            if started is False:
+                self.log("Sequence could not be started (see log)")
+                return
             self.log("Sequence started")
             leds.set_led_color(0, 0, 1)
         else:
             self.log("No sequence loaded")
 
+    def current_playback(self):
+        name = self.playback_combo.currentText()
+        try:
+            return self.playbacks[name] if name else None
+        except KeyError:
+            return None
+
+    def add_playback(self):
+        if not getattr(self, 'current_sequence', None):
+            self.log("No sequence loaded")
+            return
+        name = f"P{len(self.playbacks) + 1}"
+        while name in [pb.name for pb in self.playbacks.playbacks]:
+            name += "'"
+        try:
+            self.playbacks.add_playback(name, self.current_sequence, self.start_address, self.heads, self.mode_channels)
+        except Exception as e:
+            self.log(f"Error creating playback: {e}")
+            return
+        self.playback_combo.addItem(name)
+        self.playback_combo.setCurrentText(name)
+        self.log(f"Playback {name} created ({len(self.current_sequence)} cues)")
+
+    def remove_playback(self):
+        playback = self.current_playback()
+        if playback is not None:
+            self.playbacks.remove_playback(playback.name)
+            self.playback_combo.removeItem(self.playback_combo.currentIndex())
+            self.log(f"Playback {playback.name} removed")
+
+    def select_playback(self, name):
+        playback = self.current_playback()
+        if playback is not None:
+            self.rate_spin.blockSignals(True)
+            self.rate_spin.setValue(playback.rate)
+            self.rate_spin.blockSignals(False)
+            self.master_slider.blockSignals(True)
+            self.master_slider.setValue(int(playback.master * 100))
+            self.master_slider.blockSignals(False)
+
+    def playback_go(self):
+        playback = self.current_playback()
+        if playback is not None:
+            playback.go()
+
+    def playback_back(self):
+        playback = self.current_playback()
+        if playback is not None:
+            playback.back()
+
+    def playback_pause(self):
+        playback = self.current_playback()
+        if playback is not None:
+            playback.pause()
+            self.log(f"Playback {playback.name} {'paused' if playback.paused else 'resumed'}")
+
+    def playback_rate(self, value):
+        playback = self.current_playback()
+        if playback is not None:
+            playback.rate = value
+
+    def playback_master(self, value):
+        playback = self.current_playback()
+        if playback is not None:
+            playback.master = value / 100.0
+
+    def pause_sequence(self):
+        manager = getattr(sequences, 'sequence_manager', None)
+        if manager is None or not manager.running:
+            return
+        if manager.paused:
+            manager.resume()
+            self.log("Sequence resumed")
+        else:
+            manager.pause()
+            self.log("Sequence paused")
+
+    def seek_sequence(self, value):
+        manager = getattr(sequences, 'sequence_manager', None)
+        if manager is not None and manager.running:
+            manager.seek(value / 1000.0 * manager.duration)
+
+    def update_sequence_position(self):
+        manager = getattr(sequences, 'sequence_manager', None)
+        if manager is None or not manager.running:
+            return
+        duration = manager.duration
+        if not self.seq_slider.isSliderDown() and duration > 0:
+            self.seq_slider.setValue(int(manager.position / duration * 1000))
+        self.seq_label.setText(f"{manager.position:.1f} / {duration:.1f} s")
+
     def stop_sequence(self):
         try:
             sequences.stop_sequence()
         except Exception:
             logging.exception('Error stopping sequence')
-        self.sequence_thread = None
         self.log("Sequence stopped")
         leds.set_led_color(0, 1, 0)
 
@@ -459,7 +822,13 @@ class DMXControllerApp(QWidget):
         # Timer to update UI from data produced by background threads
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_sensor)
+        self.timer.timeout.connect(self.update_sequence_position)
+        self.timer.timeout.connect(self.update_tempo_label)
         self.timer.start(1000)
+        # El panel de logs se vuelca desde el anillo de logpipe, nunca desde quien loguea
+        self.log_timer = QTimer()
+        self.log_timer.timeout.connect(self.flush_log_view)
+        self.log_timer.start(250)
 
     def start_threads(self):
         # Sensor reader thread: escribe última lectura en variables protegidas
@@ -470,13 +839,35 @@ class DMXControllerApp(QWidget):
         self.ir_thread = threading.Thread(target=self.monitor_ir, daemon=True)
         self.ir_thread.start()
 
-        # OSC server thread (delegado al módulo)
+        # Servidor OSC (delegado al módulo): start() abre el puerto y vuelve; su bucle tiene hilo propio
         try:
-            self.osc_thread = threading.Thread(target=lambda: osc.start_osc_server(self.dmx), daemon=True)
-            self.osc_thread.start()
+            osc.start_osc_server(self.remote_layer, self.scene_cache, self.scene_layer, tempo.beat_clock,
+                                 self.patch, self.patch_outputs())
         except Exception:
             logging.exception('No se pudo iniciar osc server')
 
+        # API remota HTTP/WebSocket: comandos sobre las mismas capas y stream de la salida mezclada
+        if DMX_REMOTE_PORT:
+            try:
+                remote.start_remote_api(
+                    self.remote_layer, port=int(DMX_REMOTE_PORT), host=DMX_REMOTE_HOST, token=DMX_REMOTE_TOKEN,
+                    monitor=self.output, scene_cache=self.scene_cache,
+                    scene_output=self.scene_layer, effects_output=self.fx_layer,
+                    rig=lambda: (self.start_address, self.heads, self.mode_channels),
+                    beat_clock=tempo.beat_clock)
+            except Exception:
+                logging.exception('No se pudo iniciar la API remota')
+
+        # Entrada sACN/Art-Net mezclada en la salida del universo 1 (opcional)
+        self.net_input = None
+        if DMX_NET_INPUT:
+            try:
+                self.net_input = netinput.NetworkInput(mode=DMX_NET_INPUT)
+                self.net_input.attach(self.output, sacn_universe=1, artnet_universe=0)
+                self.net_input.start()
+            except Exception:
+                logging.exception('No se pudo iniciar la entrada DMX por red')
+
         logging.info('Threads started: Sensor, IR, OSC')
 
     def read_sensors(self):
@@ -492,14 +883,22 @@ class DMXControllerApp(QWidget):
             self.shutdown_event.wait(1.0)
 
     def monitor_ir(self):
+        detected_before = False
         while not self.shutdown_event.is_set():
             try:
-                if ir.is_ir_detected():
-                    # Ejecutar un efecto inmediato (se hace en thread nuevo dentro de run_effect)
-                    self.run_effect("ColorChase")
+                detected = ir.is_ir_detected()
+                if detected and not detected_before:
+                    # Solo en el flanco de subida: escena del slot 'ir' si está asignado;
+                    # si no, un efecto inmediato
+                    if 'ir' in self.scene_cache.slots:
+                        self.scene_fader.stop()
+                        self.scene_cache.recall_slot('ir', self.scene_layer)
+                    else:
+                        self.run_effect("ColorChase")
                     leds.set_led_color(0, 0, 1)
-                else:
+                elif not detected:
                     leds.set_led_color(0, 1, 0)
+                detected_before = detected
             except Exception:
                 logging.exception('Error en monitor_ir')
             self.shutdown_event.wait(0.1)
@@ -513,20 +912,23 @@ class DMXControllerApp(QWidget):
             self.sensor_label.setText(f"Temp: {t:.1f}°C  Hum: {h:.1f}%")
 
     # ------------------ Logging / cierre -------------------
-    def log(self, msg):
-        ts = time.strftime('%H:%M:%S')
-        try:
-            self.log_view.append(f"{ts} - {msg}")
-        except Exception:
-            logging.exception('Error appending to log_view')
-        logging.info(msg)
+    def log(self, msg, key=None):
+        # Solo encola: el fichero y el panel se escriben desde el hilo de logpipe y el timer.
+        # stacklevel=2: el límite de logpipe cuenta por línea de quien llama, no por esta
+        logging.info(msg, extra={'log_key': key}, stacklevel=2)
+
+    def flush_log_view(self):
+        self.log_seq, lines = LOG_RING.read_since(self.log_seq)
+        if lines:
+            self.log_view.append('\n'.join(lines))
 
     def closeEvent(self, event):
         logging.info('Shutting down application...')
         # Señalizar a los hilos que paren
         self.shutdown_event.set()
 
-        # Detener efectos/sequence/OSC
+        # Detener la rejilla (aplica lo pendiente del fader) y efectos/sequence/OSC
+        self.channel_grid.stop()
         try:
             effects.stop_effect()
         except Exception:
@@ -543,10 +945,22 @@ class DMXControllerApp(QWidget):
             osc.stop_osc_server()
         except Exception:
             pass
+        try:
+            remote.stop_remote_api()
+        except Exception:
+            pass
+        self.scene_cache.stop()
+        if self.scene_library is not None:
+            self.scene_library.close()
+        if getattr(self, 'net_input', None) is not None:
+            try:
+                self.net_input.stop()
+            except Exception:
+                pass
 
         # Parar DMX y limpiar LEDs
         try:
-            self.dmx.stop()
+            self.universes.stop()
         except Exception:
             logging.exception('Error deteniendo DMX')
         try:
@@ -555,6 +969,7 @@ class DMXControllerApp(QWidget):
             logging.exception('Error limpiando LEDs')
 
         logging.info('Shutdown complete')
+        logpipe.shutdown_logging()
         event.accept()
 
 